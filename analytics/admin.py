@@ -2,7 +2,7 @@ from django.contrib import admin
 from .models import (
     EmployeeProductivity, ProjectAnalytics, DepartmentAnalytics,
     TaskPerformanceReport, EmployeeSkillRating, WorkloadDistribution,
-    DelayAnalysis
+    DelayAnalysis, DailyUserRollup, DailyProjectRollup, DailyDepartmentRollup
 )
 
 
@@ -81,3 +81,26 @@ class DelayAnalysisAdmin(admin.ModelAdmin):
     
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('task', 'task__assigned_to')
+
+
+@admin.register(DailyUserRollup)
+class DailyUserRollupAdmin(admin.ModelAdmin):
+    list_display = ('user', 'date', 'tasks_created', 'tasks_completed', 'hours_logged')
+    list_filter = ('date',)
+    search_fields = ('user__username',)
+    ordering = ('-date',)
+
+
+@admin.register(DailyProjectRollup)
+class DailyProjectRollupAdmin(admin.ModelAdmin):
+    list_display = ('project', 'date', 'tasks_created', 'tasks_completed', 'hours_logged')
+    list_filter = ('date',)
+    search_fields = ('project__name',)
+    ordering = ('-date',)
+
+
+@admin.register(DailyDepartmentRollup)
+class DailyDepartmentRollupAdmin(admin.ModelAdmin):
+    list_display = ('department', 'date', 'tasks_created', 'tasks_completed', 'hours_logged')
+    list_filter = ('department', 'date')
+    ordering = ('-date',)
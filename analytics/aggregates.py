@@ -0,0 +1,171 @@
+from decimal import Decimal
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from django.db.models import (
+    Q, Avg, Sum, Count, F, Case, When, Value, OuterRef, Subquery,
+    ExpressionWrapper, DurationField, DecimalField, FloatField
+)
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
+from tasks.models import Task, TimeLog
+
+User = get_user_model()
+
+OPEN_STATUSES = ['TODO', 'IN_PROGRESS']
+
+ANALYTICS_SUMMARY_SNAPSHOT_KEY = 'analytics_summary_snapshot'
+# Refreshed every 5 minutes by celery beat; expires if beat stops running
+ANALYTICS_SUMMARY_SNAPSHOT_TIMEOUT = 60 * 15
+
+
+def average_completion_duration(prefix=''):
+    """
+    Conditional average of task completion durations; `prefix` lets the
+    aggregate run across a relation (e.g. 'assigned_tasks__')
+    """
+    return Avg(
+        ExpressionWrapper(
+            F(f'{prefix}completed_at') - F(f'{prefix}created_at'),
+            output_field=DurationField()
+        ),
+        filter=Q(**{
+            f'{prefix}status': 'COMPLETED',
+            f'{prefix}completed_at__isnull': False,
+        })
+    )
+
+
+def duration_to_hours(duration):
+    """Convert an aggregated duration to hours, treating NULL as zero"""
+    if not duration:
+        return 0
+    return duration.total_seconds() / 3600
+
+
+def ratio_percentage(numerator, denominator):
+    """Database-side numerator / denominator * 100, zero when the denominator is"""
+    return Case(
+        When(**{f'{denominator}__gt': 0}, then=(
+            Cast(numerator, FloatField()) * 100 / Cast(denominator, FloatField())
+        )),
+        default=Value(0.0),
+        output_field=FloatField()
+    )
+
+
+# Public sort keys for employee_performance mapped to queryset annotations
+EMPLOYEE_PERFORMANCE_ORDERING = {
+    'user_name': 'first_name',
+    'department': 'department',
+    'tasks_completed': 'tasks_completed',
+    'tasks_assigned': 'tasks_assigned',
+    'completion_rate': 'completion_rate',
+    'average_task_duration': 'average_duration',
+    'efficiency_score': 'efficiency_score',
+    'total_hours_logged': 'total_hours_logged',
+}
+
+
+def employee_performance_queryset(department=None):
+    """
+    Active employees annotated with their task and time log metrics in a
+    single grouped query
+    """
+    employees = User.objects.filter(is_active_employee=True)
+    if department:
+        employees = employees.filter(department=department)
+
+    hours_logged = Subquery(
+        TimeLog.objects.filter(user=OuterRef('pk'))
+        .order_by()
+        .values('user')
+        .annotate(total=Sum('hours'))
+        .values('total')[:1]
+    )
+
+    return employees.annotate(
+        tasks_assigned=Count('assigned_tasks'),
+        tasks_completed=Count(
+            'assigned_tasks',
+            filter=Q(assigned_tasks__status='COMPLETED')
+        ),
+        average_duration=average_completion_duration('assigned_tasks__'),
+        total_hours_logged=Coalesce(
+            hours_logged,
+            Value(Decimal('0')),
+            output_field=DecimalField(max_digits=10, decimal_places=2)
+        ),
+    ).annotate(
+        completion_rate=ratio_percentage('tasks_completed', 'tasks_assigned'),
+        efficiency_score=ratio_percentage('tasks_completed', 'total_hours_logged'),
+    )
+
+
+def employee_performance_row(employee):
+    """Shape an annotated employee into the EmployeePerformanceSerializer payload"""
+    return {
+        'user_id': employee.id,
+        'user_name': employee.full_name,
+        'department': employee.department or 'N/A',
+        'tasks_completed': employee.tasks_completed,
+        'tasks_assigned': employee.tasks_assigned,
+        'completion_rate': round(employee.completion_rate, 2),
+        'average_task_duration': round(duration_to_hours(employee.average_duration), 2),
+        'efficiency_score': round(employee.efficiency_score, 2),
+        'total_hours_logged': float(employee.total_hours_logged)
+    }
+
+
+def build_analytics_summary():
+    """
+    Compute the dashboard summary: one aggregate over tasks plus the
+    employee count and total logged hours
+    """
+    task_metrics = Task.objects.aggregate(
+        total_tasks=Count('id'),
+        completed_tasks=Count('id', filter=Q(status='COMPLETED')),
+        pending_tasks=Count('id', filter=Q(status__in=OPEN_STATUSES)),
+        overdue_tasks=Count('id', filter=Q(
+            due_date__lt=timezone.now(),
+            status__in=OPEN_STATUSES
+        )),
+        average_completion=average_completion_duration(),
+    )
+
+    total_employees = User.objects.filter(is_active_employee=True).count()
+    total_hours_logged = TimeLog.objects.aggregate(
+        total=Sum('hours')
+    )['total'] or 0
+
+    completed_tasks = task_metrics['completed_tasks']
+    productivity_score = 0
+    if total_hours_logged > 0:
+        productivity_score = round((completed_tasks / float(total_hours_logged)) * 100, 2)
+
+    return {
+        'total_employees': total_employees,
+        'total_tasks': task_metrics['total_tasks'],
+        'completed_tasks': completed_tasks,
+        'pending_tasks': task_metrics['pending_tasks'],
+        'overdue_tasks': task_metrics['overdue_tasks'],
+        'average_completion_time': round(
+            duration_to_hours(task_metrics['average_completion']), 2
+        ),
+        'productivity_score': productivity_score,
+        'total_hours_logged': float(total_hours_logged)
+    }
+
+
+def refresh_analytics_summary_snapshot():
+    """Recompute the dashboard summary and store it as the cached snapshot"""
+    data = build_analytics_summary()
+    cache.set(ANALYTICS_SUMMARY_SNAPSHOT_KEY, data, ANALYTICS_SUMMARY_SNAPSHOT_TIMEOUT)
+    return data
+
+
+def get_analytics_summary_snapshot():
+    """Return the cached snapshot, computing it on first use"""
+    data = cache.get(ANALYTICS_SUMMARY_SNAPSHOT_KEY)
+    if data is None:
+        data = refresh_analytics_summary_snapshot()
+    return data
@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-16 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0003_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='projectanalytics',
+            name='completed_duration_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of completed tasks included in the duration sum'),
+        ),
+        migrations.AddField(
+            model_name='projectanalytics',
+            name='completed_duration_total',
+            field=models.DecimalField(decimal_places=2, default=0, help_text='Running sum of completion durations in hours', max_digits=12),
+        ),
+    ]
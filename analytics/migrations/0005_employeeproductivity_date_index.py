@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-16 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0004_projectanalytics_completed_duration'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employeeproductivity',
+            index=models.Index(fields=['date'], name='productivity_date_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-16 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0005_employeeproductivity_date_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='delayanalysis',
+            name='task_completed_at',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='Task completion time this analysis was computed from', null=True),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 6.0 on 2026-10-16 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0006_delayanalysis_task_completed_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='taskperformancereport',
+            name='data_version',
+            field=models.CharField(blank=True, default='', help_text='Fingerprint of the task and time log data the report was built from', max_length=40),
+        ),
+        migrations.AddIndex(
+            model_name='taskperformancereport',
+            index=models.Index(fields=['report_type', 'start_date', 'end_date', 'data_version'], name='report_range_version_idx'),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 6.0 on 2026-10-16 10:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0007_taskperformancereport_data_version'),
+        ('tasks', '0004_notificationoutbox'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyDepartmentRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('tasks_created', models.IntegerField(default=0)),
+                ('tasks_completed', models.IntegerField(default=0)),
+                ('completion_hours', models.DecimalField(decimal_places=2, default=0, help_text='Total creation-to-completion hours of the tasks completed that day', max_digits=12)),
+                ('hours_logged', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('department', models.CharField(max_length=100)),
+            ],
+            options={
+                'ordering': ['date'],
+                'abstract': False,
+                'unique_together': {('date', 'department')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyProjectRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('tasks_created', models.IntegerField(default=0)),
+                ('tasks_completed', models.IntegerField(default=0)),
+                ('completion_hours', models.DecimalField(decimal_places=2, default=0, help_text='Total creation-to-completion hours of the tasks completed that day', max_digits=12)),
+                ('hours_logged', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='tasks.project')),
+            ],
+            options={
+                'ordering': ['date'],
+                'abstract': False,
+                'unique_together': {('date', 'project')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyUserRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('tasks_created', models.IntegerField(default=0)),
+                ('tasks_completed', models.IntegerField(default=0)),
+                ('completion_hours', models.DecimalField(decimal_places=2, default=0, help_text='Total creation-to-completion hours of the tasks completed that day', max_digits=12)),
+                ('hours_logged', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['date'],
+                'abstract': False,
+                'unique_together': {('date', 'user')},
+            },
+        ),
+    ]
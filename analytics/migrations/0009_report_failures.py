@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-16 23:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0008_daily_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='taskperformancereport',
+            name='error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='taskperformancereport',
+            name='failed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,7 +1,10 @@
 from django.db import models
 from django.contrib.auth import get_user_model
-from django.db.models import Sum, Avg, Count
+from django.db.models import Sum, Avg, Count, F, ExpressionWrapper, Case, When, Value
+from django.db.models.functions import Cast, Least
+from django.db.models.lookups import GreaterThan
 from datetime import datetime, timedelta
+from decimal import Decimal
 
 User = get_user_model()
 
@@ -30,13 +33,56 @@ class EmployeeProductivity(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Largest value efficiency_score (max_digits=5) can hold
+    MAX_EFFICIENCY_SCORE = Decimal('999.99')
+
     class Meta:
         unique_together = ['user', 'date']
         ordering = ['-date']
+        indexes = [
+            # Department rollups filter on date alone
+            models.Index(fields=['date'], name='productivity_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.date} - Score: {self.efficiency_score}"
 
+    @classmethod
+    def apply_time_logged(cls, user_id, date, hours):
+        """
+        Add logged hours (negative when a time log is edited away or
+        deleted) to a single user's row for that date and recompute its
+        efficiency score in the same UPDATE, capped at what the column can
+        hold. Removing hours only updates an existing row: the row may be
+        going away with its user.
+        """
+        hours = Decimal(str(hours))
+        if not hours:
+            return
+        if hours > 0:
+            cls.objects.get_or_create(user_id=user_id, date=date)
+        
+        new_hours = F('hours_logged') + hours
+        decimal_field = models.DecimalField(max_digits=8, decimal_places=2)
+        cls.objects.filter(user_id=user_id, date=date).update(
+            hours_logged=new_hours,
+            efficiency_score=Case(
+                When(
+                    GreaterThan(new_hours, 0),
+                    then=Least(
+                        ExpressionWrapper(
+                            Cast('tasks_completed', decimal_field) * 100 / new_hours,
+                            output_field=decimal_field
+                        ),
+                        cls.MAX_EFFICIENCY_SCORE,
+                        output_field=decimal_field
+                    )
+                ),
+                default=Value(Decimal('0')),
+                output_field=decimal_field
+            )
+        )
+
 
 class ProjectAnalytics(models.Model):
     """
@@ -69,39 +115,160 @@ class ProjectAnalytics(models.Model):
         decimal_places=2, 
         default=0
     )
+    completed_duration_total = models.DecimalField(
+        max_digits=12, 
+        decimal_places=2, 
+        default=0,
+        help_text="Running sum of completion durations in hours"
+    )
+    completed_duration_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of completed tasks included in the duration sum"
+    )
     last_updated = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"Analytics for {self.project.name}"
 
+    @staticmethod
+    def task_contribution(task):
+        """
+        What a single task in its current state adds to its project's counters
+        """
+        duration = None
+        if task.status == 'COMPLETED' and task.completed_at and task.created_at:
+            duration = Decimal(
+                (task.completed_at - task.created_at).total_seconds() / 3600
+            ).quantize(Decimal('0.01'))
+        
+        return {
+            'total_tasks': 1,
+            'completed_tasks': int(task.status == 'COMPLETED'),
+            # Values assigned in memory may still be floats; the stored
+            # column has two decimal places
+            'total_hours_estimated': Decimal(str(task.estimated_hours or 0)).quantize(Decimal('0.01')),
+            'total_hours_actual': Decimal(str(task.actual_hours or 0)).quantize(Decimal('0.01')),
+            'completed_duration_total': duration or Decimal('0'),
+            'completed_duration_count': int(duration is not None),
+        }
+
+    @classmethod
+    def apply_task_change(cls, old_task, new_task):
+        """
+        Move a task's contribution from its previous state to its new one.
+        Pass old_task=None for creations and new_task=None for deletions.
+        """
+        cls.apply_task_changes([(old_task, new_task)])
+
+    @classmethod
+    def apply_task_changes(cls, changes):
+        """
+        apply_task_change for many (old_task, new_task) pairs, with one
+        UPDATE per affected project
+        """
+        deltas = {}
+        target_projects = set()
+        for old_task, new_task in changes:
+            if new_task is not None and new_task.project_id:
+                target_projects.add(new_task.project_id)
+            for task, sign in ((old_task, -1), (new_task, 1)):
+                if task is None or not task.project_id:
+                    continue
+                delta = deltas.setdefault(task.project_id, {})
+                for field, value in cls.task_contribution(task).items():
+                    delta[field] = delta.get(field, 0) + sign * value
+        
+        for project_id, delta in deltas.items():
+            if any(delta.values()):
+                cls.apply_delta(
+                    project_id, delta, create_missing=project_id in target_projects
+                )
+
+    @classmethod
+    def apply_delta(cls, project_id, delta, create_missing=True):
+        """
+        Apply counter deltas and recompute the derived percentages in a
+        single UPDATE. A project without an analytics row is initialised by
+        a full rebuild instead, which already includes the change.
+        """
+        from django.db.models import Case, When, Value
+        from django.db.models.lookups import GreaterThan
+        from django.utils import timezone
+        
+        new_values = {
+            field: F(field) + value for field, value in delta.items()
+        }
+        decimal_field = models.DecimalField(max_digits=12, decimal_places=2)
+        
+        updated = cls.objects.filter(project_id=project_id).update(
+            **new_values,
+            completion_percentage=Case(
+                When(
+                    GreaterThan(new_values['total_tasks'], 0),
+                    then=Cast(new_values['completed_tasks'], decimal_field) * 100 / new_values['total_tasks']
+                ),
+                default=Value(Decimal('0')),
+                output_field=decimal_field
+            ),
+            average_task_duration=Case(
+                When(
+                    GreaterThan(new_values['completed_duration_count'], 0),
+                    then=new_values['completed_duration_total'] / new_values['completed_duration_count']
+                ),
+                default=Value(Decimal('0')),
+                output_field=decimal_field
+            ),
+            last_updated=timezone.now()
+        )
+        
+        if not updated and create_missing:
+            analytics, created = cls.objects.get_or_create(project_id=project_id)
+            analytics.update_metrics()
+
     def update_metrics(self):
+        """
+        Full rebuild from the project's tasks; used to initialise a row and
+        by the rebuild_project_analytics repair command
+        """
         from tasks.models import Task
-        tasks = Task.objects.filter(project=self.project)
-        self.total_tasks = tasks.count()
-        self.completed_tasks = tasks.filter(status='COMPLETED').count()
+        from django.db.models import Q, DurationField
         
-        if self.total_tasks > 0:
-            self.completion_percentage = (self.completed_tasks / self.total_tasks) * 100
+        completed = Q(status='COMPLETED', completed_at__isnull=False)
+        metrics = Task.objects.filter(project=self.project).aggregate(
+            total_tasks=Count('id'),
+            completed_tasks=Count('id', filter=Q(status='COMPLETED')),
+            total_hours_estimated=Sum('estimated_hours'),
+            total_hours_actual=Sum('actual_hours'),
+            completed_duration_total=Sum(
+                ExpressionWrapper(
+                    F('completed_at') - F('created_at'),
+                    output_field=DurationField()
+                ),
+                filter=completed
+            ),
+            completed_duration_count=Count('id', filter=completed),
+        )
         
-        self.total_hours_estimated = tasks.aggregate(
-            total=Sum('estimated_hours')
-        )['total'] or 0
+        self.total_tasks = metrics['total_tasks']
+        self.completed_tasks = metrics['completed_tasks']
+        self.total_hours_estimated = metrics['total_hours_estimated'] or 0
+        self.total_hours_actual = metrics['total_hours_actual'] or 0
         
-        self.total_hours_actual = tasks.aggregate(
-            total=Sum('actual_hours')
-        )['total'] or 0
+        duration_total = metrics['completed_duration_total']
+        self.completed_duration_total = Decimal(
+            duration_total.total_seconds() / 3600 if duration_total else 0
+        ).quantize(Decimal('0.01'))
+        self.completed_duration_count = metrics['completed_duration_count']
         
-        completed_tasks_with_dates = tasks.filter(
-            status='COMPLETED', 
-            completed_at__isnull=False
-        )
+        self.completion_percentage = 0
+        if self.total_tasks > 0:
+            self.completion_percentage = (self.completed_tasks / self.total_tasks) * 100
         
-        if completed_tasks_with_dates.exists():
-            durations = []
-            for task in completed_tasks_with_dates:
-                duration = (task.completed_at - task.created_at).total_seconds() / 3600
-                durations.append(duration)
-            self.average_task_duration = sum(durations) / len(durations)
+        self.average_task_duration = 0
+        if self.completed_duration_count > 0:
+            self.average_task_duration = (
+                self.completed_duration_total / self.completed_duration_count
+            )
         
         self.save()
 
@@ -158,11 +325,51 @@ class TaskPerformanceReport(models.Model):
     file_path = models.CharField(max_length=255, blank=True, null=True)
     summary_data = models.JSONField(default=dict)
     is_generated = models.BooleanField(default=False)
+    # Set when building the report ran out of retries
+    failed_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    data_version = models.CharField(
+        max_length=40,
+        blank=True,
+        default='',
+        help_text="Fingerprint of the task and time log data the report was built from"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # A report still pending after this long is assumed failed and not reused
+    PENDING_TIMEOUT = timedelta(hours=1)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['report_type', 'start_date', 'end_date', 'data_version'],
+                name='report_range_version_idx'
+            ),
+        ]
+
     def __str__(self):
         return f"{self.get_report_type_display()} Report - {self.start_date} to {self.end_date}"
 
+    @classmethod
+    def find_reusable(cls, report_type, start_date, end_date, data_version):
+        """
+        An existing report for the same type, range and data version that is
+        generated or still being generated, preferring generated ones.
+        Failed reports are never reused.
+        """
+        from django.utils import timezone
+        
+        return cls.objects.filter(
+            report_type=report_type,
+            start_date=start_date,
+            end_date=end_date,
+            data_version=data_version,
+            failed_at__isnull=True,
+        ).filter(
+            models.Q(is_generated=True) |
+            models.Q(created_at__gte=timezone.now() - cls.PENDING_TIMEOUT)
+        ).order_by('-is_generated', '-created_at').first()
+
 
 class EmployeeSkillRating(models.Model):
     """
@@ -259,24 +466,148 @@ class DelayAnalysis(models.Model):
         default=0
     )
     delay_reason = models.TextField(blank=True, null=True)
+    task_completed_at = models.DateTimeField(
+        null=True, 
+        blank=True, 
+        db_index=True,
+        help_text="Task completion time this analysis was computed from"
+    )
     analyzed_at = models.DateTimeField(auto_now_add=True)
 
+    # Delays above this percentage notify the assignee
+    SIGNIFICANT_DELAY_PERCENTAGE = 50
+
     def __str__(self):
         return f"Delay Analysis for {self.task.title}"
 
-    def calculate_delay(self):
-        if self.task.due_date and self.task.completed_at:
-            self.actual_duration = (
-                self.task.completed_at - self.task.created_at
-            ).total_seconds() / 3600
-            
-            planned_duration = (
-                self.task.due_date - self.task.created_at
-            ).total_seconds() / 3600
-            self.planned_duration = planned_duration
+    @property
+    def is_significant(self):
+        return self.delay_hours > 0 and self.delay_percentage > self.SIGNIFICANT_DELAY_PERCENTAGE
+
+    def notification_message(self, task_title):
+        return (
+            f"Task '{task_title}' has a significant delay of {self.delay_hours:.1f} hours "
+            f"({self.delay_percentage:.1f}%). Please review and update the timeline."
+        )
+
+    @classmethod
+    def fit_to_field(cls, field_name, value):
+        """
+        Round value to the field's decimal places and clamp it to the range
+        its max_digits can hold, so an extreme task cannot fail a bulk write
+        """
+        field = cls._meta.get_field(field_name)
+        step = Decimal(1).scaleb(-field.decimal_places)
+        limit = Decimal(10) ** (field.max_digits - field.decimal_places) - step
+        value = Decimal(str(value)).quantize(step)
+        return max(-limit, min(limit, value))
+
+    def apply_task_times(self, created_at, due_date, completed_at):
+        """
+        Fill in the duration and delay fields from a task's timestamps
+        without touching the database
+        """
+        self.task_completed_at = completed_at
+        if due_date and completed_at:
+            actual_duration = (completed_at - created_at).total_seconds() / 3600
+            planned_duration = (due_date - created_at).total_seconds() / 3600
+            self.actual_duration = self.fit_to_field('actual_duration', actual_duration)
+            self.planned_duration = self.fit_to_field('planned_duration', planned_duration)
             
             if planned_duration > 0:
-                self.delay_hours = max(0, self.actual_duration - planned_duration)
-                self.delay_percentage = (self.delay_hours / planned_duration) * 100
-        
+                delay_hours = max(0, actual_duration - planned_duration)
+                self.delay_hours = self.fit_to_field('delay_hours', delay_hours)
+                self.delay_percentage = self.fit_to_field(
+                    'delay_percentage', delay_hours / planned_duration * 100
+                )
+
+    def calculate_delay(self):
+        self.apply_task_times(
+            self.task.created_at, self.task.due_date, self.task.completed_at
+        )
         self.save()
+
+
+class DailyRollup(models.Model):
+    """
+    Pre-aggregated daily facts for one dimension value, maintained
+    incrementally from task and time log changes (analytics.rollups) and
+    rebuilt with `manage.py rebuild_daily_rollups`
+    """
+    MEASURES = ('tasks_created', 'tasks_completed', 'completion_hours', 'hours_logged')
+
+    date = models.DateField()
+    tasks_created = models.IntegerField(default=0)
+    tasks_completed = models.IntegerField(default=0)
+    completion_hours = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        help_text="Total creation-to-completion hours of the tasks completed that day"
+    )
+    hours_logged = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=0
+    )
+
+    class Meta:
+        abstract = True
+        ordering = ['date']
+
+    @classmethod
+    def apply_delta(cls, date, delta, **key):
+        """
+        Add `delta` (measure -> amount) to the row for `key` on `date`,
+        creating it first if the delta adds anything.
+
+        A purely negative delta only updates: it comes from a fact being
+        removed, and when that removal is a cascade from deleting the
+        user or project, the row (and its parent) may already be gone.
+        """
+        delta = {measure: amount for measure, amount in delta.items() if amount}
+        if not delta:
+            return
+        if any(amount > 0 for amount in delta.values()):
+            cls.objects.get_or_create(date=date, **key)
+        cls.objects.filter(date=date, **key).update(**{
+            measure: F(measure) + amount for measure, amount in delta.items()
+        })
+
+
+class DailyUserRollup(DailyRollup):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='daily_rollups'
+    )
+
+    class Meta(DailyRollup.Meta):
+        unique_together = ['date', 'user']
+
+    def __str__(self):
+        return f"{self.user_id} - {self.date}"
+
+
+class DailyProjectRollup(DailyRollup):
+    project = models.ForeignKey(
+        'tasks.Project',
+        on_delete=models.CASCADE,
+        related_name='daily_rollups'
+    )
+
+    class Meta(DailyRollup.Meta):
+        unique_together = ['date', 'project']
+
+    def __str__(self):
+        return f"{self.project_id} - {self.date}"
+
+
+class DailyDepartmentRollup(DailyRollup):
+    department = models.CharField(max_length=100)
+
+    class Meta(DailyRollup.Meta):
+        unique_together = ['date', 'department']
+
+    def __str__(self):
+        return f"{self.department} - {self.date}"
@@ -0,0 +1,346 @@
+import csv
+import gzip
+import hashlib
+import os
+from calendar import monthrange
+from datetime import timedelta
+from decimal import Decimal
+from itertools import chain
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import (
+    Q, Count, Sum, Max, F, Value, OuterRef, Subquery,
+    ExpressionWrapper, DurationField, DecimalField, IntegerField
+)
+from django.db.models.functions import Coalesce
+from tasks.models import Project, Task, TimeLog
+from .aggregates import duration_to_hours
+from .models import TaskPerformanceReport
+
+User = get_user_model()
+
+# Report files live under MEDIA_ROOT; file_path is stored relative to it
+PERFORMANCE_REPORTS_DIR = 'reports'
+
+PERFORMANCE_REPORT_COLUMNS = [
+    'scope', 'id', 'name', 'department',
+    'tasks_created', 'tasks_completed', 'completion_rate',
+    'hours_logged', 'completion_hours_total', 'average_completion_hours',
+]
+
+ACTIVITY_FIELDS = ['tasks_created', 'tasks_completed', 'hours_logged', 'completion_time']
+
+# Report types assembled from monthly reports when their range is whole months
+COMPOSED_REPORT_TYPES = ('QUARTERLY', 'YEARLY')
+
+
+def data_version(start_date, end_date):
+    """
+    Fingerprint of the task and time log data a report over the range reads.
+    Any task created, completed, edited or deleted in the range, and any
+    time log added, changed or removed for it, changes the fingerprint.
+    """
+    date_range = [start_date, end_date]
+    tasks = Task.objects.filter(
+        Q(created_at__date__range=date_range) |
+        Q(completed_at__date__range=date_range)
+    ).aggregate(count=Count('id'), updated=Max('updated_at'))
+    logs = TimeLog.objects.filter(date__range=date_range).aggregate(
+        count=Count('id'), hours=Sum('hours'), created=Max('created_at')
+    )
+    payload = '|'.join(str(value) for value in (
+        tasks['count'], tasks['updated'],
+        logs['count'], logs['hours'], logs['created'],
+    ))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def request_report(report_type, start_date, end_date, user=None):
+    """
+    Return (report, created): an existing report for the same type, range
+    and data version if there is one, otherwise a new pending report
+    """
+    version = data_version(start_date, end_date)
+    report = TaskPerformanceReport.find_reusable(report_type, start_date, end_date, version)
+    if report is not None:
+        return report, False
+    return TaskPerformanceReport.objects.create(
+        report_type=report_type,
+        start_date=start_date,
+        end_date=end_date,
+        generated_by=user,
+        data_version=version
+    ), True
+
+
+def month_ranges(start_date, end_date):
+    """
+    The calendar months making up [start_date, end_date], or None if the
+    range does not start and end on month boundaries
+    """
+    if start_date.day != 1 or end_date.day != monthrange(end_date.year, end_date.month)[1]:
+        return None
+    months = []
+    month_start = start_date
+    while month_start <= end_date:
+        month_end = month_start.replace(day=monthrange(month_start.year, month_start.month)[1])
+        months.append((month_start, month_end))
+        month_start = month_end + timedelta(days=1)
+    return months
+
+
+def _activity_annotations(task_field, timelog_field, start_date, end_date):
+    """
+    Per-owner activity in [start_date, end_date] as correlated subqueries,
+    so owners can be streamed one row at a time without joining tasks and
+    time logs together
+    """
+    date_range = [start_date, end_date]
+
+    def per_owner(queryset, field, aggregate, default, output_field):
+        return Coalesce(
+            Subquery(
+                queryset.filter(**{field: OuterRef('pk')})
+                .order_by()
+                .values(field)
+                .annotate(value=aggregate)
+                .values('value')[:1]
+            ),
+            Value(default),
+            output_field=output_field
+        )
+
+    created = Task.objects.filter(created_at__date__range=date_range)
+    completed = Task.objects.filter(
+        status='COMPLETED',
+        completed_at__date__range=date_range
+    )
+    logs = TimeLog.objects.filter(date__range=date_range)
+
+    return {
+        'tasks_created': per_owner(created, task_field, Count('id'), 0, IntegerField()),
+        'tasks_completed': per_owner(completed, task_field, Count('id'), 0, IntegerField()),
+        'completion_time': per_owner(
+            completed, task_field,
+            Sum(ExpressionWrapper(
+                F('completed_at') - F('created_at'),
+                output_field=DurationField()
+            )),
+            timedelta(0), DurationField()
+        ),
+        'hours_logged': per_owner(
+            logs, timelog_field, Sum('hours'), Decimal('0'),
+            DecimalField(max_digits=12, decimal_places=2)
+        ),
+    }
+
+
+def _with_activity(queryset, task_field, timelog_field, start_date, end_date):
+    """Annotate owners with their activity, keeping only owners that had some"""
+    return queryset.annotate(
+        **_activity_annotations(task_field, timelog_field, start_date, end_date)
+    ).filter(
+        Q(tasks_created__gt=0) | Q(tasks_completed__gt=0) | Q(hours_logged__gt=0)
+    ).order_by('id')
+
+
+def report_row(scope, owner_id, name, department, tasks_created, tasks_completed,
+               hours_logged, completion_hours_total):
+    """A report file row; derived columns are computed from the summable ones"""
+    return {
+        'scope': scope,
+        'id': owner_id,
+        'name': name,
+        'department': department or '',
+        'tasks_created': tasks_created,
+        'tasks_completed': tasks_completed,
+        'completion_rate': round(tasks_completed / tasks_created * 100, 2) if tasks_created else 0,
+        'hours_logged': round(float(hours_logged), 2),
+        'completion_hours_total': round(completion_hours_total, 2),
+        'average_completion_hours': (
+            round(completion_hours_total / tasks_completed, 2) if tasks_completed else 0
+        ),
+    }
+
+
+def employee_report_rows(start_date, end_date):
+    """Stream one row per employee with activity in the range"""
+    employees = _with_activity(
+        User.objects.all(), 'assigned_to', 'user', start_date, end_date
+    ).values('id', 'first_name', 'last_name', 'department', *ACTIVITY_FIELDS)
+
+    for employee in employees.iterator(chunk_size=settings.ANALYTICS_CHUNK_SIZE):
+        yield report_row(
+            'employee', employee['id'],
+            f"{employee['first_name']} {employee['last_name']}".strip(),
+            employee['department'],
+            employee['tasks_created'], employee['tasks_completed'],
+            employee['hours_logged'], duration_to_hours(employee['completion_time'])
+        )
+
+
+def project_report_rows(start_date, end_date):
+    """Stream one row per project with activity in the range"""
+    projects = _with_activity(
+        Project.objects.all(), 'project', 'task__project', start_date, end_date
+    ).values('id', 'name', *ACTIVITY_FIELDS)
+
+    for project in projects.iterator(chunk_size=settings.ANALYTICS_CHUNK_SIZE):
+        yield report_row(
+            'project', project['id'], project['name'], None,
+            project['tasks_created'], project['tasks_completed'],
+            project['hours_logged'], duration_to_hours(project['completion_time'])
+        )
+
+
+def report_summary(start_date, end_date):
+    """Headline totals for the range, stored in summary_data"""
+    task_totals = Task.objects.aggregate(
+        total_tasks=Count('id', filter=Q(created_at__date__range=[start_date, end_date])),
+        completed_tasks=Count('id', filter=Q(
+            status='COMPLETED',
+            completed_at__date__range=[start_date, end_date]
+        )),
+    )
+    total_hours = TimeLog.objects.filter(
+        date__range=[start_date, end_date]
+    ).aggregate(total=Sum('hours'))['total'] or 0
+
+    return {
+        'total_tasks': task_totals['total_tasks'],
+        'completed_tasks': task_totals['completed_tasks'],
+        'total_hours': float(total_hours),
+    }
+
+
+def write_report_file(report, rows):
+    """
+    Write rows to the report's gzip-compressed CSV under MEDIA_ROOT and
+    return the relative path and the number of rows per scope. The file is
+    written under a temporary name and renamed, so it is never seen half
+    written.
+    """
+    relative_path = os.path.join(
+        PERFORMANCE_REPORTS_DIR, f'performance_report_{report.id}.csv.gz'
+    )
+    absolute_path = os.path.join(settings.MEDIA_ROOT, relative_path)
+    os.makedirs(os.path.dirname(absolute_path), exist_ok=True)
+
+    row_counts = {'employee': 0, 'project': 0}
+    temporary_path = f'{absolute_path}.tmp'
+    with gzip.open(temporary_path, 'wt', newline='') as report_file:
+        writer = csv.DictWriter(report_file, fieldnames=PERFORMANCE_REPORT_COLUMNS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            row_counts[row['scope']] += 1
+    os.replace(temporary_path, absolute_path)
+
+    return relative_path, row_counts
+
+
+def read_report_file(report):
+    """Stream the rows of a generated report's file"""
+    path = os.path.join(settings.MEDIA_ROOT, report.file_path)
+    with gzip.open(path, 'rt', newline='') as report_file:
+        yield from csv.DictReader(report_file)
+
+
+def merged_report_rows(reports):
+    """
+    Combine the rows of reports over adjacent ranges: the summable columns
+    are added per employee/project and the derived ones recomputed
+    """
+    totals = {}
+    for report in reports:
+        for row in read_report_file(report):
+            total = totals.setdefault((row['scope'], int(row['id'])), {
+                'name': row['name'],
+                'department': row['department'],
+                'tasks_created': 0,
+                'tasks_completed': 0,
+                'hours_logged': Decimal('0'),
+                'completion_hours_total': 0.0,
+            })
+            # Later months carry the current names
+            total['name'] = row['name']
+            total['department'] = row['department']
+            total['tasks_created'] += int(row['tasks_created'])
+            total['tasks_completed'] += int(row['tasks_completed'])
+            total['hours_logged'] += Decimal(row['hours_logged'])
+            total['completion_hours_total'] += float(row['completion_hours_total'])
+
+    scope_order = {'employee': 0, 'project': 1}
+    for (scope, owner_id), total in sorted(
+        totals.items(), key=lambda item: (scope_order[item[0][0]], item[0][1])
+    ):
+        yield report_row(
+            scope, owner_id, total['name'], total['department'],
+            total['tasks_created'], total['tasks_completed'],
+            total['hours_logged'], total['completion_hours_total']
+        )
+
+
+def monthly_reports(start_date, end_date, user=None):
+    """
+    Generated monthly reports covering the given whole months, reusing
+    every month whose data has not changed and generating the rest. A
+    month another worker is building is waited for, not built twice.
+    """
+    reports = []
+    for month_start, month_end in month_ranges(start_date, end_date):
+        report, _ = request_report('MONTHLY', month_start, month_end, user)
+        if not report.is_generated:
+            report = generate_report(report)
+        reports.append(report)
+    return reports
+
+
+def generate_report(report):
+    """
+    Build a TaskPerformanceReport: stream the per-employee and per-project
+    breakdown into its file, store the summary and mark it generated.
+
+    Quarterly and yearly reports over whole months are assembled from the
+    monthly reports instead of rescanning tasks and time logs.
+
+    The report row stays locked while it is built, so a second builder
+    waits for the first and then returns the generated report rather than
+    writing the same file. Returns the report, refreshed.
+    """
+    with transaction.atomic():
+        report.refresh_from_db(from_queryset=TaskPerformanceReport.objects.select_for_update())
+        if not report.is_generated:
+            _build_report(report)
+    return report
+
+
+def _build_report(report):
+    """generate_report's work, with the report row locked"""
+    start_date, end_date = report.start_date, report.end_date
+    months = month_ranges(start_date, end_date)
+
+    if report.report_type in COMPOSED_REPORT_TYPES and months and len(months) > 1:
+        parts = monthly_reports(start_date, end_date, report.generated_by)
+        file_path, row_counts = write_report_file(report, merged_report_rows(parts))
+        summary_data = {
+            'total_tasks': sum(part.summary_data['total_tasks'] for part in parts),
+            'completed_tasks': sum(part.summary_data['completed_tasks'] for part in parts),
+            'total_hours': round(sum(part.summary_data['total_hours'] for part in parts), 2),
+            'monthly_reports': [part.id for part in parts],
+        }
+    else:
+        file_path, row_counts = write_report_file(report, chain(
+            employee_report_rows(start_date, end_date),
+            project_report_rows(start_date, end_date),
+        ))
+        summary_data = report_summary(start_date, end_date)
+
+    summary_data['employees'] = row_counts['employee']
+    summary_data['projects'] = row_counts['project']
+
+    report.file_path = file_path
+    report.summary_data = summary_data
+    report.is_generated = True
+    report.save(update_fields=['file_path', 'summary_data', 'is_generated'])
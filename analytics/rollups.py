@@ -0,0 +1,230 @@
+from collections import defaultdict
+from decimal import Decimal
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Sum, F, ExpressionWrapper, DurationField
+from django.db.models.functions import TruncDate, TruncWeek, TruncMonth
+from django.utils import timezone
+from tasks.models import Task, TimeLog
+from utils.two_tier_cache import cached_user_attributes
+from .aggregates import duration_to_hours
+from .models import DailyRollup, DailyUserRollup, DailyProjectRollup, DailyDepartmentRollup
+
+ROLLUP_MODELS = {
+    'user': DailyUserRollup,
+    'project': DailyProjectRollup,
+    'department': DailyDepartmentRollup,
+}
+
+# dimension -> (rollup key field, Task lookup, TimeLog lookup)
+ROLLUP_SOURCES = {
+    'user': ('user_id', 'assigned_to', 'user'),
+    'project': ('project_id', 'project', 'task__project'),
+    'department': ('department', 'assigned_to__department', 'user__department'),
+}
+
+SERIES_GRANULARITIES = {
+    'day': None,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+
+def _local_date(value):
+    return timezone.localtime(value).date() if timezone.is_aware(value) else value.date()
+
+
+def _hours(duration):
+    return Decimal(str(round(duration_to_hours(duration), 2)))
+
+
+def _dimension_keys(user_id, project_id):
+    """
+    The rollup rows a fact by this user on this project lands in. Facts are
+    attributed to the user's current department; move_user_department
+    carries them over when it changes.
+    """
+    keys = []
+    if user_id:
+        keys.append(('user', user_id))
+        attributes = cached_user_attributes(user_id)
+        if attributes and attributes['department']:
+            keys.append(('department', attributes['department']))
+    if project_id:
+        keys.append(('project', project_id))
+    return keys
+
+
+def _accumulate(deltas, user_id, project_id, facts, sign):
+    for dimension, key in _dimension_keys(user_id, project_id):
+        for date, measures in facts:
+            delta = deltas[(dimension, key, date)]
+            for measure, amount in measures.items():
+                delta[measure] = delta.get(measure, 0) + sign * amount
+
+
+def _apply(deltas):
+    # Changes that cancel out (e.g. a save that touched no tracked field)
+    # cost no queries
+    for (dimension, key, date), delta in deltas.items():
+        key_field = ROLLUP_SOURCES[dimension][0]
+        ROLLUP_MODELS[dimension].apply_delta(date, delta, **{key_field: key})
+
+
+def task_facts(task):
+    """(date, measures) pairs a task contributes to its assignee's and project's rollups"""
+    facts = []
+    if task.created_at:
+        facts.append((_local_date(task.created_at), {'tasks_created': 1}))
+        if task.status == 'COMPLETED' and task.completed_at:
+            facts.append((_local_date(task.completed_at), {
+                'tasks_completed': 1,
+                'completion_hours': _hours(task.completed_at - task.created_at),
+            }))
+    return facts
+
+
+def apply_task_rollups(old_task, new_task):
+    """
+    Move a task's contribution from its previous state to its new one;
+    either side may be None for creations and deletions
+    """
+    apply_task_rollup_changes([(old_task, new_task)])
+
+
+def apply_task_rollup_changes(changes):
+    """apply_task_rollups for many (old_task, new_task) pairs, one upsert per row touched"""
+    deltas = defaultdict(dict)
+    for old_task, new_task in changes:
+        if old_task is not None:
+            _accumulate(deltas, old_task.assigned_to_id, old_task.project_id, task_facts(old_task), -1)
+        if new_task is not None:
+            _accumulate(deltas, new_task.assigned_to_id, new_task.project_id, task_facts(new_task), 1)
+    _apply(deltas)
+
+
+def apply_time_log_rollups(old_log, new_log, task_project_ids=None):
+    """
+    Move a time log's hours from its previous state to its new one;
+    `task_project_ids` (task ID -> project ID) spares looking up tasks the
+    caller already knows
+    """
+    deltas = defaultdict(dict)
+    project_ids = dict(task_project_ids or {})
+    for log, sign in ((old_log, -1), (new_log, 1)):
+        if log is None:
+            continue
+        if log.task_id not in project_ids:
+            project_ids[log.task_id] = Task.objects.filter(
+                pk=log.task_id
+            ).values_list('project_id', flat=True).first()
+        _accumulate(
+            deltas, log.user_id, project_ids[log.task_id],
+            [(log.date, {'hours_logged': Decimal(str(log.hours))})], sign
+        )
+    _apply(deltas)
+
+
+def move_user_department(user_id, old_department, new_department):
+    """
+    Carry a user's facts from their old department's rollups to the new
+    one: their daily user rollups are subtracted from the one and added to
+    the other. The user's rows are locked so no fact lands in between.
+    """
+    deltas = defaultdict(dict)
+    with transaction.atomic():
+        rows = DailyUserRollup.objects.select_for_update().filter(
+            user_id=user_id
+        ).values('date', *DailyRollup.MEASURES)
+        for row in rows:
+            for department, sign in ((old_department, -1), (new_department, 1)):
+                if department:
+                    deltas[('department', department, row['date'])] = {
+                        measure: sign * row[measure] for measure in DailyRollup.MEASURES
+                    }
+        _apply(deltas)
+
+
+def rebuild_daily_rollups(start_date, end_date):
+    """
+    Recompute every rollup row in [start_date, end_date] from tasks and time
+    logs with grouped queries; returns the number of rows per dimension
+    """
+    date_range = [start_date, end_date]
+    completion_time = ExpressionWrapper(
+        F('completed_at') - F('created_at'),
+        output_field=DurationField()
+    )
+    created = Task.objects.filter(created_at__date__range=date_range).annotate(
+        day=TruncDate('created_at')
+    )
+    completed = Task.objects.filter(
+        status='COMPLETED',
+        completed_at__date__range=date_range
+    ).annotate(day=TruncDate('completed_at'))
+    logs = TimeLog.objects.filter(date__range=date_range).annotate(day=F('date'))
+
+    counts = {}
+    for dimension, model in ROLLUP_MODELS.items():
+        key_field, task_field, log_field = ROLLUP_SOURCES[dimension]
+        rows = defaultdict(lambda: dict.fromkeys(DailyRollup.MEASURES, 0))
+
+        grouped = (
+            (created, task_field, {'tasks_created': Count('id')}),
+            (completed, task_field, {
+                'tasks_completed': Count('id'),
+                'completion_hours': Sum(completion_time),
+            }),
+            (logs, log_field, {'hours_logged': Sum('hours')}),
+        )
+        for queryset, field, aggregates in grouped:
+            for row in queryset.order_by().values('day', field).annotate(**aggregates):
+                if not row[field]:
+                    continue
+                measures = rows[(row['day'], row[field])]
+                for measure in aggregates:
+                    value = row[measure]
+                    measures[measure] = _hours(value) if measure == 'completion_hours' else value
+
+        with transaction.atomic():
+            model.objects.filter(date__range=date_range).delete()
+            model.objects.bulk_create([
+                model(date=day, **{key_field: key}, **measures)
+                for (day, key), measures in rows.items()
+            ], batch_size=settings.ANALYTICS_CHUNK_SIZE)
+        counts[dimension] = len(rows)
+    return counts
+
+
+def rollup_series(dimension, granularity, start_date, end_date, keys=None):
+    """
+    Rollup measures summed per period and dimension value over
+    [start_date, end_date]; periods are labelled by their first day
+    """
+    model = ROLLUP_MODELS[dimension]
+    key_field = ROLLUP_SOURCES[dimension][0]
+    trunc = SERIES_GRANULARITIES[granularity]
+
+    rows = model.objects.filter(date__range=[start_date, end_date])
+    if keys:
+        rows = rows.filter(**{f'{key_field}__in': keys})
+
+    rows = rows.annotate(
+        period=F('date') if trunc is None else trunc('date')
+    ).order_by().values('period', key_field).annotate(**{
+        f'total_{measure}': Sum(measure) for measure in DailyRollup.MEASURES
+    }).order_by('period', key_field)
+
+    for row in rows:
+        tasks_completed = row['total_tasks_completed']
+        yield {
+            'period': row['period'],
+            'key': row[key_field],
+            'tasks_created': row['total_tasks_created'],
+            'tasks_completed': tasks_completed,
+            'hours_logged': float(row['total_hours_logged']),
+            'average_completion_hours': (
+                round(float(row['total_completion_hours']) / tasks_completed, 2)
+                if tasks_completed else 0
+            ),
+        }
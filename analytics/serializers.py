@@ -55,9 +55,10 @@ class TaskPerformanceReportSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'report_type', 'start_date', 'end_date',
             'generated_by', 'generated_by_name', 'file_path',
-            'summary_data', 'is_generated', 'created_at'
+            'summary_data', 'is_generated', 'failed_at', 'error', 'data_version',
+            'created_at'
         ]
-        read_only_fields = ['generated_by', 'created_at']
+        read_only_fields = ['generated_by', 'failed_at', 'error', 'data_version', 'created_at']
 
 
 class EmployeeSkillRatingSerializer(serializers.ModelSerializer):
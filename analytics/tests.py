@@ -1,3 +1,483 @@
-from django.test import TestCase
+import gzip
+import shutil
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from employee_task_system.celery import analyze_task_delays, generate_performance_report
+from tasks.models import Project, Task, TimeLog
+from utils.testing import CacheIsolatedTestCase
+
+from .models import (
+    DailyDepartmentRollup, DailyProjectRollup, DailyUserRollup, DelayAnalysis,
+    EmployeeProductivity, ProjectAnalytics, TaskPerformanceReport
+)
+from .reports import (
+    PERFORMANCE_REPORT_COLUMNS, generate_report, read_report_file, request_report
+)
+
+User = get_user_model()
+
+
+class EmployeeProductivityTests(CacheIsolatedTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = User.objects.create_user(
+            username='employee', password='pass', role='EMPLOYEE'
+        )
+        cls.project = Project.objects.create(
+            name='Project', start_date=date.today(), end_date=date.today()
+        )
+        cls.task = Task.objects.create(
+            title='Task', description='Description', project=cls.project,
+            assigned_to=cls.employee, created_by=cls.employee
+        )
+
+    def test_logging_time_updates_hours_and_score(self):
+        EmployeeProductivity.objects.create(
+            user=self.employee, date=date.today(), tasks_completed=1
+        )
+        TimeLog.objects.create(task=self.task, user=self.employee, hours=2, date=date.today())
+
+        row = EmployeeProductivity.objects.get(user=self.employee, date=date.today())
+        self.assertEqual(row.hours_logged, Decimal('2.00'))
+        self.assertEqual(row.efficiency_score, Decimal('50.00'))
+
+    def test_editing_and_deleting_time_logs_moves_the_hours(self):
+        EmployeeProductivity.objects.create(
+            user=self.employee, date=date.today(), tasks_completed=1
+        )
+        yesterday = date.today() - timedelta(days=1)
+        log = TimeLog.objects.create(task=self.task, user=self.employee, hours=2, date=date.today())
+
+        log.hours = Decimal('4')
+        log.save()
+        row = EmployeeProductivity.objects.get(user=self.employee, date=date.today())
+        self.assertEqual(row.hours_logged, Decimal('4.00'))
+        self.assertEqual(row.efficiency_score, Decimal('25.00'))
+
+        log.date = yesterday
+        log.save()
+        row = EmployeeProductivity.objects.get(user=self.employee, date=date.today())
+        self.assertEqual((row.hours_logged, row.efficiency_score), (0, 0))
+        moved = EmployeeProductivity.objects.get(user=self.employee, date=yesterday)
+        self.assertEqual(moved.hours_logged, Decimal('4.00'))
+
+        log.delete()
+        moved.refresh_from_db()
+        self.assertEqual(moved.hours_logged, 0)
+
+    def test_deleting_a_user_with_time_logs(self):
+        TimeLog.objects.create(task=self.task, user=self.employee, hours=2, date=date.today())
+
+        self.employee.delete()
+
+        connection.check_constraints()
+        self.assertFalse(EmployeeProductivity.objects.exists())
+
+    def test_efficiency_score_is_capped_to_the_column(self):
+        # 5 completions in a quarter hour would be a score of 2000
+        EmployeeProductivity.objects.create(
+            user=self.employee, date=date.today(), tasks_completed=5
+        )
+        TimeLog.objects.create(
+            task=self.task, user=self.employee, hours=Decimal('0.25'), date=date.today()
+        )
+
+        row = EmployeeProductivity.objects.get(user=self.employee, date=date.today())
+        self.assertEqual(row.efficiency_score, EmployeeProductivity.MAX_EFFICIENCY_SCORE)
+
+
+class ProjectAnalyticsTests(CacheIsolatedTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(
+            username='manager', password='pass', role='MANAGER'
+        )
+        cls.project = Project.objects.create(
+            name='Project', start_date=date.today(), end_date=date.today()
+        )
+
+    def create_task(self, **kwargs):
+        return Task.objects.create(
+            title='Task', description='Description', project=self.project,
+            created_by=self.manager, **kwargs
+        )
+
+    def analytics(self):
+        return ProjectAnalytics.objects.get(project=self.project)
+
+    def test_counters_follow_task_changes(self):
+        first = self.create_task(estimated_hours=Decimal('4'))
+        second = self.create_task(estimated_hours=Decimal('6'))
+        analytics = self.analytics()
+        self.assertEqual(analytics.total_tasks, 2)
+        self.assertEqual(analytics.completed_tasks, 0)
+        self.assertEqual(analytics.total_hours_estimated, Decimal('10.00'))
+
+        first.status = 'COMPLETED'
+        first.actual_hours = Decimal('5')
+        first.save()
+        analytics = self.analytics()
+        self.assertEqual(analytics.completed_tasks, 1)
+        self.assertEqual(analytics.completion_percentage, Decimal('50.00'))
+        self.assertEqual(analytics.total_hours_actual, Decimal('5.00'))
+
+        second.delete()
+        analytics = self.analytics()
+        self.assertEqual(analytics.total_tasks, 1)
+        self.assertEqual(analytics.total_hours_estimated, Decimal('4.00'))
+        self.assertEqual(analytics.completion_percentage, Decimal('100.00'))
+
+    def test_float_hours_assigned_in_memory(self):
+        # seed_data assigns floats before saving
+        task = self.create_task(estimated_hours=2.5)
+        task.actual_hours = 1.25
+        task.save()
+
+        analytics = self.analytics()
+        self.assertEqual(analytics.total_hours_estimated, Decimal('2.50'))
+        self.assertEqual(analytics.total_hours_actual, Decimal('1.25'))
+
+
+class DailyRollupTests(CacheIsolatedTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(
+            username='manager', password='pass', role='MANAGER'
+        )
+        cls.employee = User.objects.create_user(
+            username='employee', password='pass', role='EMPLOYEE', department='Sales'
+        )
+        cls.project = Project.objects.create(
+            name='Project', start_date=date.today(), end_date=date.today()
+        )
+
+    def create_task(self, **kwargs):
+        kwargs.setdefault('project', self.project)
+        return Task.objects.create(
+            title='Task', description='Description',
+            assigned_to=self.employee, created_by=self.manager, **kwargs
+        )
+
+    def rollup(self, model, **key):
+        return model.objects.get(date=timezone.localdate(), **key)
+
+    def test_rollups_follow_task_and_time_log_changes(self):
+        task = self.create_task()
+        log = TimeLog.objects.create(task=task, user=self.employee, hours=2, date=date.today())
+
+        task.status = 'COMPLETED'
+        task.save()
+        log.hours = Decimal('3.5')
+        log.save()
+
+        for model, key in (
+            (DailyUserRollup, {'user': self.employee}),
+            (DailyProjectRollup, {'project': self.project}),
+            (DailyDepartmentRollup, {'department': 'Sales'}),
+        ):
+            rollup = self.rollup(model, **key)
+            self.assertEqual(rollup.tasks_created, 1, model)
+            self.assertEqual(rollup.tasks_completed, 1, model)
+            self.assertEqual(rollup.hours_logged, Decimal('3.50'), model)
+
+        log.delete()
+        task.delete()
+        rollup = self.rollup(DailyUserRollup, user=self.employee)
+        self.assertEqual((rollup.tasks_created, rollup.hours_logged), (0, 0))
+
+    def test_editing_a_loaded_time_log_does_not_reread_it(self):
+        task = self.create_task()
+        log = TimeLog.objects.create(task=task, user=self.employee, hours=2, date=date.today())
+        log = TimeLog.objects.get(pk=log.pk)
+        yesterday = date.today() - timedelta(days=1)
+
+        log.date = yesterday
+        with CaptureQueriesContext(connection) as queries:
+            log.save()
+
+        self.assertFalse([
+            query for query in queries.captured_queries
+            if query['sql'].startswith('SELECT') and 'FROM "tasks_timelog"' in query['sql']
+        ])
+        self.assertEqual(self.rollup(DailyUserRollup, user=self.employee).hours_logged, 0)
+        moved = DailyUserRollup.objects.get(date=yesterday, user=self.employee)
+        self.assertEqual(moved.hours_logged, Decimal('2.00'))
+
+    def test_department_move_carries_the_users_facts(self):
+        colleague = User.objects.create_user(
+            username='colleague', password='pass', role='EMPLOYEE', department='Sales'
+        )
+        task = self.create_task()
+        TimeLog.objects.create(task=task, user=self.employee, hours=2, date=date.today())
+        TimeLog.objects.create(task=task, user=colleague, hours=1, date=date.today())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.employee.department = 'Support'
+            self.employee.save()
+
+        sales = self.rollup(DailyDepartmentRollup, department='Sales')
+        self.assertEqual((sales.tasks_created, sales.hours_logged), (0, Decimal('1.00')))
+        support = self.rollup(DailyDepartmentRollup, department='Support')
+        self.assertEqual((support.tasks_created, support.hours_logged), (1, Decimal('2.00')))
+
+        # Removing the facts now subtracts from the department holding them
+        task.delete()
+        support = self.rollup(DailyDepartmentRollup, department='Support')
+        self.assertEqual((support.tasks_created, support.hours_logged), (0, 0))
+
+    def test_saves_that_keep_the_department_move_nothing(self):
+        self.create_task()
+
+        with CaptureQueriesContext(connection) as queries:
+            self.employee.position = 'Lead'
+            self.employee.save()
+            self.employee.save(update_fields=['last_login'])
+
+        self.assertFalse([
+            query for query in queries.captured_queries
+            if 'analytics_dailydepartmentrollup' in query['sql']
+        ])
+        self.assertEqual(self.rollup(DailyDepartmentRollup, department='Sales').tasks_created, 1)
+
+    def test_removing_facts_never_creates_rows(self):
+        task = self.create_task()
+        DailyUserRollup.objects.all().delete()
+
+        task.delete()
+
+        self.assertFalse(DailyUserRollup.objects.exists())
+
+    def test_deleting_a_project_or_user_with_activity(self):
+        task = self.create_task()
+        TimeLog.objects.create(task=task, user=self.employee, hours=2, date=date.today())
+
+        self.project.delete()
+        connection.check_constraints()
+        self.assertFalse(DailyProjectRollup.objects.exists())
+        self.assertEqual(self.rollup(DailyUserRollup, user=self.employee).tasks_created, 0)
+
+        task = self.create_task(project=None)
+        TimeLog.objects.create(task=task, user=self.employee, hours=2, date=date.today())
+
+        self.employee.delete()
+        connection.check_constraints()
+        self.assertFalse(DailyUserRollup.objects.exists())
+        self.assertEqual(self.rollup(DailyDepartmentRollup, department='Sales').hours_logged, 0)
+
+
+class DelayAnalysisTests(CacheIsolatedTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = User.objects.create_user(
+            username='employee', password='pass', role='EMPLOYEE'
+        )
+
+    def completed_task(self, due_after, completed_after):
+        task = Task.objects.create(
+            title='Task', description='Description',
+            assigned_to=self.employee, created_by=self.employee
+        )
+        Task.objects.filter(pk=task.pk).update(
+            status='COMPLETED',
+            due_date=task.created_at + due_after,
+            completed_at=task.created_at + completed_after
+        )
+        return task
+
+    def test_delay_is_computed_for_newly_completed_tasks(self):
+        task = self.completed_task(timedelta(hours=10), timedelta(hours=15))
+
+        analyze_task_delays.apply()
+
+        analysis = DelayAnalysis.objects.get(task=task)
+        self.assertEqual(analysis.delay_hours, Decimal('5.00'))
+        self.assertEqual(analysis.delay_percentage, Decimal('50.00'))
+
+    def test_extreme_delay_is_clamped_to_the_columns(self):
+        # 9900% late does not fit delay_percentage (max_digits=5)
+        extreme = self.completed_task(timedelta(hours=1), timedelta(hours=100))
+        # Nor does a ten-year duration fit actual_duration (max_digits=6)
+        ancient = self.completed_task(timedelta(days=1), timedelta(days=3650))
+
+        analyze_task_delays.apply()
+
+        analysis = DelayAnalysis.objects.get(task=extreme)
+        self.assertEqual(analysis.delay_percentage, Decimal('999.99'))
+        self.assertEqual(analysis.delay_hours, Decimal('99.00'))
+        self.assertTrue(analysis.is_significant)
+        analysis = DelayAnalysis.objects.get(task=ancient)
+        self.assertEqual(analysis.actual_duration, Decimal('9999.99'))
+        self.assertEqual(analysis.delay_hours, Decimal('9999.99'))
+
+
+class PerformanceReportTests(CacheIsolatedTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(
+            username='manager', password='pass', role='MANAGER'
+        )
+        cls.employee = User.objects.create_user(
+            username='employee', password='pass', role='EMPLOYEE',
+            first_name='Ann', last_name='Lee', department='Sales'
+        )
+        cls.project = Project.objects.create(
+            name='Project', start_date=date.today(), end_date=date.today()
+        )
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client = APIClient()
+        self.client.force_authenticate(self.manager)
+
+    def create_activity(self):
+        for status in ('COMPLETED', 'TODO'):
+            task = Task.objects.create(
+                title='Task', description='Description', project=self.project,
+                assigned_to=self.employee, created_by=self.manager, status=status
+            )
+        TimeLog.objects.create(task=task, user=self.employee, hours=3, date=date.today())
+
+    def request_report(self, **data):
+        data.setdefault('report_type', 'DAILY')
+        return self.client.post('/api/analytics/generate-report/', data, format='json')
+
+    def test_malformed_dates_are_rejected(self):
+        for value in (20240101, ['2024-01-01'], '2024-13-01', None):
+            response = self.request_report(start_date=value, end_date='2024-01-31')
+            self.assertEqual(response.status_code, 400, value)
+
+    def test_request_queues_a_pending_report(self):
+        today = date.today().isoformat()
+        response = self.request_report(start_date=today, end_date=today)
+
+        self.assertEqual(response.status_code, 202)
+        report = TaskPerformanceReport.objects.get(pk=response.data['id'])
+        self.assertFalse(report.is_generated)
+
+    def test_report_that_keeps_failing_is_marked_failed(self):
+        report, _ = request_report('DAILY', date.today(), date.today(), self.manager)
+
+        with mock.patch('analytics.reports.generate_report', side_effect=OSError('Disk full')):
+            # Eager retries run inline until max_retries is reached
+            result = generate_performance_report.apply(args=[report.id])
+        self.assertTrue(result.failed())
+
+        response = self.client.get(f'/api/analytics/reports/{report.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data['is_generated'])
+        self.assertIsNotNone(response.data['failed_at'])
+        self.assertEqual(response.data['error'], 'Disk full')
+        response = self.client.get(f'/api/analytics/reports/{report.id}/download/')
+        self.assertEqual(response.status_code, 409)
+
+    def test_generated_report_breaks_down_employees_and_projects(self):
+        self.create_activity()
+        report, _ = request_report('DAILY', date.today(), date.today(), self.manager)
+
+        generate_report(report)
+
+        report.refresh_from_db()
+        self.assertTrue(report.is_generated)
+        self.assertEqual(report.summary_data['total_tasks'], 2)
+        self.assertEqual(report.summary_data['completed_tasks'], 1)
+        self.assertEqual(report.summary_data['total_hours'], 3.0)
+        rows = {(row['scope'], row['id']): row for row in read_report_file(report)}
+        employee = rows[('employee', str(self.employee.id))]
+        self.assertEqual(employee['name'], 'Ann Lee')
+        self.assertEqual(employee['department'], 'Sales')
+        self.assertEqual(employee['tasks_created'], '2')
+        self.assertEqual(employee['tasks_completed'], '1')
+        self.assertEqual(employee['completion_rate'], '50.0')
+        self.assertEqual(employee['hours_logged'], '3.0')
+        self.assertEqual(rows[('project', str(self.project.id))]['tasks_created'], '2')
+
+        response = self.client.get(f'/api/analytics/reports/{report.id}/download/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        content = gzip.decompress(b''.join(response.streaming_content)).decode()
+        self.assertTrue(content.startswith(','.join(PERFORMANCE_REPORT_COLUMNS)))
+
+    def test_unchanged_data_reuses_the_report(self):
+        self.create_activity()
+        report, created = request_report('DAILY', date.today(), date.today(), self.manager)
+        self.assertTrue(created)
+        generate_report(report)
+
+        again, created = request_report('DAILY', date.today(), date.today(), self.manager)
+        self.assertFalse(created)
+        self.assertEqual(again.pk, report.pk)
+
+        TimeLog.objects.create(
+            task=Task.objects.first(), user=self.employee, hours=1, date=date.today()
+        )
+        changed, created = request_report('DAILY', date.today(), date.today(), self.manager)
+        self.assertTrue(created)
+        self.assertNotEqual(changed.pk, report.pk)
+
+    def test_failed_reports_are_not_reused(self):
+        failed, _ = request_report('DAILY', date.today(), date.today(), self.manager)
+        failed.failed_at = timezone.now()
+        failed.save()
+
+        report, created = request_report('DAILY', date.today(), date.today(), self.manager)
+
+        self.assertTrue(created)
+        self.assertNotEqual(report.pk, failed.pk)
+
+    def test_a_report_built_meanwhile_is_not_built_again(self):
+        report, _ = request_report('DAILY', date.today(), date.today(), self.manager)
+        stale = TaskPerformanceReport.objects.get(pk=report.pk)
+        generate_report(report)
+
+        with mock.patch('analytics.reports.write_report_file') as write_report_file:
+            built = generate_report(stale)
+
+        write_report_file.assert_not_called()
+        self.assertTrue(built.is_generated)
+        self.assertEqual(built.file_path, report.file_path)
+
+    def test_quarterly_report_reuses_unchanged_months(self):
+        task = Task.objects.create(
+            title='Task', description='Description', project=self.project,
+            assigned_to=self.employee, created_by=self.manager
+        )
+        for day in (date(2024, 1, 15), date(2024, 3, 10)):
+            TimeLog.objects.create(task=task, user=self.employee, hours=2, date=day)
+
+        quarter, _ = request_report('QUARTERLY', date(2024, 1, 1), date(2024, 3, 31))
+        generate_report(quarter)
+        months = quarter.summary_data['monthly_reports']
+        self.assertEqual(len(months), 3)
+        self.assertEqual(quarter.summary_data['total_hours'], 4.0)
+
+        TimeLog.objects.create(task=task, user=self.employee, hours=1, date=date(2024, 3, 20))
+        quarter, created = request_report('QUARTERLY', date(2024, 1, 1), date(2024, 3, 31))
+        self.assertTrue(created)
+        generate_report(quarter)
+
+        rebuilt = quarter.summary_data['monthly_reports']
+        self.assertEqual(rebuilt[:2], months[:2])
+        self.assertNotEqual(rebuilt[2], months[2])
+        self.assertEqual(quarter.summary_data['total_hours'], 5.0)
+        rows = {(row['scope'], row['id']): row for row in read_report_file(quarter)}
+        self.assertEqual(rows[('employee', str(self.employee.id))]['hours_logged'], '5.0')
@@ -8,6 +8,7 @@ urlpatterns = [
     # Performance Metrics
     path('employee-performance/', views.employee_performance, name='employee-performance'),
     path('project-performance/', views.project_performance, name='project-performance'),
+    path('timeseries/', views.analytics_timeseries, name='analytics-timeseries'),
     
     # Model-based Analytics
     path('productivity/', views.EmployeeProductivityListView.as_view(), name='employee-productivity-list'),
@@ -19,4 +20,6 @@ urlpatterns = [
     
     # Reports
     path('generate-report/', views.generate_performance_report, name='generate-performance-report'),
+    path('reports/<int:pk>/', views.TaskPerformanceReportDetailView.as_view(), name='performance-report-detail'),
+    path('reports/<int:pk>/download/', views.download_performance_report, name='performance-report-download'),
 ]
@@ -1,10 +1,11 @@
 from django.urls import path, include
 from .views import (
-    analytics_summary, employee_performance, project_performance,
+    analytics_summary, employee_performance, project_performance, analytics_timeseries,
     EmployeeProductivityListView, ProjectAnalyticsListView,
     DepartmentAnalyticsListView, EmployeeSkillRatingListCreateView,
     WorkloadDistributionListView, DelayAnalysisListView,
-    generate_performance_report
+    generate_performance_report, TaskPerformanceReportDetailView,
+    download_performance_report
 )
 
 app_name = 'analytics'
@@ -14,6 +15,7 @@ urlpatterns = [
     path('summary/', analytics_summary, name='analytics-summary'),
     path('employee-performance/', employee_performance, name='employee-performance'),
     path('project-performance/', project_performance, name='project-performance'),
+    path('timeseries/', analytics_timeseries, name='analytics-timeseries'),
     
     # Model-based Analytics
     path('productivity/', EmployeeProductivityListView.as_view(), name='employee-productivity-list'),
@@ -25,4 +27,6 @@ urlpatterns = [
     
     # Reports
     path('generate-report/', generate_performance_report, name='generate-performance-report'),
+    path('reports/<int:pk>/', TaskPerformanceReportDetailView.as_view(), name='performance-report-detail'),
+    path('reports/<int:pk>/download/', download_performance_report, name='performance-report-download'),
 ]
@@ -1,16 +1,24 @@
+import os
+from functools import wraps
 from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.response import Response
+from rest_framework.pagination import PageNumberPagination
 from django_filters.rest_framework import DjangoFilterBackend
+from django.conf import settings
+from django.db import transaction
 from django.db.models import Q, Avg, Sum, Count, F
+from django.http import FileResponse
+from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from datetime import timedelta, date
 from .models import (
     EmployeeProductivity, ProjectAnalytics, DepartmentAnalytics,
     TaskPerformanceReport, EmployeeSkillRating, WorkloadDistribution,
     DelayAnalysis
 )
-from tasks.models import Task, TimeLog
+from tasks.models import Task
 from .serializers import (
     EmployeeProductivitySerializer, ProjectAnalyticsSerializer,
     DepartmentAnalyticsSerializer, TaskPerformanceReportSerializer,
@@ -18,8 +26,45 @@ from .serializers import (
     DelayAnalysisSerializer, AnalyticsSummarySerializer,
     EmployeePerformanceSerializer, ProjectPerformanceSerializer
 )
+from .aggregates import (
+    build_analytics_summary, get_analytics_summary_snapshot,
+    employee_performance_queryset, employee_performance_row,
+    average_completion_duration, duration_to_hours,
+    EMPLOYEE_PERFORMANCE_ORDERING
+)
+from .reports import request_report
+from .rollups import ROLLUP_MODELS, SERIES_GRANULARITIES, rollup_series
 from .throttles import AnalyticsRateThrottle
 from users.permissions import CanViewAnalytics, IsManagerOrAdmin
+from utils.cache_utils import get_or_compute_analytics, filters_digest
+
+
+def cached_analytics(name):
+    """
+    Serve a GET analytics view from the analytics cache, keyed on its query
+    parameters, with single-flight recomputation; only successful
+    responses are stored
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            responses = []
+            
+            def compute():
+                response = view(request, *args, **kwargs)
+                responses.append(response)
+                if response.status_code != status.HTTP_200_OK:
+                    return None
+                return response.data
+            
+            data = get_or_compute_analytics(
+                f'{name}:{filters_digest(request.query_params)}', compute
+            )
+            if data is None:
+                return responses[0]
+            return Response(data)
+        return wrapper
+    return decorator
 
 
 class EmployeeProductivityListView(generics.ListAPIView):
@@ -76,59 +121,19 @@ class DelayAnalysisListView(generics.ListAPIView):
 @api_view(['GET'])
 @permission_classes([CanViewAnalytics])
 @throttle_classes([AnalyticsRateThrottle])
+@cached_analytics('summary')
 def analytics_summary(request):
     """
     Get overall analytics summary for dashboard
+
+    Pass ?snapshot=true to read the periodically refreshed cached snapshot
+    instead of aggregating live.
     """
     try:
-        from django.contrib.auth import get_user_model
-        User = get_user_model()
-        
-        # Basic counts
-        total_employees = User.objects.filter(is_active_employee=True).count()
-        total_tasks = Task.objects.count()
-        completed_tasks = Task.objects.filter(status='COMPLETED').count()
-        pending_tasks = Task.objects.filter(status__in=['TODO', 'IN_PROGRESS']).count()
-        
-        # Overdue tasks
-        overdue_tasks = Task.objects.filter(
-            due_date__lt=timezone.now(),
-            status__in=['TODO', 'IN_PROGRESS']
-        ).count()
-        
-        # Average completion time
-        completed_tasks_with_time = Task.objects.filter(
-            status='COMPLETED',
-            completed_at__isnull=False
-        )
-        
-        avg_completion_time = 0
-        if completed_tasks_with_time.exists():
-            durations = []
-            for task in completed_tasks_with_time:
-                duration = (task.completed_at - task.created_at).total_seconds() / 3600
-                durations.append(duration)
-            avg_completion_time = sum(durations) / len(durations)
-        
-        # Productivity score
-        total_hours_logged = TimeLog.objects.aggregate(
-            total=Sum('hours')
-        )['total'] or 0
-        
-        productivity_score = 0
-        if total_hours_logged > 0:
-            productivity_score = round((completed_tasks / total_hours_logged) * 100, 2)
-        
-        data = {
-            'total_employees': total_employees,
-            'total_tasks': total_tasks,
-            'completed_tasks': completed_tasks,
-            'pending_tasks': pending_tasks,
-            'overdue_tasks': overdue_tasks,
-            'average_completion_time': round(avg_completion_time, 2),
-            'productivity_score': productivity_score,
-            'total_hours_logged': float(total_hours_logged)
-        }
+        if request.query_params.get('snapshot', '').lower() in ('1', 'true'):
+            data = get_analytics_summary_snapshot()
+        else:
+            data = build_analytics_summary()
         
         serializer = AnalyticsSummarySerializer(data)
         return Response(serializer.data)
@@ -139,64 +144,35 @@ def analytics_summary(request):
 
 @api_view(['GET'])
 @permission_classes([CanViewAnalytics])
+@cached_analytics('employee_performance')
 def employee_performance(request):
     """
     Get performance metrics for all employees
+
+    Supports ?department=<name>, ?ordering=<metric> (prefix with '-' for
+    descending) and page-number pagination.
     """
     try:
-        from django.contrib.auth import get_user_model
-        User = get_user_model()
+        ordering = request.query_params.get('ordering', 'user_name')
+        sort_field = EMPLOYEE_PERFORMANCE_ORDERING.get(ordering.lstrip('-'))
+        if sort_field is None:
+            return Response(
+                {'error': f'Invalid ordering. Choose from: {", ".join(EMPLOYEE_PERFORMANCE_ORDERING)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if ordering.startswith('-'):
+            sort_field = f'-{sort_field}'
         
-        employees = User.objects.filter(is_active_employee=True)
-        performance_data = []
+        employees = employee_performance_queryset(
+            department=request.query_params.get('department')
+        ).order_by(sort_field, 'id')
         
-        for employee in employees:
-            # Task metrics
-            assigned_tasks = Task.objects.filter(assigned_to=employee)
-            completed_tasks = assigned_tasks.filter(status='COMPLETED')
-            
-            tasks_assigned_count = assigned_tasks.count()
-            tasks_completed_count = completed_tasks.count()
-            
-            completion_rate = 0
-            if tasks_assigned_count > 0:
-                completion_rate = round((tasks_completed_count / tasks_assigned_count) * 100, 2)
-            
-            # Average task duration
-            avg_duration = 0
-            if completed_tasks.exists():
-                durations = []
-                for task in completed_tasks:
-                    if task.completed_at:
-                        duration = (task.completed_at - task.created_at).total_seconds() / 3600
-                        durations.append(duration)
-                if durations:
-                    avg_duration = sum(durations) / len(durations)
-            
-            # Hours logged
-            total_hours = TimeLog.objects.filter(user=employee).aggregate(
-                total=Sum('hours')
-            )['total'] or 0
-            
-            # Efficiency score
-            efficiency_score = 0
-            if total_hours > 0:
-                efficiency_score = round((tasks_completed_count / float(total_hours)) * 100, 2)
-            
-            performance_data.append({
-                'user_id': employee.id,
-                'user_name': employee.full_name,
-                'department': employee.department or 'N/A',
-                'tasks_completed': tasks_completed_count,
-                'tasks_assigned': tasks_assigned_count,
-                'completion_rate': completion_rate,
-                'average_task_duration': round(avg_duration, 2),
-                'efficiency_score': efficiency_score,
-                'total_hours_logged': float(total_hours)
-            })
+        paginator = PageNumberPagination()
+        page = paginator.paginate_queryset(employees, request)
+        performance_data = [employee_performance_row(employee) for employee in page]
         
         serializer = EmployeePerformanceSerializer(performance_data, many=True)
-        return Response(serializer.data)
+        return paginator.get_paginated_response(serializer.data)
     
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -204,22 +180,35 @@ def employee_performance(request):
 
 @api_view(['GET'])
 @permission_classes([CanViewAnalytics])
+@cached_analytics('project_performance')
 def project_performance(request):
     """
     Get performance metrics for all projects
+
+    Supports ?is_active=true|false and page-number pagination.
     """
     try:
-        projects = Task.objects.values('project').annotate(
+        projects = Task.objects.filter(project__isnull=False)
+        
+        is_active = request.query_params.get('is_active')
+        if is_active is not None:
+            projects = projects.filter(project__is_active=is_active.lower() in ('1', 'true'))
+        
+        projects = projects.values('project').annotate(
             project_name=F('project__name'),
             total_tasks=Count('id'),
             completed_tasks=Count('id', filter=Q(status='COMPLETED')),
             total_estimated_hours=Sum('estimated_hours'),
-            total_actual_hours=Sum('actual_hours')
-        ).filter(project__isnull=False)
+            total_actual_hours=Sum('actual_hours'),
+            average_duration=average_completion_duration()
+        ).order_by('project')
+        
+        paginator = PageNumberPagination()
+        page = paginator.paginate_queryset(projects, request)
         
         performance_data = []
         
-        for project in projects:
+        for project in page:
             total_tasks = project['total_tasks']
             completed_tasks = project['completed_tasks']
             
@@ -234,22 +223,6 @@ def project_performance(request):
             if estimated_hours > 0:
                 efficiency_ratio = round(estimated_hours / actual_hours, 2) if actual_hours > 0 else 0
             
-            # Average task duration
-            avg_duration = 0
-            completed_tasks_with_dates = Task.objects.filter(
-                project_id=project['project'],
-                status='COMPLETED',
-                completed_at__isnull=False
-            )
-            
-            if completed_tasks_with_dates.exists():
-                durations = []
-                for task in completed_tasks_with_dates:
-                    duration = (task.completed_at - task.created_at).total_seconds() / 3600
-                    durations.append(duration)
-                if durations:
-                    avg_duration = sum(durations) / len(durations)
-            
             performance_data.append({
                 'project_id': project['project'],
                 'project_name': project['project_name'],
@@ -259,61 +232,155 @@ def project_performance(request):
                 'total_estimated_hours': float(estimated_hours),
                 'total_actual_hours': float(actual_hours),
                 'efficiency_ratio': efficiency_ratio,
-                'average_task_duration': round(avg_duration, 2)
+                'average_task_duration': round(duration_to_hours(project['average_duration']), 2)
             })
         
         serializer = ProjectPerformanceSerializer(performance_data, many=True)
-        return Response(serializer.data)
+        return paginator.get_paginated_response(serializer.data)
     
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-@api_view(['POST'])
-@permission_classes([IsManagerOrAdmin])
-def generate_performance_report(request):
+@api_view(['GET'])
+@permission_classes([CanViewAnalytics])
+@throttle_classes([AnalyticsRateThrottle])
+@cached_analytics('timeseries')
+def analytics_timeseries(request):
     """
-    Generate performance report for a specific period
+    Task and logged-hours time series served from the daily rollup tables
+
+    Supports ?dimension=user|project|department (default department),
+    ?granularity=day|week|month (default week), ?start_date/?end_date
+    (YYYY-MM-DD, default the last 90 days) and a repeatable ?key= to
+    restrict the series to particular users, projects or departments.
     """
     try:
-        report_type = request.data.get('report_type', 'MONTHLY')
-        start_date = request.data.get('start_date')
-        end_date = request.data.get('end_date')
-        
-        if not start_date or not end_date:
+        dimension = request.query_params.get('dimension', 'department')
+        if dimension not in ROLLUP_MODELS:
             return Response(
-                {'error': 'Start date and end date are required'},
+                {'error': f'Invalid dimension. Choose from: {", ".join(ROLLUP_MODELS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        granularity = request.query_params.get('granularity', 'week')
+        if granularity not in SERIES_GRANULARITIES:
+            return Response(
+                {'error': f'Invalid granularity. Choose from: {", ".join(SERIES_GRANULARITIES)}'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Create report record
-        report = TaskPerformanceReport.objects.create(
-            report_type=report_type,
-            start_date=start_date,
-            end_date=end_date,
-            generated_by=request.user
-        )
-        
-        # Generate summary data (simplified for example)
-        summary_data = {
-            'total_tasks': Task.objects.filter(
-                created_at__date__range=[start_date, end_date]
-            ).count(),
-            'completed_tasks': Task.objects.filter(
-                status='COMPLETED',
-                completed_at__date__range=[start_date, end_date]
-            ).count(),
-            'total_hours': TimeLog.objects.filter(
-                date__range=[start_date, end_date]
-            ).aggregate(total=Sum('hours'))['total'] or 0
-        }
+        try:
+            end_date = parse_date(request.query_params.get('end_date', '')) or timezone.localdate()
+            start_date = (
+                parse_date(request.query_params.get('start_date', ''))
+                or end_date - timedelta(days=90)
+            )
+        except ValueError:
+            return Response(
+                {'error': 'Dates must be YYYY-MM-DD'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if start_date > end_date:
+            return Response(
+                {'error': 'Start date must not be after end date'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        report.summary_data = summary_data
-        report.is_generated = True
-        report.save()
+        keys = request.query_params.getlist('key')
+        if keys and dimension != 'department':
+            try:
+                keys = [int(key) for key in keys]
+            except ValueError:
+                return Response(
+                    {'error': f'{dimension} keys must be IDs'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
         
-        serializer = TaskPerformanceReportSerializer(report)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return Response({
+            'dimension': dimension,
+            'granularity': granularity,
+            'start_date': start_date,
+            'end_date': end_date,
+            'results': list(rollup_series(dimension, granularity, start_date, end_date, keys)),
+        })
     
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['POST'])
+@permission_classes([IsManagerOrAdmin])
+def generate_performance_report(request):
+    """
+    Request a performance report for a specific period. The report is built
+    in the background; poll it at reports/<id>/ until is_generated (or
+    failed_at, with the error) is set, then fetch the breakdown from
+    reports/<id>/download/. A report already built (or being built) for the
+    same range and data is returned instead.
+    """
+    from employee_task_system.celery import generate_performance_report as build_report
+    
+    report_type = request.data.get('report_type', 'MONTHLY')
+    if report_type not in dict(TaskPerformanceReport.REPORT_TYPES):
+        return Response({'error': 'Invalid report type'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        start_date = parse_date(request.data.get('start_date') or '')
+        end_date = parse_date(request.data.get('end_date') or '')
+    except (TypeError, ValueError):
+        # Malformed dates, or JSON numbers/lists instead of strings
+        start_date = end_date = None
+    if not start_date or not end_date:
+        return Response(
+            {'error': 'Start date and end date are required (YYYY-MM-DD)'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if start_date > end_date:
+        return Response(
+            {'error': 'Start date must not be after end date'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    # Identical requests over unchanged data share one report
+    report, created = request_report(report_type, start_date, end_date, request.user)
+    serializer = TaskPerformanceReportSerializer(report)
+    if report.is_generated:
+        return Response(serializer.data, status=status.HTTP_200_OK)
+    if created:
+        transaction.on_commit(lambda: build_report.delay(report.id))
+    return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+
+
+class TaskPerformanceReportDetailView(generics.RetrieveAPIView):
+    queryset = TaskPerformanceReport.objects.select_related('generated_by')
+    serializer_class = TaskPerformanceReportSerializer
+    permission_classes = [IsManagerOrAdmin]
+
+
+@api_view(['GET'])
+@permission_classes([IsManagerOrAdmin])
+def download_performance_report(request, pk):
+    """
+    Download a generated report's gzip-compressed CSV breakdown
+    """
+    report = get_object_or_404(TaskPerformanceReport, pk=pk)
+    if report.failed_at:
+        return Response(
+            {'error': f'Report generation failed: {report.error}'},
+            status=status.HTTP_409_CONFLICT
+        )
+    if not report.is_generated or not report.file_path:
+        return Response(
+            {'error': 'Report is still being generated'},
+            status=status.HTTP_409_CONFLICT
+        )
+    
+    path = os.path.join(settings.MEDIA_ROOT, report.file_path)
+    if not os.path.exists(path):
+        return Response({'error': 'Report file not found'}, status=status.HTTP_404_NOT_FOUND)
+    return FileResponse(
+        open(path, 'rb'),
+        as_attachment=True,
+        filename=os.path.basename(path),
+        content_type='application/gzip'
+    )
@@ -1,6 +1,5 @@
-from celery import Celery
+from celery import Celery, chord
 import os
-from django.core.mail import send_mail
 from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
@@ -21,197 +20,545 @@ app.autodiscover_tasks()
 User = get_user_model()
 
 
-@app.task(bind=True)
-def send_task_notification_email(self, user_id, task_title, message):
+def _digest_message(entries, connection):
+    """One email carrying every notification in `entries` (all for one recipient)"""
+    from django.core.mail import EmailMessage
+    
+    if len(entries) == 1:
+        subject = f"Task Update: {entries[0].task_title}"
+        body = entries[0].message
+    else:
+        subject = f"{len(entries)} task updates"
+        body = "\n\n---\n\n".join(
+            f"Task: {entry.task_title}\n\n{entry.message.strip()}"
+            for entry in entries
+        )
+    
+    return EmailMessage(
+        subject=subject,
+        body=body,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[entries[0].recipient.email],
+        connection=connection
+    )
+
+
+@app.task(bind=True, max_retries=3)
+def send_notification_batch(self, outbox_ids):
     """
-    Send email notification to user about task updates
+    Deliver a batch of outbox notifications as one digest email per
+    recipient, all sent over a single SMTP connection
+
+    Each digest is sent and marked delivered on its own, so a rejected
+    address does not hold back the other recipients and a retry only
+    resends the digests that failed. Rows still undelivered after the last
+    retry are released for the relay to claim again, until they have
+    failed NOTIFICATION_MAX_ATTEMPTS times and are marked failed. Rows
+    whose recipient has no email address are marked failed at once.
     """
+    from tasks.models import NotificationOutbox
+    from django.core.mail import get_connection
+    
+    pending = NotificationOutbox.objects.filter(
+        id__in=outbox_ids,
+        delivered_at__isnull=True,
+        failed_at__isnull=True
+    ).select_related('recipient').order_by('recipient_id', 'id')
+    
+    digests = {}
+    unaddressed = []
+    for entry in pending:
+        if entry.recipient.email:
+            digests.setdefault(entry.recipient_id, []).append(entry)
+        else:
+            unaddressed.append(entry.id)
+    if unaddressed:
+        NotificationOutbox.objects.filter(id__in=unaddressed).update(
+            failed_at=timezone.now(),
+            last_error='Recipient has no email address'
+        )
+    
+    delivered = 0
+    failures = {}
+    connection = get_connection(fail_silently=False)
     try:
-        user = User.objects.get(id=user_id)
-        subject = f"Task Update: {task_title}"
-        
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user.email],
-            fail_silently=False,
+        connection.open()
+    except Exception as exc:
+        failures = dict.fromkeys(digests, exc)
+    else:
+        try:
+            for recipient_id, entries in digests.items():
+                try:
+                    connection.send_messages([_digest_message(entries, connection)])
+                except Exception as exc:
+                    failures[recipient_id] = exc
+                    continue
+                
+                NotificationOutbox.objects.filter(
+                    id__in=[entry.id for entry in entries]
+                ).update(delivered_at=timezone.now())
+                delivered += len(entries)
+        finally:
+            connection.close()
+    
+    if failures:
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=next(iter(failures.values())), countdown=60)
+        
+        max_attempts = getattr(settings, 'NOTIFICATION_MAX_ATTEMPTS', 5)
+        for recipient_id, exc in failures.items():
+            NotificationOutbox.record_failure(
+                [entry.id for entry in digests[recipient_id]], exc, max_attempts
+            )
+        return (
+            f"Delivered {delivered} notifications in {len(digests) - len(failures)} emails; "
+            f"{len(failures)} digests failed"
         )
+    
+    return f"Delivered {delivered} notifications in {len(digests)} emails"
+
+
+@app.task(bind=True)
+def relay_notification_outbox(self):
+    """
+    Publish pending outbox notifications to the broker in batches
+
+    Rows are claimed with SELECT ... FOR UPDATE SKIP LOCKED and marked
+    dispatched in the same transaction, so concurrent relays never publish
+    the same row twice. Every pending row of a claimed recipient is claimed
+    with it and lands in the same send_notification_batch message, so it
+    is sent as one digest.
+    """
+    try:
+        from tasks.models import NotificationOutbox
+        from django.db import transaction
         
-        return f"Email sent to {user.email}"
+        claim_size = getattr(settings, 'NOTIFICATION_OUTBOX_BATCH_SIZE', 500)
+        recipients_per_batch = getattr(settings, 'NOTIFICATION_EMAIL_BATCH_SIZE', 100)
+        relayed = 0
+        
+        while True:
+            with transaction.atomic():
+                claimed = list(
+                    NotificationOutbox.objects.select_for_update(skip_locked=True)
+                    .filter(dispatched_at__isnull=True)
+                    .order_by('id')
+                    .values_list('id', 'recipient_id')[:claim_size]
+                )
+                if not claimed:
+                    break
+                claim_full = len(claimed) == claim_size
+                
+                # Take the rest of these recipients' pending rows too, so
+                # each gets a single digest however many rows they have
+                claimed += list(
+                    NotificationOutbox.objects.select_for_update(skip_locked=True)
+                    .filter(
+                        dispatched_at__isnull=True,
+                        recipient_id__in={recipient_id for _, recipient_id in claimed},
+                        id__gt=claimed[-1][0]
+                    )
+                    .order_by('id')
+                    .values_list('id', 'recipient_id')
+                )
+                
+                by_recipient = {}
+                for outbox_id, recipient_id in claimed:
+                    by_recipient.setdefault(recipient_id, []).append(outbox_id)
+                recipient_groups = list(by_recipient.values())
+                
+                with app.producer_or_acquire() as producer:
+                    for start in range(0, len(recipient_groups), recipients_per_batch):
+                        outbox_ids = [
+                            outbox_id
+                            for group in recipient_groups[start:start + recipients_per_batch]
+                            for outbox_id in group
+                        ]
+                        send_notification_batch.apply_async(
+                            args=[outbox_ids],
+                            task_id=f'notification-batch-{min(outbox_ids)}-{max(outbox_ids)}',
+                            producer=producer
+                        )
+                
+                NotificationOutbox.objects.filter(
+                    id__in=[outbox_id for outbox_id, _ in claimed]
+                ).update(dispatched_at=timezone.now())
+            
+            relayed += len(claimed)
+            if not claim_full:
+                break
+        
+        return f"Relayed {relayed} notifications"
     
     except Exception as exc:
-        self.retry(exc=exc, countdown=60, max_retries=3)
+        self.retry(exc=exc, countdown=10, max_retries=3)
+
+
+def id_ranges(queryset, chunk_size=None):
+    """
+    Split a queryset's primary keys into contiguous (first_id, last_id)
+    ranges of at most chunk_size rows for fanning work out to subtasks
+    """
+    chunk_size = chunk_size or getattr(settings, 'ANALYTICS_CHUNK_SIZE', 1000)
+    ids = list(queryset.order_by('id').values_list('id', flat=True))
+    return [
+        (ids[start], ids[min(start + chunk_size, len(ids)) - 1])
+        for start in range(0, len(ids), chunk_size)
+    ]
 
 
 @app.task(bind=True)
 def generate_daily_productivity_report(self):
     """
     Generate daily productivity metrics for all employees
+
+    Fans out one productivity_report_chunk per employee ID range as a
+    chord; productivity_report_summary collects the chunk results.
+    """
+    try:
+        today = timezone.now().date().isoformat()
+        ranges = id_ranges(User.objects.filter(is_active_employee=True))
+        if not ranges:
+            return "No active employees"
+        
+        chord(
+            productivity_report_chunk.s(first_id, last_id, today)
+            for first_id, last_id in ranges
+        )(productivity_report_summary.s(today))
+        
+        return f"Daily productivity report dispatched in {len(ranges)} chunks"
+    
+    except Exception as exc:
+        self.retry(exc=exc, countdown=60, max_retries=3)
+
+
+@app.task(bind=True)
+def productivity_report_chunk(self, first_id, last_id, report_date):
+    """
+    Productivity and workload metrics for the active employees whose IDs
+    fall in [first_id, last_id]
+
+    Every per-user metric comes from one grouped query over tasks and one
+    over time logs; the rows are then written with bulk upserts, so the
+    query count does not depend on the number of employees.
     """
     try:
         from tasks.models import Task, TimeLog
         from analytics.models import EmployeeProductivity, WorkloadDistribution
-        from django.db.models import Sum, Count
-        
-        today = timezone.now().date()
-        employees = User.objects.filter(is_active_employee=True)
-        
-        for employee in employees:
-            # Calculate daily metrics
-            tasks_assigned = Task.objects.filter(assigned_to=employee).count()
-            tasks_completed = Task.objects.filter(
-                assigned_to=employee,
-                status='COMPLETED',
-                completed_at__date=today
-            ).count()
-            
-            hours_logged = TimeLog.objects.filter(
-                user=employee,
+        from django.db.models import Sum, Count, Q
+        from datetime import date
+        
+        now = timezone.now()
+        today = date.fromisoformat(report_date)
+        open_statuses = ['TODO', 'IN_PROGRESS']
+        employee_ids = list(
+            User.objects.filter(
+                is_active_employee=True,
+                id__range=(first_id, last_id)
+            ).values_list('id', flat=True)
+        )
+        
+        task_metrics = {
+            row['assigned_to']: row
+            for row in Task.objects.filter(
+                assigned_to__is_active_employee=True,
+                assigned_to_id__range=(first_id, last_id)
+            ).order_by().values('assigned_to').annotate(
+                tasks_assigned=Count('id'),
+                tasks_completed=Count('id', filter=Q(
+                    status='COMPLETED', completed_at__date=today
+                )),
+                active_tasks=Count('id', filter=Q(status__in=open_statuses)),
+                total_estimated_hours=Sum(
+                    'estimated_hours', filter=Q(status__in=open_statuses)
+                ),
+                overdue_tasks=Count('id', filter=Q(
+                    status__in=open_statuses, due_date__lt=now
+                )),
+            )
+        }
+        
+        hours_by_user = dict(
+            TimeLog.objects.filter(
+                user__is_active_employee=True,
+                user_id__range=(first_id, last_id),
                 date=today
-            ).aggregate(total=Sum('hours'))['total'] or 0
+            ).order_by().values('user').annotate(
+                total=Sum('hours')
+            ).values_list('user', 'total')
+        )
+        
+        productivity_rows = []
+        workload_rows = []
+        for user_id in employee_ids:
+            metrics = task_metrics.get(user_id, {})
+            tasks_completed = metrics.get('tasks_completed', 0)
+            hours_logged = hours_by_user.get(user_id) or 0
             
             # Calculate efficiency score
             efficiency_score = 0
             if hours_logged > 0:
-                efficiency_score = round((tasks_completed / float(hours_logged)) * 100, 2)
+                efficiency_score = min(
+                    round((tasks_completed / float(hours_logged)) * 100, 2),
+                    float(EmployeeProductivity.MAX_EFFICIENCY_SCORE)
+                )
             
-            # Update or create productivity record
-            EmployeeProductivity.objects.update_or_create(
-                user=employee,
+            productivity_rows.append(EmployeeProductivity(
+                user_id=user_id,
                 date=today,
-                defaults={
-                    'tasks_completed': tasks_completed,
-                    'tasks_assigned': tasks_assigned,
-                    'hours_logged': hours_logged,
-                    'efficiency_score': efficiency_score
-                }
-            )
-            
-            # Update workload distribution
-            active_tasks = Task.objects.filter(
-                assigned_to=employee,
-                status__in=['TODO', 'IN_PROGRESS']
-            ).count()
-            
-            total_estimated_hours = Task.objects.filter(
-                assigned_to=employee,
-                status__in=['TODO', 'IN_PROGRESS']
-            ).aggregate(total=Sum('estimated_hours'))['total'] or 0
-            
-            overdue_tasks = Task.objects.filter(
-                assigned_to=employee,
-                due_date__lt=timezone.now(),
-                status__in=['TODO', 'IN_PROGRESS']
-            ).count()
+                tasks_completed=tasks_completed,
+                tasks_assigned=metrics.get('tasks_assigned', 0),
+                hours_logged=hours_logged,
+                efficiency_score=efficiency_score
+            ))
             
             # Calculate workload score
+            total_estimated_hours = metrics.get('total_estimated_hours') or 0
             workload_score = 0
             if total_estimated_hours > 0:
                 workload_score = min(100, (total_estimated_hours / 8) * 100)  # 8 hours = 100% workload
             
-            WorkloadDistribution.objects.update_or_create(
-                user=employee,
+            workload_rows.append(WorkloadDistribution(
+                user_id=user_id,
                 date=today,
-                defaults={
-                    'active_tasks_count': active_tasks,
-                    'total_estimated_hours': total_estimated_hours,
-                    'overdue_tasks_count': overdue_tasks,
-                    'workload_score': workload_score
-                }
-            )
+                active_tasks_count=metrics.get('active_tasks', 0),
+                total_estimated_hours=total_estimated_hours,
+                overdue_tasks_count=metrics.get('overdue_tasks', 0),
+                workload_score=workload_score
+            ))
         
-        return f"Daily productivity report generated for {employees.count()} employees"
+        EmployeeProductivity.objects.bulk_create(
+            productivity_rows,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['user', 'date'],
+            update_fields=[
+                'tasks_completed', 'tasks_assigned',
+                'hours_logged', 'efficiency_score'
+            ]
+        )
+        
+        WorkloadDistribution.objects.bulk_create(
+            workload_rows,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['user', 'date'],
+            update_fields=[
+                'active_tasks_count', 'total_estimated_hours',
+                'overdue_tasks_count', 'workload_score'
+            ]
+        )
+        
+        return len(employee_ids)
     
     except Exception as exc:
         self.retry(exc=exc, countdown=60, max_retries=3)
 
 
+@app.task
+def productivity_report_summary(chunk_counts, report_date):
+    """
+    Final step of the productivity chord
+    """
+    return f"Daily productivity report for {report_date} generated for {sum(chunk_counts)} employees in {len(chunk_counts)} chunks"
+
+
 @app.task(bind=True)
 def update_project_analytics(self):
     """
-    Update analytics for all projects
+    Rebuild analytics for all projects from scratch
+
+    Counters are maintained incrementally from task changes; this full
+    rebuild only runs on demand via `rebuild_project_analytics --async`.
+    It fans out one project_analytics_chunk per project ID range.
+    """
+    try:
+        from tasks.models import Project
+        
+        ranges = id_ranges(Project.objects.all())
+        if not ranges:
+            return "No projects"
+        
+        chord(
+            project_analytics_chunk.s(first_id, last_id)
+            for first_id, last_id in ranges
+        )(project_analytics_summary.s())
+        
+        return f"Project analytics rebuild dispatched in {len(ranges)} chunks"
+    
+    except Exception as exc:
+        self.retry(exc=exc, countdown=60, max_retries=3)
+
+
+@app.task(bind=True)
+def project_analytics_chunk(self, first_id, last_id):
+    """
+    Rebuild analytics for the projects whose IDs fall in [first_id, last_id]
     """
     try:
         from tasks.models import Project
         from analytics.models import ProjectAnalytics
         
-        projects = Project.objects.all()
+        projects = Project.objects.filter(id__range=(first_id, last_id))
         
+        rebuilt = 0
         for project in projects:
             analytics, created = ProjectAnalytics.objects.get_or_create(
                 project=project
             )
             analytics.update_metrics()
+            rebuilt += 1
         
-        return f"Analytics updated for {projects.count()} projects"
+        return rebuilt
     
     except Exception as exc:
         self.retry(exc=exc, countdown=60, max_retries=3)
 
 
+@app.task
+def project_analytics_summary(chunk_counts):
+    """
+    Final step of the project analytics chord
+    """
+    return f"Analytics updated for {sum(chunk_counts)} projects in {len(chunk_counts)} chunks"
+
+
 @app.task(bind=True)
 def analyze_task_delays(self):
     """
     Analyze delays for completed tasks
+
+    Only tasks completed after the high-watermark (the latest completion
+    already analysed, less a small overlap for late commits) are scanned.
+    Analyses are computed in Python from one fetched batch and written with
+    bulk_create; tasks that were reopened and completed again have their
+    existing analysis recomputed.
     """
     try:
         from tasks.models import Task
         from analytics.models import DelayAnalysis
+        from django.db.models import Max
+        
+        batch_size = getattr(settings, 'DELAY_ANALYSIS_BATCH_SIZE', 1000)
+        overlap = timedelta(minutes=getattr(settings, 'DELAY_ANALYSIS_OVERLAP_MINUTES', 60))
         
         completed_tasks = Task.objects.filter(
             status='COMPLETED',
-            completed_at__isnull=False,
-            delay_analysis__isnull=True
+            completed_at__isnull=False
         )
+        watermark = DelayAnalysis.objects.aggregate(
+            watermark=Max('task_completed_at')
+        )['watermark']
+        if watermark:
+            completed_tasks = completed_tasks.filter(completed_at__gt=watermark - overlap)
         
-        for task in completed_tasks:
-            delay_analysis = DelayAnalysis.objects.create(task=task)
-            delay_analysis.calculate_delay()
+        rows = completed_tasks.order_by('completed_at', 'id').values(
+            'id', 'title', 'assigned_to_id', 'created_at', 'due_date', 'completed_at'
+        )
+        
+        created_count = updated_count = 0
+        batch = []
+        for row in rows.iterator(chunk_size=batch_size):
+            batch.append(row)
+            if len(batch) == batch_size:
+                created, updated = _analyze_delay_batch(batch)
+                created_count, updated_count = created_count + created, updated_count + updated
+                batch = []
+        if batch:
+            created, updated = _analyze_delay_batch(batch)
+            created_count, updated_count = created_count + created, updated_count + updated
         
-        return f"Delay analysis completed for {completed_tasks.count()} tasks"
+        return f"Delay analysis completed for {created_count} new and {updated_count} recompleted tasks"
     
     except Exception as exc:
         self.retry(exc=exc, countdown=60, max_retries=3)
 
 
+def _analyze_delay_batch(rows):
+    """
+    Create or recompute DelayAnalysis rows for one batch of task values
+    """
+    from tasks.models import NotificationOutbox
+    from analytics.models import DelayAnalysis
+    
+    existing = DelayAnalysis.objects.in_bulk(
+        [row['id'] for row in rows], field_name='task_id'
+    )
+    
+    to_create = []
+    to_update = []
+    notifications = []
+    for row in rows:
+        analysis = existing.get(row['id'])
+        if analysis is not None and analysis.task_completed_at == row['completed_at']:
+            continue
+        
+        if analysis is None:
+            analysis = DelayAnalysis(task_id=row['id'])
+            to_create.append(analysis)
+        else:
+            to_update.append(analysis)
+        analysis.apply_task_times(row['created_at'], row['due_date'], row['completed_at'])
+        
+        # bulk_create skips delay_analysis_post_save, so notify here
+        if analysis.pk is None and analysis.is_significant and row['assigned_to_id']:
+            notifications.append(NotificationOutbox(
+                recipient_id=row['assigned_to_id'],
+                task_title=row['title'],
+                message=analysis.notification_message(row['title'])
+            ))
+    
+    DelayAnalysis.objects.bulk_create(to_create)
+    DelayAnalysis.objects.bulk_update(to_update, [
+        'planned_duration', 'actual_duration', 'delay_hours',
+        'delay_percentage', 'task_completed_at'
+    ])
+    NotificationOutbox.objects.bulk_create(notifications)
+    
+    return len(to_create), len(to_update)
+
+
 @app.task(bind=True)
 def send_overdue_task_notifications(self):
     """
     Send notifications for overdue tasks
     """
     try:
-        from tasks.models import Task
+        from tasks.models import Task, NotificationOutbox
         
         overdue_tasks = Task.objects.filter(
             due_date__lt=timezone.now(),
-            status__in=['TODO', 'IN_PROGRESS']
-        )
+            status__in=['TODO', 'IN_PROGRESS'],
+            assigned_to__isnull=False
+        ).select_related('assigned_to')
         
-        for task in overdue_tasks:
-            if task.assigned_to:
-                message = f"""
-                Dear {task.assigned_to.full_name},
-                
-                This is a reminder that the following task is overdue:
-                
-                Title: {task.title}
-                Due Date: {task.due_date.strftime('%Y-%m-%d')}
-                Priority: {task.priority}
-                
-                Please update the task status or contact your manager if you need an extension.
-                
-                Best regards,
-                Employee Task Management System
-                """
-                
-                send_task_notification_email.delay(
-                    task.assigned_to.id,
-                    task.title,
-                    message
-                )
+        notifications = []
+        for task in overdue_tasks.iterator(chunk_size=2000):
+            message = f"""
+            Dear {task.assigned_to.full_name},
+            
+            This is a reminder that the following task is overdue:
+            
+            Title: {task.title}
+            Due Date: {task.due_date.strftime('%Y-%m-%d')}
+            Priority: {task.priority}
+            
+            Please update the task status or contact your manager if you need an extension.
+            
+            Best regards,
+            Employee Task Management System
+            """
+            
+            notifications.append(NotificationOutbox(
+                recipient_id=task.assigned_to_id,
+                task_title=task.title,
+                message=message
+            ))
+        
+        # The outbox relay publishes these in batches
+        NotificationOutbox.objects.bulk_create(notifications, batch_size=1000)
         
-        return f"Overdue task notifications sent for {overdue_tasks.count()} tasks"
+        return f"Overdue task notifications queued for {len(notifications)} tasks"
     
     except Exception as exc:
         self.retry(exc=exc, countdown=60, max_retries=3)
@@ -221,64 +568,194 @@ def send_overdue_task_notifications(self):
 def generate_department_analytics(self):
     """
     Generate daily department analytics
+
+    Each department_analytics_chunk computes partial per-department sums
+    for one employee ID range; department_analytics_merge combines them
+    and writes the DepartmentAnalytics rows.
     """
     try:
-        from analytics.models import DepartmentAnalytics
-        from django.db.models import Avg
+        today = timezone.now().date().isoformat()
+        ranges = id_ranges(User.objects.all())
+        if not ranges:
+            return "No employees"
+        
+        chord(
+            department_analytics_chunk.s(first_id, last_id, today)
+            for first_id, last_id in ranges
+        )(department_analytics_merge.s(today))
         
-        today = timezone.now().date()
-        departments = User.objects.filter(
+        return f"Department analytics dispatched in {len(ranges)} chunks"
+    
+    except Exception as exc:
+        self.retry(exc=exc, countdown=60, max_retries=3)
+
+
+@app.task(bind=True)
+def department_analytics_chunk(self, first_id, last_id, report_date):
+    """
+    Partial department metrics for users whose IDs fall in [first_id, last_id]
+    """
+    try:
+        from analytics.models import EmployeeProductivity
+        from django.db.models import Sum, Count, F
+        
+        partials = {}
+        
+        employee_counts = User.objects.filter(
             is_active_employee=True,
-            department__isnull=False
-        ).values_list('department', flat=True).distinct()
+            department__isnull=False,
+            id__range=(first_id, last_id)
+        ).order_by().values('department').annotate(total=Count('id'))
         
-        for department in departments:
-            employees = User.objects.filter(
-                department=department,
-                is_active_employee=True
-            )
-            
-            total_employees = employees.count()
-            
-            # Get productivity metrics for this department
-            productivity_metrics = EmployeeProductivity.objects.filter(
-                user__department=department,
-                date=today
-            )
-            
-            active_tasks = 0
-            completed_tasks = 0
-            total_hours = 0
-            efficiency_scores = []
-            
-            for metric in productivity_metrics:
-                active_tasks += metric.tasks_assigned - metric.tasks_completed
-                completed_tasks += metric.tasks_completed
-                total_hours += metric.hours_logged
-                efficiency_scores.append(metric.efficiency_score)
+        for row in employee_counts:
+            partials[row['department']] = {
+                'total_employees': row['total'],
+                'active_tasks': 0,
+                'completed_tasks': 0,
+                'total_hours_logged': '0',
+                'efficiency_sum': '0',
+                'efficiency_count': 0,
+            }
+        
+        productivity = EmployeeProductivity.objects.filter(
+            date=report_date,
+            user_id__range=(first_id, last_id),
+            user__department__isnull=False
+        ).order_by().values('user__department').annotate(
+            active_tasks=Sum(F('tasks_assigned') - F('tasks_completed')),
+            completed_tasks=Sum('tasks_completed'),
+            total_hours_logged=Sum('hours_logged'),
+            efficiency_sum=Sum('efficiency_score'),
+            efficiency_count=Count('id'),
+        )
+        
+        for row in productivity:
+            partial = partials.setdefault(row['user__department'], {
+                'total_employees': 0,
+            })
+            partial.update({
+                'active_tasks': row['active_tasks'] or 0,
+                'completed_tasks': row['completed_tasks'] or 0,
+                # Decimals travel as strings to stay exact through JSON
+                'total_hours_logged': str(row['total_hours_logged'] or 0),
+                'efficiency_sum': str(row['efficiency_sum'] or 0),
+                'efficiency_count': row['efficiency_count'],
+            })
+        
+        return partials
+    
+    except Exception as exc:
+        self.retry(exc=exc, countdown=60, max_retries=3)
+
+
+@app.task(bind=True)
+def department_analytics_merge(self, chunk_partials, report_date):
+    """
+    Final step of the department chord: combine partial sums and upsert
+    """
+    try:
+        from analytics.models import DepartmentAnalytics
+        from decimal import Decimal
+        
+        totals = {}
+        for partials in chunk_partials:
+            for department, partial in partials.items():
+                total = totals.setdefault(department, {
+                    'total_employees': 0,
+                    'active_tasks': 0,
+                    'completed_tasks': 0,
+                    'total_hours_logged': Decimal('0'),
+                    'efficiency_sum': Decimal('0'),
+                    'efficiency_count': 0,
+                })
+                total['total_employees'] += partial.get('total_employees', 0)
+                total['active_tasks'] += partial.get('active_tasks', 0)
+                total['completed_tasks'] += partial.get('completed_tasks', 0)
+                total['total_hours_logged'] += Decimal(partial.get('total_hours_logged', '0'))
+                total['efficiency_sum'] += Decimal(partial.get('efficiency_sum', '0'))
+                total['efficiency_count'] += partial.get('efficiency_count', 0)
+        
+        # Only departments that still have active employees are reported
+        rows = []
+        for department, total in totals.items():
+            if not total['total_employees']:
+                continue
             
             average_efficiency = 0
-            if efficiency_scores:
-                average_efficiency = sum(efficiency_scores) / len(efficiency_scores)
+            if total['efficiency_count']:
+                average_efficiency = total['efficiency_sum'] / total['efficiency_count']
             
-            DepartmentAnalytics.objects.update_or_create(
+            rows.append(DepartmentAnalytics(
                 department=department,
-                date=today,
-                defaults={
-                    'total_employees': total_employees,
-                    'active_tasks': active_tasks,
-                    'completed_tasks': completed_tasks,
-                    'total_hours_logged': total_hours,
-                    'average_efficiency': round(average_efficiency, 2)
-                }
-            )
+                date=report_date,
+                total_employees=total['total_employees'],
+                active_tasks=total['active_tasks'],
+                completed_tasks=total['completed_tasks'],
+                total_hours_logged=total['total_hours_logged'],
+                average_efficiency=round(average_efficiency, 2)
+            ))
+        
+        DepartmentAnalytics.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['department', 'date'],
+            update_fields=[
+                'total_employees', 'active_tasks', 'completed_tasks',
+                'total_hours_logged', 'average_efficiency'
+            ]
+        )
+        
+        return f"Department analytics generated for {len(rows)} departments"
+    
+    except Exception as exc:
+        self.retry(exc=exc, countdown=60, max_retries=3)
+
+
+@app.task(bind=True)
+def refresh_analytics_summary(self):
+    """
+    Refresh the cached dashboard summary snapshot
+    """
+    try:
+        from analytics.aggregates import refresh_analytics_summary_snapshot
         
-        return f"Department analytics generated for {len(departments)} departments"
+        refresh_analytics_summary_snapshot()
+        return "Analytics summary snapshot refreshed"
     
     except Exception as exc:
         self.retry(exc=exc, countdown=60, max_retries=3)
 
 
+@app.task(bind=True, max_retries=3)
+def generate_performance_report(self, report_id):
+    """
+    Build a requested TaskPerformanceReport: breakdown file, summary and
+    is_generated flag. Once the retries are used up the report is marked
+    failed, so clients polling it stop waiting.
+    """
+    from analytics.models import TaskPerformanceReport
+    
+    try:
+        from analytics.reports import generate_report
+        
+        report = TaskPerformanceReport.objects.get(id=report_id)
+        if report.is_generated:
+            return f"Report {report_id} already generated"
+        
+        report = generate_report(report)
+        return f"Report {report_id} generated: {report.file_path}"
+    
+    except Exception as exc:
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=exc, countdown=60)
+        
+        TaskPerformanceReport.objects.filter(id=report_id, is_generated=False).update(
+            failed_at=timezone.now(),
+            error=str(exc)
+        )
+        raise
+
+
 # Schedule periodic tasks
 from celery.schedules import crontab
 
@@ -287,10 +764,6 @@ app.conf.beat_schedule = {
         'task': 'employee_task_system.celery.generate_daily_productivity_report',
         'schedule': crontab(hour=23, minute=59),  # Run daily at 11:59 PM
     },
-    'update-project-analytics': {
-        'task': 'employee_task_system.celery.update_project_analytics',
-        'schedule': crontab(hour=0, minute=5),  # Run daily at 12:05 AM
-    },
     'analyze-task-delays': {
         'task': 'employee_task_system.celery.analyze_task_delays',
         'schedule': crontab(hour=0, minute=10),  # Run daily at 12:10 AM
@@ -303,4 +776,12 @@ app.conf.beat_schedule = {
         'task': 'employee_task_system.celery.generate_department_analytics',
         'schedule': crontab(hour=23, minute=30),  # Run daily at 11:30 PM
     },
+    'relay-notification-outbox': {
+        'task': 'employee_task_system.celery.relay_notification_outbox',
+        'schedule': 5.0,  # Run every 5 seconds
+    },
+    'refresh-analytics-summary': {
+        'task': 'employee_task_system.celery.refresh_analytics_summary',
+        'schedule': crontab(minute='*/5'),  # Run every 5 minutes
+    },
 }
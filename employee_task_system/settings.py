@@ -138,6 +138,40 @@ CORS_ALLOWED_ORIGINS = [
     "http://127.0.0.1:3000",
 ]
 
+# Cache Configuration
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://localhost:6379/1',
+    },
+    'analytics': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://localhost:6379/2',
+    },
+}
+
+# Seconds each cached resource lives (see utils.cache_utils). Task lists,
+# projects and profiles are also invalidated on writes; analytics are only
+# invalidated when projects change and otherwise refresh on expiry
+CACHE_TIMEOUTS = {
+    'user_profile': 60 * 15,
+    'task_list': 60 * 2,
+    'project_data': 60 * 5,
+    'analytics': 60 * 5,
+}
+
+# Analytics stampede protection (utils.cache_utils.get_or_compute_analytics):
+# how long an expired entry may still be served while one request
+# recomputes it, how long that request holds the recompute lock, and how
+# eagerly entries are refreshed before they expire
+ANALYTICS_CACHE_STALE_SECONDS = 60 * 10
+ANALYTICS_CACHE_LOCK_SECONDS = 30
+ANALYTICS_CACHE_EARLY_REFRESH_BETA = 1.0
+
+# How often each process re-reads the shared version of its in-process hot
+# lookup caches (utils.two_tier_cache); bounds cross-process staleness
+LOCAL_CACHE_VERSION_CHECK_SECONDS = 5
+
 # Celery Configuration
 CELERY_BROKER_URL = 'redis://localhost:6379/0'
 CELERY_RESULT_BACKEND = 'redis://localhost:6379/0'
@@ -146,6 +180,34 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 
+# Rows (employees or projects) per subtask when nightly jobs fan out
+ANALYTICS_CHUNK_SIZE = 1000
+
+# analyze_task_delays rescans this far behind its completed_at watermark
+# to pick up completions that committed late
+DELAY_ANALYSIS_OVERLAP_MINUTES = 60
+DELAY_ANALYSIS_BATCH_SIZE = 1000
+
+# Notifications claimed from the outbox per relay transaction
+NOTIFICATION_OUTBOX_BATCH_SIZE = 500
+# Recipients (one digest email each) per send_notification_batch task
+NOTIFICATION_EMAIL_BATCH_SIZE = 100
+# Failed send_notification_batch runs (each with its own retries) before an
+# outbox row is marked failed instead of being released to the relay again
+NOTIFICATION_MAX_ATTEMPTS = 5
+# Rows fetched per server-side cursor round trip (and written per response
+# chunk) by the streaming task/time log exports
+EXPORT_CHUNK_SIZE = 2000
+
+# Task change feed (tasks.sync): rows per feed per response, and how long a
+# change must have been committed before it is served, so transactions that
+# commit with slightly older timestamps are never skipped
+SYNC_PAGE_SIZE = 500
+SYNC_SETTLE_SECONDS = 2
+
+# Most tasks accepted per bulk create/update/status request (tasks.bulk)
+BULK_TASK_LIMIT = 500
+
 # API Documentation Configuration
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Employee Task Management API',
@@ -0,0 +1,127 @@
+import random
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.utils import timezone
+from tasks.models import Project, Task, TaskHistory, TimeLog
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Print query plans and timings for the hot Task/TimeLog/TaskHistory queries. '
+        'Run it once with the tasks 0003_query_indexes indexes dropped (DROP INDEX; later '
+        'migrations depend on 0003, so it cannot be unapplied alone) and once with them in '
+        'place to compare plans; --seed-tasks bulk-loads a dataset first.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed-tasks',
+            type=int,
+            default=0,
+            help='Bulk-create this many tasks (plus time logs and history) before benchmarking, e.g. 1000000',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Rows per bulk_create batch when seeding',
+        )
+        parser.add_argument(
+            '--no-analyze',
+            action='store_true',
+            help='Show estimated plans only (skip EXPLAIN ANALYZE on PostgreSQL)',
+        )
+
+    def handle(self, *args, **options):
+        if options['seed_tasks']:
+            self.seed(options['seed_tasks'], options['batch_size'])
+        
+        employee = User.objects.filter(is_active_employee=True).order_by('?').first()
+        project = Project.objects.order_by('?').first()
+        task = Task.objects.order_by('-id').first()
+        if not (employee and project and task):
+            raise CommandError('Seed users, projects and tasks first (see seed_data / --seed-tasks)')
+        
+        now = timezone.now()
+        today = now.date()
+        open_statuses = ['TODO', 'IN_PROGRESS']
+        querysets = {
+            'Task(assigned_to, status)': Task.objects.filter(assigned_to=employee, status__in=open_statuses),
+            'Task(status, due_date) overdue': Task.objects.filter(status__in=open_statuses, due_date__lt=now),
+            'Task(project, status)': Task.objects.filter(project=project, status='COMPLETED'),
+            'Task(status, completed_at)': Task.objects.filter(status='COMPLETED', completed_at__gte=now - timedelta(days=1)),
+            'TimeLog(user, date)': TimeLog.objects.filter(user=employee, date=today),
+            'TimeLog(task, date)': TimeLog.objects.filter(task=task, date__gte=today - timedelta(days=30)),
+            'TaskHistory(task, timestamp)': TaskHistory.objects.filter(task=task).order_by('-timestamp')[:20],
+        }
+        
+        analyze = connection.vendor == 'postgresql' and not options['no_analyze']
+        for name, queryset in querysets.items():
+            started = time.perf_counter()
+            list(queryset)
+            elapsed = (time.perf_counter() - started) * 1000
+            
+            self.stdout.write(self.style.SUCCESS(f'\n=== {name} ({elapsed:.1f} ms) ==='))
+            self.stdout.write(queryset.explain(analyze=True) if analyze else queryset.explain())
+
+    def seed(self, count, batch_size):
+        employees = list(User.objects.filter(is_active_employee=True).values_list('id', flat=True))
+        projects = list(Project.objects.values_list('id', flat=True))
+        if not employees or not projects:
+            raise CommandError('Run seed_data first so there are users and projects to attach tasks to')
+        
+        statuses = ['TODO', 'IN_PROGRESS', 'REVIEW', 'COMPLETED', 'CANCELLED']
+        priorities = ['LOW', 'MEDIUM', 'HIGH', 'URGENT']
+        now = timezone.now()
+        
+        created = 0
+        while created < count:
+            size = min(batch_size, count - created)
+            tasks = []
+            for _ in range(size):
+                status = random.choice(statuses)
+                tasks.append(Task(
+                    title=f'Benchmark task {created}',
+                    description='Benchmark',
+                    project_id=random.choice(projects),
+                    assigned_to_id=random.choice(employees),
+                    created_by_id=random.choice(employees),
+                    priority=random.choice(priorities),
+                    status=status,
+                    estimated_hours=random.randint(1, 40),
+                    due_date=now + timedelta(days=random.randint(-60, 60)),
+                    completed_at=now - timedelta(days=random.randint(0, 365)) if status == 'COMPLETED' else None,
+                ))
+            # bulk_create bypasses Task.save() and the signal handlers on purpose
+            tasks = Task.objects.bulk_create(tasks, batch_size=batch_size)
+            
+            TimeLog.objects.bulk_create([
+                TimeLog(
+                    task_id=task.id,
+                    user_id=task.assigned_to_id,
+                    hours=random.randint(1, 8),
+                    date=(now - timedelta(days=random.randint(0, 365))).date(),
+                )
+                for task in tasks
+            ], batch_size=batch_size)
+            TaskHistory.objects.bulk_create([
+                TaskHistory(
+                    task_id=task.id,
+                    user_id=task.created_by_id,
+                    action='CREATED',
+                    description='Benchmark task created',
+                )
+                for task in tasks
+            ], batch_size=batch_size)
+            
+            created += size
+            self.stdout.write(f'Seeded {created}/{count} tasks')
+        
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('ANALYZE')
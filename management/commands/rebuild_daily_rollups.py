@@ -0,0 +1,40 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from analytics.rollups import rebuild_daily_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily user/project/department rollups for a date range (backfill or repair; they are maintained incrementally)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--start',
+            help='First day to rebuild (YYYY-MM-DD); defaults to --days before --end',
+        )
+        parser.add_argument(
+            '--end',
+            help='Last day to rebuild (YYYY-MM-DD); defaults to today',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=365,
+            help='Number of days to rebuild when --start is not given (default: 365)',
+        )
+
+    def handle(self, *args, **options):
+        end_date = parse_date(options['end']) if options['end'] else timezone.localdate()
+        start_date = (
+            parse_date(options['start']) if options['start']
+            else end_date - timedelta(days=options['days'])
+        )
+        if not start_date or not end_date or start_date > end_date:
+            raise CommandError('Give a valid --start/--end range (YYYY-MM-DD)')
+        
+        counts = rebuild_daily_rollups(start_date, end_date)
+        summary = ', '.join(f'{count} {dimension}' for dimension, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt daily rollups from {start_date} to {end_date}: {summary} rows'
+        ))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from tasks.models import Project
+from analytics.models import ProjectAnalytics
+
+
+class Command(BaseCommand):
+    help = 'Rebuild project analytics counters from scratch (repair only; they are maintained incrementally)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--project',
+            type=int,
+            action='append',
+            help='Project ID to rebuild (repeatable); defaults to all projects',
+        )
+        parser.add_argument(
+            '--async',
+            action='store_true',
+            dest='run_async',
+            help='Enqueue the rebuild on Celery instead of running it here',
+        )
+
+    def handle(self, *args, **options):
+        if options['run_async']:
+            from employee_task_system.celery import update_project_analytics
+            update_project_analytics.delay()
+            self.stdout.write(self.style.SUCCESS('Project analytics rebuild enqueued'))
+            return
+        
+        projects = Project.objects.all()
+        if options['project']:
+            projects = projects.filter(id__in=options['project'])
+        
+        for project in projects:
+            analytics, created = ProjectAnalytics.objects.get_or_create(
+                project=project
+            )
+            analytics.update_metrics()
+        
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt analytics for {projects.count()} projects'))
@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from tasks.models import Project, Task
 from datetime import datetime, timedelta
 import random
@@ -152,13 +153,13 @@ class Command(BaseCommand):
                 priority=random.choice(priorities),
                 status=random.choice(statuses),
                 estimated_hours=random.uniform(1, 40),
-                due_date=datetime.now() + timedelta(days=random.randint(1, 30))
+                due_date=timezone.now() + timedelta(days=random.randint(1, 30))
             )
             
             # Set actual hours for completed tasks
             if task.status == 'COMPLETED':
                 task.actual_hours = random.uniform(0.5, task.estimated_hours * 1.5)
-                task.completed_at = datetime.now() - timedelta(days=random.randint(1, 10))
+                task.completed_at = timezone.now() - timedelta(days=random.randint(1, 10))
                 task.save()
             
             tasks.append(task)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Project, Task, TaskComment, TaskAttachment, TaskHistory, TimeLog
+from .models import Project, Task, TaskComment, TaskAttachment, TaskHistory, TimeLog, NotificationOutbox, Tombstone
 
 
 @admin.register(Project)
@@ -92,3 +92,19 @@ class TimeLogAdmin(admin.ModelAdmin):
     list_filter = ('date', 'created_at', 'task__project')
     search_fields = ('description', 'user__username', 'task__title')
     readonly_fields = ('created_at',)
+
+
+@admin.register(NotificationOutbox)
+class NotificationOutboxAdmin(admin.ModelAdmin):
+    list_display = ('recipient', 'task_title', 'created_at', 'dispatched_at', 'delivered_at', 'failed_at')
+    list_filter = ('created_at', 'dispatched_at', 'delivered_at', 'failed_at')
+    search_fields = ('task_title', 'recipient__username')
+    readonly_fields = ('created_at', 'dispatched_at', 'delivered_at', 'attempts', 'failed_at', 'last_error')
+
+
+@admin.register(Tombstone)
+class TombstoneAdmin(admin.ModelAdmin):
+    list_display = ('object_type', 'object_id', 'task_id', 'deleted_by', 'deleted_at')
+    list_filter = ('object_type', 'deleted_at')
+    search_fields = ('description',)
+    readonly_fields = ('deleted_at',)
@@ -0,0 +1,192 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import exceptions, serializers
+from analytics.models import ProjectAnalytics
+from analytics.rollups import apply_task_rollup_changes
+from .models import Project, Task, TaskHistory, NotificationOutbox, Tombstone
+from .signals import task_change_records, revocation_tombstones, invalidate_task_caches
+
+User = get_user_model()
+
+# Foreign keys accepted as plain IDs and checked for the whole batch at once
+REFERENCE_FIELDS = {
+    'project': Project,
+    'assigned_to': User,
+}
+
+
+class BulkTaskCreateSerializer(serializers.ModelSerializer):
+    """One task of a bulk create"""
+    project = serializers.IntegerField(required=False, allow_null=True)
+    assigned_to = serializers.IntegerField(required=False, allow_null=True)
+
+    class Meta:
+        model = Task
+        fields = [
+            'title', 'description', 'project', 'assigned_to',
+            'priority', 'estimated_hours', 'due_date'
+        ]
+
+
+class BulkTaskUpdateSerializer(serializers.ModelSerializer):
+    """One task change of a bulk update; only the given fields are written"""
+    id = serializers.IntegerField()
+    project = serializers.IntegerField(required=False, allow_null=True)
+    assigned_to = serializers.IntegerField(required=False, allow_null=True)
+
+    class Meta:
+        model = Task
+        fields = [
+            'id', 'title', 'description', 'project', 'assigned_to',
+            'priority', 'status', 'estimated_hours', 'actual_hours', 'due_date'
+        ]
+        extra_kwargs = {
+            field: {'required': False}
+            for field in ['title', 'description', 'priority', 'status',
+                          'estimated_hours', 'actual_hours', 'due_date']
+        }
+
+
+class BulkTaskStatusSerializer(serializers.ModelSerializer):
+    """One status transition of a bulk status update"""
+    id = serializers.IntegerField()
+
+    class Meta:
+        model = Task
+        fields = ['id', 'status']
+        extra_kwargs = {'status': {'required': True}}
+
+
+def _validate_items(serializer_class, data):
+    """Validate a batch with one serializer pass and one query per reference type"""
+    if isinstance(data, list) and len(data) > settings.BULK_TASK_LIMIT:
+        raise serializers.ValidationError(
+            {'non_field_errors': [f'At most {settings.BULK_TASK_LIMIT} tasks per request.']}
+        )
+    serializer = serializer_class(data=data, many=True)
+    serializer.is_valid(raise_exception=True)
+    items = serializer.validated_data
+
+    existing = {}
+    for field, model in REFERENCE_FIELDS.items():
+        ids = {item[field] for item in items if item.get(field)}
+        existing[field] = set(model.objects.filter(id__in=ids).values_list('id', flat=True))
+
+    errors = [
+        {
+            field: [f'Invalid pk "{item[field]}" - object does not exist.']
+            for field in REFERENCE_FIELDS
+            if item.get(field) and item[field] not in existing[field]
+        }
+        for item in items
+    ]
+    if any(errors):
+        raise serializers.ValidationError(errors)
+    return items
+
+
+def _task_fields(item):
+    """Validated item -> Task attribute values, with references as *_id"""
+    return {
+        f'{field}_id' if field in REFERENCE_FIELDS else field: value
+        for field, value in item.items()
+        if field != 'id'
+    }
+
+
+def _record_changes(changes, updated_by=None):
+    """
+    Everything the task signals do per save, once for the whole batch:
+    history rows, outbox notifications, revocation tombstones, project
+    analytics, daily rollups and cache invalidation
+    """
+    history = []
+    notifications = []
+    for old_task, task in changes:
+        task_history, task_notifications = task_change_records(task, old_task, updated_by)
+        history.extend(task_history)
+        notifications.extend(task_notifications)
+
+    TaskHistory.objects.bulk_create(history, batch_size=settings.BULK_TASK_LIMIT)
+    NotificationOutbox.objects.bulk_create(notifications, batch_size=settings.BULK_TASK_LIMIT)
+    Tombstone.objects.bulk_create(
+        revocation_tombstones(changes, updated_by), batch_size=settings.BULK_TASK_LIMIT
+    )
+    ProjectAnalytics.apply_task_changes(changes)
+    apply_task_rollup_changes(changes)
+    invalidate_task_caches([task for pair in changes for task in pair])
+
+
+def create_tasks(user, data):
+    """
+    Validate and create a batch of tasks created by `user` in one
+    transaction; returns the created tasks
+    """
+    items = _validate_items(BulkTaskCreateSerializer, data)
+
+    tasks = []
+    for item in items:
+        task = Task(created_by=user, **_task_fields(item))
+        task.sync_completed_at()
+        tasks.append(task)
+
+    with transaction.atomic():
+        tasks = Task.objects.bulk_create(tasks, batch_size=settings.BULK_TASK_LIMIT)
+        _record_changes([(None, task) for task in tasks])
+    return tasks
+
+
+def _permission_error(user, task, item):
+    if user.role in ['MANAGER', 'ADMIN']:
+        return {}
+    if task.assigned_to_id != user.id and task.created_by_id != user.id:
+        return {'id': ["You don't have permission to update this task."]}
+    if 'assigned_to' in item and task.created_by_id != user.id:
+        return {'assigned_to': ["You don't have permission to assign this task."]}
+    return {}
+
+
+def update_tasks(user, data, serializer_class=BulkTaskUpdateSerializer):
+    """
+    Validate and apply a batch of partial task updates by `user` in one
+    transaction with a single bulk_update; returns the updated tasks
+    """
+    items = _validate_items(serializer_class, data)
+    ids = [item['id'] for item in items]
+    if len(set(ids)) != len(ids):
+        raise serializers.ValidationError(
+            {'non_field_errors': ['Each task may appear only once per request.']}
+        )
+
+    with transaction.atomic():
+        tasks = Task.objects.select_for_update().in_bulk(ids)
+        errors = [{} if item['id'] in tasks else {'id': ['Task not found.']} for item in items]
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        # Like the single-task endpoints, a permission failure is a 403
+        errors = [_permission_error(user, tasks[item['id']], item) for item in items]
+        if any(errors):
+            raise exceptions.PermissionDenied(errors)
+
+        now = timezone.now()
+        fields = {'completed_at', 'updated_at'}
+        changes = []
+        for item in items:
+            task = tasks[item['id']]
+            old_task = Task(pk=task.pk, **task.get_loaded_values())
+            for attname, value in _task_fields(item).items():
+                setattr(task, attname, value)
+                fields.add(attname.removesuffix('_id'))
+            task.sync_completed_at()
+            # bulk_update skips auto_now; the change feed keys on updated_at
+            task.updated_at = now
+            changes.append((old_task, task))
+
+        Task.objects.bulk_update(
+            [task for _, task in changes], sorted(fields),
+            batch_size=settings.BULK_TASK_LIMIT
+        )
+        _record_changes(changes, updated_by=user)
+    return [task for _, task in changes]
@@ -73,41 +73,3 @@ def generate_daily_productivity_report():
         
     except Exception as e:
         return f"Error generating report: {str(e)}"
-
-
-@shared_task
-def update_project_analytics(project_id):
-    """
-    Update project analytics when tasks are modified
-    """
-    try:
-        from analytics.models import ProjectAnalytics
-        from .models import Task, Project
-        
-        project = Project.objects.get(id=project_id)
-        
-        # Calculate project metrics
-        tasks = Task.objects.filter(project=project)
-        total_tasks = tasks.count()
-        completed_tasks = tasks.filter(status='completed').count()
-        
-        # Update or create project analytics
-        analytics, created = ProjectAnalytics.objects.get_or_create(
-            project=project,
-            defaults={
-                'total_tasks': total_tasks,
-                'completed_tasks': completed_tasks,
-                'completion_rate': (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0,
-            }
-        )
-        
-        if not created:
-            analytics.total_tasks = total_tasks
-            analytics.completed_tasks = completed_tasks
-            analytics.completion_rate = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
-            analytics.save()
-        
-        return f"Updated analytics for project {project.name}"
-        
-    except Exception as e:
-        return f"Error updating project analytics: {str(e)}"
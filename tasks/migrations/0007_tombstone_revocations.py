@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-16 23:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_outbox_failures'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tombstone',
+            name='revoked_from_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
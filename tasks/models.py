@@ -1,10 +1,60 @@
 from django.db import models
+from django.db.models import F, Q
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, MaxValueValidator
 
 User = get_user_model()
 
 
+class LoadedValuesMixin:
+    """
+    Remembers the TRACKED_FIELDS values a model instance was loaded with, so
+    change detection in the signal handlers does not need to re-read the row
+    """
+    TRACKED_FIELDS = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: value for name, value in zip(field_names, values)
+            if name in cls.TRACKED_FIELDS
+        }
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        if kwargs.get('fields') is None and not args:
+            self._loaded_values = {
+                name: getattr(self, name) for name in self.TRACKED_FIELDS
+            }
+
+    def get_loaded_values(self):
+        """
+        Tracked field values as last loaded from or saved to the database,
+        or None when the instance was not built from a full DB row
+        """
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None or len(loaded) != len(self.TRACKED_FIELDS):
+            return None
+        return loaded
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        
+        # The saved values become the new baseline for change detection; a
+        # partial save only refreshes the fields it wrote
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            self._loaded_values = {
+                name: getattr(self, name) for name in self.TRACKED_FIELDS
+            }
+        elif getattr(self, '_loaded_values', None) is not None:
+            for name in self.TRACKED_FIELDS:
+                if name in update_fields or name.removesuffix('_id') in update_fields:
+                    self._loaded_values[name] = getattr(self, name)
+
+
 class Project(models.Model):
     """
     Project model to group related tasks
@@ -27,7 +77,7 @@ class Project(models.Model):
         return self.name
 
 
-class Task(models.Model):
+class Task(LoadedValuesMixin, models.Model):
     """
     Main task model with comprehensive fields
     """
@@ -45,6 +95,7 @@ class Task(models.Model):
         ('COMPLETED', 'Completed'),
         ('CANCELLED', 'Cancelled'),
     )
+    STATUSES = frozenset(value for value, _ in STATUS_CHOICES)
 
     title = models.CharField(max_length=200)
     description = models.TextField()
@@ -94,15 +145,41 @@ class Task(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['assigned_to', 'status'], name='task_assignee_status_idx'),
+            models.Index(fields=['status', 'due_date'], name='task_status_due_idx'),
+            models.Index(fields=['project', 'status'], name='task_project_status_idx'),
+            models.Index(fields=['status', 'completed_at'], name='task_status_completed_idx'),
+            models.Index(fields=['-created_at', '-id'], name='task_created_id_idx'),
+            # Change feed keyset
+            models.Index(fields=['updated_at', 'id'], name='task_updated_id_idx'),
+            # Overdue scans only ever look at open tasks
+            models.Index(
+                fields=['due_date'],
+                name='task_open_due_idx',
+                condition=Q(status__in=['TODO', 'IN_PROGRESS'])
+            ),
+        ]
+
+    TRACKED_FIELDS = (
+        'status', 'assigned_to_id', 'project_id', 'estimated_hours',
+        'actual_hours', 'created_at', 'completed_at',
+    )
+
     def __str__(self):
         return self.title
 
-    def save(self, *args, **kwargs):
+    def sync_completed_at(self):
+        """Stamp completed_at on completion and clear it otherwise"""
         if self.status == 'COMPLETED' and not self.completed_at:
             from django.utils import timezone
             self.completed_at = timezone.now()
         elif self.status != 'COMPLETED':
             self.completed_at = None
+
+    def save(self, *args, **kwargs):
+        self.sync_completed_at()
         super().save(*args, **kwargs)
 
 
@@ -124,6 +201,11 @@ class TaskComment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated_at', 'id'], name='comment_updated_id_idx'),
+        ]
+
     def __str__(self):
         return f"Comment by {self.author.username} on {self.task.title}"
 
@@ -181,11 +263,17 @@ class TaskHistory(models.Model):
     description = models.TextField()
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['task', 'timestamp'], name='taskhistory_task_ts_idx'),
+            models.Index(fields=['timestamp', 'id'], name='taskhistory_ts_id_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.username} {self.action} {self.task.title}"
 
 
-class TimeLog(models.Model):
+class TimeLog(LoadedValuesMixin, models.Model):
     """
     Track time spent on tasks
     """
@@ -207,6 +295,158 @@ class TimeLog(models.Model):
     description = models.TextField(blank=True, null=True)
     date = models.DateField()
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'date'], name='timelog_user_date_idx'),
+            models.Index(fields=['task', 'date'], name='timelog_task_date_idx'),
+            models.Index(fields=['updated_at', 'id'], name='timelog_updated_id_idx'),
+        ]
+
+    TRACKED_FIELDS = ('user_id', 'task_id', 'date', 'hours')
 
     def __str__(self):
         return f"{self.user.username} - {self.hours}h on {self.task.title}"
+
+
+class NotificationOutbox(models.Model):
+    """
+    Task notifications written in the same transaction as the change that
+    caused them; a background relay publishes them to Celery in batches
+    """
+    recipient = models.ForeignKey(
+        User, 
+        on_delete=models.CASCADE, 
+        related_name='notification_outbox'
+    )
+    task_title = models.CharField(max_length=200)
+    message = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    dispatched_at = models.DateTimeField(null=True, blank=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+    # Sends that ran out of retries; at NOTIFICATION_MAX_ATTEMPTS the row is
+    # dead-lettered (failed_at) instead of released to the relay again
+    attempts = models.PositiveSmallIntegerField(default=0)
+    failed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(
+                fields=['id'],
+                name='outbox_pending_idx',
+                condition=Q(dispatched_at__isnull=True)
+            ),
+        ]
+
+    def __str__(self):
+        return f"Notification to {self.recipient_id}: {self.task_title}"
+
+    @classmethod
+    def enqueue(cls, recipient_id, task_title, message):
+        """Record a notification to be relayed once the transaction commits"""
+        return cls.objects.create(
+            recipient_id=recipient_id,
+            task_title=task_title,
+            message=message
+        )
+
+    @classmethod
+    def record_failure(cls, outbox_ids, error, max_attempts):
+        """
+        Count a failed send of the given undelivered rows: rows that reached
+        `max_attempts` are marked failed and stay dispatched, the rest are
+        released (dispatched_at cleared) for the relay to claim again
+        """
+        from django.utils import timezone
+
+        rows = cls.objects.filter(id__in=outbox_ids, delivered_at__isnull=True)
+        rows.update(attempts=F('attempts') + 1, last_error=str(error))
+        rows.filter(attempts__gte=max_attempts).update(failed_at=timezone.now())
+        rows.filter(attempts__lt=max_attempts).update(dispatched_at=None)
+
+
+class Tombstone(models.Model):
+    """
+    Record of a deleted task, comment or time log, so sync clients can
+    drop their copy. Holds plain IDs rather than foreign keys since the
+    objects it refers to are gone.
+    """
+    OBJECT_TYPES = (
+        ('task', 'Task'),
+        ('comment', 'Comment'),
+        ('time_log', 'Time log'),
+    )
+
+    object_type = models.CharField(max_length=20, choices=OBJECT_TYPES)
+    object_id = models.BigIntegerField()
+    task_id = models.BigIntegerField()
+    # Who could see the object, for scoping the change feed
+    task_assigned_to_id = models.BigIntegerField(null=True, blank=True)
+    task_created_by_id = models.BigIntegerField(null=True, blank=True)
+    owner_id = models.BigIntegerField(null=True, blank=True)
+    # Set when the task was not deleted but reassigned away from this user,
+    # who can no longer see it; only they are sent the tombstone
+    revoked_from_id = models.BigIntegerField(null=True, blank=True)
+    deleted_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    description = models.TextField(blank=True)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['deleted_at', 'id']
+        indexes = [
+            models.Index(fields=['deleted_at', 'id'], name='tombstone_deleted_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"Deleted {self.object_type} {self.object_id}"
+
+    @classmethod
+    def build(cls, object_type, object_id, task_id, task_values, owner_id=None,
+              deleted_by=None, description=''):
+        """
+        An unsaved tombstone for a deletion, scoped by `task_values`, the
+        task's assigned_to_id and created_by_id
+        """
+        return cls(
+            object_type=object_type,
+            object_id=object_id,
+            task_id=task_id,
+            task_assigned_to_id=task_values.get('assigned_to_id'),
+            task_created_by_id=task_values.get('created_by_id'),
+            owner_id=owner_id,
+            deleted_by=deleted_by,
+            description=description
+        )
+
+    @classmethod
+    def record(cls, object_type, object_id, task_id, owner_id=None, deleted_by=None,
+               description='', task=None):
+        """
+        Record a deletion. Without `task`, the task's assignee and creator
+        are looked up; its row still exists while children are being
+        cascade-deleted.
+        """
+        if task is not None:
+            task_values = {
+                'assigned_to_id': task.assigned_to_id,
+                'created_by_id': task.created_by_id,
+            }
+        else:
+            task_values = Task.objects.filter(pk=task_id).values(
+                'assigned_to_id', 'created_by_id'
+            ).first() or {}
+        tombstone = cls.build(
+            object_type, object_id, task_id, task_values,
+            owner_id=owner_id, deleted_by=deleted_by, description=description
+        )
+        tombstone.save()
+        return tombstone
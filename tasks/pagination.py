@@ -0,0 +1,48 @@
+from rest_framework.pagination import CursorPagination
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Cursor pagination, newest first: no COUNT(*), and pages stay stable
+    while new rows are being inserted.
+
+    DRF positions the cursor on the first ordering field (created_at) and
+    skips rows sharing that value with a small offset, so only rows with
+    an identical created_at are ever scanned past; id just makes the
+    order of those ties deterministic.
+
+    The ordering is fixed: ?ordering= (OrderingFilter) is ignored, since
+    the cursor can only follow the field it positions on.
+    """
+    ordering = ('-created_at', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def get_ordering(self, request, queryset, view):
+        return self.ordering
+
+
+class TimestampCursorPagination(CreatedAtCursorPagination):
+    ordering = ('-timestamp', '-id')
+
+
+class OptInCursorPaginationMixin:
+    """
+    Switch a list view to `cursor_pagination_class` when the client asks
+    for it with ?pagination=cursor (or follows a `cursor` link); page
+    number pagination stays the default
+    """
+    cursor_pagination_class = CreatedAtCursorPagination
+
+    def use_cursor_pagination(self):
+        params = self.request.query_params
+        return params.get('pagination') == 'cursor' or 'cursor' in params
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if self.use_cursor_pagination():
+                self._paginator = self.cursor_pagination_class()
+            else:
+                self._paginator = super().paginator
+        return self._paginator
@@ -1,7 +1,10 @@
 from rest_framework import serializers
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
 from .models import Project, Task, TaskComment, TaskAttachment, TaskHistory, TimeLog
 from django.contrib.auth import get_user_model
+from utils.two_tier_cache import cached_project_name, cached_user_attributes
 
 User = get_user_model()
 
@@ -32,9 +35,9 @@ class ProjectSerializer(serializers.ModelSerializer):
 
 
 class TaskSerializer(serializers.ModelSerializer):
-    assigned_to_name = serializers.CharField(source='assigned_to.full_name', read_only=True)
-    created_by_name = serializers.CharField(source='created_by.full_name', read_only=True)
-    project_name = serializers.CharField(source='project.name', read_only=True)
+    assigned_to_name = serializers.SerializerMethodField()
+    created_by_name = serializers.SerializerMethodField()
+    project_name = serializers.SerializerMethodField()
     comments_count = serializers.SerializerMethodField()
     attachments_count = serializers.SerializerMethodField()
     time_logs_total = serializers.SerializerMethodField()
@@ -50,13 +53,66 @@ class TaskSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['created_by', 'completed_at', 'created_at', 'updated_at']
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """
+        Join the name FKs and compute the per-task counters as correlated
+        subqueries, so a page of tasks costs a constant number of queries.
+        """
+        def per_task(model, aggregate):
+            return Subquery(
+                model.objects.filter(task=OuterRef('pk'))
+                .order_by()
+                .values('task')
+                .annotate(value=aggregate)
+                .values('value')[:1]
+            )
+
+        return queryset.select_related(
+            'assigned_to', 'created_by', 'project'
+        ).annotate(
+            comments_count=Coalesce(per_task(TaskComment, Count('id')), 0),
+            attachments_count=Coalesce(per_task(TaskAttachment, Count('id')), 0),
+            time_logs_total=Coalesce(
+                per_task(TimeLog, Sum('hours')),
+                0,
+                output_field=models.DecimalField(max_digits=8, decimal_places=2)
+            ),
+        )
+
+    @staticmethod
+    def _user_name(obj, field):
+        # Joined users (setup_eager_loading) are free; otherwise use the hot cache
+        if field.is_cached(obj):
+            user = getattr(obj, field.field.name)
+            return user.full_name if user else None
+        attributes = cached_user_attributes(getattr(obj, field.field.attname))
+        return attributes['full_name'] if attributes else None
+
+    def get_assigned_to_name(self, obj):
+        return self._user_name(obj, Task.assigned_to)
+
+    def get_created_by_name(self, obj):
+        return self._user_name(obj, Task.created_by)
+
+    def get_project_name(self, obj):
+        if Task.project.is_cached(obj):
+            return obj.project.name if obj.project else None
+        return cached_project_name(obj.project_id)
+
     def get_comments_count(self, obj):
+        if hasattr(obj, 'comments_count'):
+            return obj.comments_count
         return obj.comments.count()
 
     def get_attachments_count(self, obj):
+        if hasattr(obj, 'attachments_count'):
+            return obj.attachments_count
         return obj.attachments.count()
 
     def get_time_logs_total(self, obj):
+        if hasattr(obj, 'time_logs_total'):
+            return obj.time_logs_total
         return obj.time_logs.aggregate(
             total=models.Sum('hours')
         )['total'] or 0
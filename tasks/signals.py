@@ -1,120 +1,358 @@
-from django.db.models.signals import post_save, post_delete, pre_save
+from itertools import chain
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
-from .models import Task, TaskHistory, TimeLog
+from .models import (
+    Project, Task, TaskComment, TaskAttachment, TaskHistory, TimeLog,
+    NotificationOutbox, Tombstone
+)
 from analytics.models import EmployeeProductivity, ProjectAnalytics, DelayAnalysis
-from .celery import send_task_notification_email
+from analytics.rollups import apply_task_rollups, apply_time_log_rollups
+from utils.cache_utils import (
+    invalidate_task_lists, invalidate_task_lists_for, invalidate_project_cache,
+    invalidate_analytics_cache
+)
+from utils.two_tier_cache import cached_user_attributes, invalidate_project_names
 
 
 @receiver(pre_save, sender=Task)
 def task_pre_save(sender, instance, **kwargs):
     """Track task changes before saving"""
     if instance.pk:
-        try:
-            old_instance = Task.objects.get(pk=instance.pk)
-            instance._old_status = old_instance.status
-            instance._old_assigned_to = old_instance.assigned_to
-        except Task.DoesNotExist:
-            pass
+        old_values = instance.get_loaded_values()
+        if old_values is None:
+            # Only instances not loaded from a full DB row need a fetch
+            old_values = Task.objects.filter(pk=instance.pk).values(
+                *Task.TRACKED_FIELDS
+            ).first()
+        if old_values is not None:
+            instance._old_instance = Task(pk=instance.pk, **old_values)
 
 
-@receiver(post_save, sender=Task)
-def task_post_save(sender, instance, created, **kwargs):
-    """Handle task creation and updates"""
-    if created:
+def task_change_records(instance, old_instance=None, updated_by=None):
+    """
+    The TaskHistory rows and outbox notifications for a task that was
+    created (old_instance None) or changed from old_instance. They are
+    returned unsaved so bulk writers can insert them in batches.
+    """
+    history = []
+    notifications = []
+    
+    if old_instance is None:
         # Create history for new task
-        TaskHistory.objects.create(
+        history.append(TaskHistory(
             task=instance,
-            user=instance.created_by,
+            user_id=instance.created_by_id,
             action='CREATED',
             description=f"Task '{instance.title}' was created"
-        )
+        ))
         
         # Send notification to assigned user
-        if instance.assigned_to and instance.assigned_to != instance.created_by:
-            send_task_notification_email.delay(
-                instance.assigned_to.id,
-                instance.title,
-                f"You have been assigned a new task: {instance.title}\n\nDescription: {instance.description}\n\nPriority: {instance.priority}"
-            )
-    else:
-        # Check for status change
-        old_status = getattr(instance, '_old_status', None)
-        if old_status and old_status != instance.status:
-            TaskHistory.objects.create(
-                task=instance,
-                user=getattr(instance, '_updated_by', instance.assigned_to or instance.created_by),
-                action='STATUS_CHANGED',
-                old_value=old_status,
-                new_value=instance.status,
-                description=f"Task status changed from {old_status} to {instance.status}"
-            )
-            
-            # Send notification for status change
-            if instance.assigned_to:
-                send_task_notification_email.delay(
-                    instance.assigned_to.id,
-                    instance.title,
-                    f"Task '{instance.title}' status updated to {instance.status}"
-                )
+        if instance.assigned_to_id and instance.assigned_to_id != instance.created_by_id:
+            notifications.append(NotificationOutbox(
+                recipient_id=instance.assigned_to_id,
+                task_title=instance.title,
+                message=f"You have been assigned a new task: {instance.title}\n\nDescription: {instance.description}\n\nPriority: {instance.priority}"
+            ))
+        return history, notifications
+    
+    # Check for status change
+    old_status = old_instance.status
+    if old_status and old_status != instance.status:
+        history.append(TaskHistory(
+            task=instance,
+            user_id=updated_by.pk if updated_by else (instance.assigned_to_id or instance.created_by_id),
+            action='STATUS_CHANGED',
+            old_value=old_status,
+            new_value=instance.status,
+            description=f"Task status changed from {old_status} to {instance.status}"
+        ))
         
-        # Check for assignment change
-        old_assigned_to = getattr(instance, '_old_assigned_to', None)
-        if old_assigned_to != instance.assigned_to:
-            TaskHistory.objects.create(
-                task=instance,
-                user=getattr(instance, '_updated_by', instance.created_by),
-                action='ASSIGNED',
-                new_value=f"Assigned to {instance.assigned_to.full_name if instance.assigned_to else 'Unassigned'}",
-                description=f"Task reassigned from {old_assigned_to.full_name if old_assigned_to else 'Unassigned'} to {instance.assigned_to.full_name if instance.assigned_to else 'Unassigned'}"
-            )
-            
-            # Send notification to new assignee
-            if instance.assigned_to and instance.assigned_to != old_assigned_to:
-                send_task_notification_email.delay(
-                    instance.assigned_to.id,
-                    instance.title,
-                    f"You have been assigned to task: {instance.title}\n\nDescription: {instance.description}"
-                )
+        # Send notification for status change
+        if instance.assigned_to_id:
+            notifications.append(NotificationOutbox(
+                recipient_id=instance.assigned_to_id,
+                task_title=instance.title,
+                message=f"Task '{instance.title}' status updated to {instance.status}"
+            ))
     
-    # Update project analytics if task has project
-    if instance.project:
-        update_project_analytics.delay(instance.project.id)
+    # Check for assignment change; names come from the hot user cache
+    if old_instance.assigned_to_id != instance.assigned_to_id:
+        old_assignee = cached_user_attributes(old_instance.assigned_to_id)
+        new_assignee = cached_user_attributes(instance.assigned_to_id)
+        old_name = old_assignee['full_name'] if old_assignee else 'Unassigned'
+        new_name = new_assignee['full_name'] if new_assignee else 'Unassigned'
+        history.append(TaskHistory(
+            task=instance,
+            user_id=updated_by.pk if updated_by else instance.created_by_id,
+            action='ASSIGNED',
+            new_value=f"Assigned to {new_name}",
+            description=f"Task reassigned from {old_name} to {new_name}"
+        ))
+        
+        # Send notification to new assignee
+        if instance.assigned_to_id:
+            notifications.append(NotificationOutbox(
+                recipient_id=instance.assigned_to_id,
+                task_title=instance.title,
+                message=f"You have been assigned to task: {instance.title}\n\nDescription: {instance.description}"
+            ))
+    
+    return history, notifications
+
+
+def revocation_tombstones(changes, updated_by=None):
+    """
+    Unsaved tombstones for the previous assignees of reassigned tasks who
+    can no longer see them (neither their creator nor a manager), so their
+    sync clients drop the task
+    """
+    tombstones = []
+    for old_task, task in changes:
+        old_assignee_id = old_task.assigned_to_id if old_task is not None else None
+        if not old_assignee_id or old_assignee_id in (task.assigned_to_id, task.created_by_id):
+            continue
+        attributes = cached_user_attributes(old_assignee_id)
+        if attributes is None or attributes['role'] in ['MANAGER', 'ADMIN']:
+            continue
+        tombstones.append(Tombstone(
+            object_type='task',
+            object_id=task.pk,
+            task_id=task.pk,
+            revoked_from_id=old_assignee_id,
+            deleted_by=updated_by,
+            description=f"Task '{task.title}' was reassigned"
+        ))
+    return tombstones
+
+
+@receiver(post_save, sender=Task)
+def task_post_save(sender, instance, created, **kwargs):
+    """Handle task creation and updates"""
+    old_instance = None if created else getattr(instance, '_old_instance', None)
+    if created or old_instance is not None:
+        updated_by = getattr(instance, '_updated_by', None)
+        history, notifications = task_change_records(instance, old_instance, updated_by)
+        TaskHistory.objects.bulk_create(history)
+        NotificationOutbox.objects.bulk_create(notifications)
+        Tombstone.objects.bulk_create(revocation_tombstones([(old_instance, instance)], updated_by))
+    
+    # Move the task's contribution between project analytics counters and
+    # daily rollups
+    ProjectAnalytics.apply_task_change(old_instance, instance)
+    if created or old_instance is not None:
+        apply_task_rollups(old_instance, instance)
+
+
+@receiver(pre_save, sender=TimeLog)
+def timelog_pre_save(sender, instance, **kwargs):
+    """
+    Remember an edited time log's previous state for the productivity
+    metrics and daily rollups
+    """
+    if instance.pk:
+        old_values = instance.get_loaded_values()
+        if old_values is None:
+            old_values = TimeLog.objects.filter(pk=instance.pk).values(
+                *TimeLog.TRACKED_FIELDS
+            ).first()
+        if old_values is not None:
+            instance._old_instance = TimeLog(pk=instance.pk, **old_values)
+
+
+def apply_time_logged_change(old_log, new_log):
+    """
+    Move a time log's hours between the logging users' productivity rows
+    for its previous and new state; either side may be None
+    """
+    # Only the logging user's row for that day is affected
+    for log, sign in ((old_log, -1), (new_log, 1)):
+        if log is not None and log.user_id:
+            EmployeeProductivity.apply_time_logged(log.user_id, log.date, sign * log.hours)
 
 
 @receiver(post_save, sender=TimeLog)
 def timelog_post_save(sender, instance, created, **kwargs):
-    """Update productivity metrics when time is logged"""
-    if created and instance.user:
-        # Trigger daily productivity update
-        from .celery import generate_daily_productivity_report
-        generate_daily_productivity_report.delay()
+    """Update productivity metrics and rollups when time is logged or edited"""
+    old_instance = None if created else getattr(instance, '_old_instance', None)
+    if created or old_instance is not None:
+        # Edits that leave who, when and how long alone cost no queries
+        if old_instance is None or any(
+            getattr(old_instance, field) != getattr(instance, field)
+            for field in ('user_id', 'date', 'hours')
+        ):
+            apply_time_logged_change(old_instance, instance)
+        apply_time_log_rollups(old_instance, instance)
+
+
+def _deleted_task(instance, origin):
+    """
+    The task of a comment or time log being deleted, as recorded by
+    task_pre_delete, when that task is deleted by the same delete() call
+    (the cascade); None for a child deleted on its own
+    """
+    state = getattr(origin, '_task_deletion', None)
+    return state['tasks'].get(instance.task_id) if state else None
+
+
+def _child_tombstone(object_type, instance, owner_id, origin):
+    task_values = _deleted_task(instance, origin)
+    if task_values is None:
+        Tombstone.record(
+            object_type, instance.pk, instance.task_id,
+            owner_id=owner_id,
+            deleted_by=getattr(instance, '_deleted_by', None)
+        )
+    else:
+        # Written in one batch with the task's own tombstone
+        origin._task_deletion['tombstones'].append(Tombstone.build(
+            object_type, instance.pk, instance.task_id, task_values,
+            owner_id=owner_id,
+            deleted_by=getattr(instance, '_deleted_by', None)
+        ))
+
+
+@receiver(pre_delete, sender=Task)
+def task_pre_delete(sender, instance, origin=None, **kwargs):
+    """
+    Remember each task a delete() call removes on the object the call
+    started from, so the handlers of its cascaded comments and time logs
+    need not look the task up again
+    """
+    if origin is None:
+        return
+    state = getattr(origin, '_task_deletion', None)
+    if state is None:
+        state = {'tasks': {}, 'tombstones': []}
+        origin._task_deletion = state
+    state['tasks'][instance.pk] = {
+        'assigned_to_id': instance.assigned_to_id,
+        'created_by_id': instance.created_by_id,
+        'project_id': instance.project_id,
+    }
+
+
+@receiver(post_delete, sender=TimeLog)
+def timelog_post_delete(sender, instance, origin=None, **kwargs):
+    apply_time_logged_change(instance, None)
+    task_values = _deleted_task(instance, origin)
+    apply_time_log_rollups(
+        instance, None,
+        task_project_ids={instance.task_id: task_values['project_id']} if task_values else None
+    )
+    _child_tombstone('time_log', instance, instance.user_id, origin)
 
 
 @receiver(post_delete, sender=Task)
-def task_post_delete(sender, instance, **kwargs):
+def task_post_delete(sender, instance, origin=None, **kwargs):
     """Handle task deletion"""
-    TaskHistory.objects.create(
-        task=instance,
-        user=getattr(instance, '_deleted_by', None),
-        action='UPDATED',
+    ProjectAnalytics.apply_task_change(instance, None)
+    apply_task_rollups(instance, None)
+    
+    # History rows cascade with the task, so the deletion is kept as a
+    # tombstone, written together with those of its comments and time logs
+    state = getattr(origin, '_task_deletion', None)
+    tombstones = state['tombstones'] if state else []
+    tombstones.append(Tombstone.build(
+        'task', instance.pk, instance.pk,
+        {'assigned_to_id': instance.assigned_to_id, 'created_by_id': instance.created_by_id},
+        owner_id=instance.created_by_id,
+        deleted_by=getattr(instance, '_deleted_by', None),
         description=f"Task '{instance.title}' was deleted"
-    )
+    ))
+    Tombstone.objects.bulk_create(tombstones)
+    if state:
+        state['tombstones'] = []
+
+
+@receiver(post_delete, sender=TaskComment)
+def comment_post_delete(sender, instance, origin=None, **kwargs):
+    _child_tombstone('comment', instance, instance.author_id, origin)
 
 
 @receiver(post_save, sender=DelayAnalysis)
 def delay_analysis_post_save(sender, instance, created, **kwargs):
     """Handle delay analysis completion"""
-    if created and instance.delay_hours > 0:
+    if created and instance.is_significant:
         # Send notification about significant delays
-        if instance.delay_percentage > 50:  # More than 50% delay
-            if instance.task.assigned_to:
-                send_task_notification_email.delay(
-                    instance.task.assigned_to.id,
-                    instance.task.title,
-                    f"Task '{instance.task.title}' has a significant delay of {instance.delay_hours:.1f} hours ({instance.delay_percentage:.1f}%). Please review and update the timeline."
-                )
+        if instance.task.assigned_to_id:
+            NotificationOutbox.enqueue(
+                instance.task.assigned_to_id,
+                instance.task.title,
+                instance.notification_message(instance.task.title)
+            )
 
 
-# Import Celery tasks to avoid circular imports
-from .celery import update_project_analytics
+def invalidate_task_caches(tasks=(), project_ids=()):
+    """
+    Once the surrounding transaction commits (so readers cannot re-cache
+    the pre-commit state), drop the cached task lists that can show any of
+    `tasks` and the cached data of their projects and of `project_ids`.
+    Tasks may be None.
+    """
+    tasks = [task for task in tasks if task is not None]
+    user_ids = {
+        user_id
+        for task in tasks
+        for user_id in (task.assigned_to_id, task.created_by_id)
+        if user_id
+    }
+    project_ids = {
+        project_id
+        for project_id in chain(project_ids, (task.project_id for task in tasks))
+        if project_id
+    }
+    
+    def invalidate():
+        invalidate_task_lists_for(user_ids, project_ids)
+        for project_id in project_ids:
+            invalidate_project_cache(project_id)
+    
+    transaction.on_commit(invalidate)
+
+
+def _task_for_invalidation(task_id):
+    """The fields of a task that decide which caches show it, or None"""
+    return Task.objects.filter(pk=task_id).only(
+        'assigned_to_id', 'created_by_id', 'project_id'
+    ).first()
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def task_cache_invalidation(sender, instance, **kwargs):
+    invalidate_task_caches([instance, getattr(instance, '_old_instance', None)])
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def project_cache_invalidation(sender, instance, **kwargs):
+    # Task lists and analytics show project names
+    def invalidate():
+        invalidate_task_lists()
+        invalidate_project_cache(instance.pk)
+        invalidate_project_names()
+        invalidate_analytics_cache()
+    
+    transaction.on_commit(invalidate)
+
+
+@receiver(post_save, sender=TaskComment)
+@receiver(post_delete, sender=TaskComment)
+@receiver(post_save, sender=TaskAttachment)
+@receiver(post_delete, sender=TaskAttachment)
+@receiver(post_save, sender=TimeLog)
+@receiver(post_delete, sender=TimeLog)
+def task_counter_cache_invalidation(sender, instance, origin=None, **kwargs):
+    # Only the counters of the task's rows in task lists change. Analytics
+    # are left to expire (CACHE_TIMEOUTS['analytics']) rather than being
+    # invalidated by every write.
+    if _deleted_task(instance, origin) is not None:
+        # The task's own deletion invalidates its rows
+        return
+    if sender.task.is_cached(instance):
+        task = instance.task
+    else:
+        task = _task_for_invalidation(instance.task_id)
+    invalidate_task_caches([task])
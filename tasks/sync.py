@@ -0,0 +1,144 @@
+from collections import namedtuple
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.core import signing
+from django.db.models import Q
+from django.utils import timezone
+from .models import Task, TaskComment, TaskHistory, TimeLog, Tombstone
+from .serializers import (
+    TaskSerializer, TaskCommentSerializer, TaskHistorySerializer, TimeLogSerializer
+)
+
+SYNC_CURSOR_SALT = 'tasks.sync'
+
+# scope limits the feed for employees, manager_scope (optional) for managers
+SyncFeed = namedtuple(
+    'SyncFeed',
+    ['queryset', 'scope', 'timestamp_field', 'serialize', 'manager_scope'],
+    defaults=[None]
+)
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def _task_scope(user, prefix=''):
+    return Q(**{f'{prefix}assigned_to': user}) | Q(**{f'{prefix}created_by': user})
+
+
+def _tombstone_rows(tombstones):
+    return [
+        {
+            'type': tombstone.object_type,
+            'id': tombstone.object_id,
+            'task': tombstone.task_id,
+            'deleted_at': tombstone.deleted_at,
+            # The task still exists but was reassigned away from the user
+            'access_revoked': tombstone.revoked_from_id is not None,
+        }
+        for tombstone in tombstones
+    ]
+
+
+SYNC_FEEDS = {
+    'tasks': SyncFeed(
+        lambda: TaskSerializer.setup_eager_loading(Task.objects.all()),
+        lambda user: _task_scope(user),
+        'updated_at',
+        lambda items: TaskSerializer(items, many=True).data,
+    ),
+    'comments': SyncFeed(
+        lambda: TaskComment.objects.select_related('author'),
+        lambda user: _task_scope(user, 'task__'),
+        'updated_at',
+        lambda items: TaskCommentSerializer(items, many=True).data,
+    ),
+    'time_logs': SyncFeed(
+        lambda: TimeLog.objects.select_related('user', 'task'),
+        lambda user: Q(user=user) | _task_scope(user, 'task__'),
+        'updated_at',
+        lambda items: TimeLogSerializer(items, many=True).data,
+    ),
+    'history': SyncFeed(
+        lambda: TaskHistory.objects.select_related('user'),
+        lambda user: _task_scope(user, 'task__'),
+        'timestamp',
+        lambda items: TaskHistorySerializer(items, many=True).data,
+    ),
+    'deleted': SyncFeed(
+        lambda: Tombstone.objects.all(),
+        lambda user: (
+            Q(task_assigned_to_id=user.id) | Q(task_created_by_id=user.id) |
+            Q(owner_id=user.id) | Q(revoked_from_id=user.id)
+        ),
+        'deleted_at',
+        _tombstone_rows,
+        # Managers see every task, so no reassignment hides one from them
+        Q(revoked_from_id__isnull=True),
+    ),
+}
+
+
+def encode_cursor(positions):
+    """Opaque, tamper-evident cursor holding each feed's (timestamp, id) position"""
+    return signing.dumps(
+        {name: [timestamp.isoformat(), pk] for name, (timestamp, pk) in positions.items()},
+        salt=SYNC_CURSOR_SALT,
+        compress=True
+    )
+
+
+def decode_cursor(cursor):
+    try:
+        payload = signing.loads(cursor, salt=SYNC_CURSOR_SALT)
+        return {
+            name: (datetime.fromisoformat(timestamp), int(pk))
+            for name, (timestamp, pk) in payload.items()
+            if name in SYNC_FEEDS
+        }
+    except (signing.BadSignature, AttributeError, TypeError, ValueError) as exc:
+        raise InvalidCursor('Invalid sync cursor') from exc
+
+
+def collect_changes(user, cursor=None):
+    """
+    Tasks, comments, time logs, history entries and deletions visible to
+    `user` that changed after `cursor` (everything when None), at most
+    SYNC_PAGE_SIZE of each, plus the cursor to pass next time.
+
+    Each feed is read by keyset on (timestamp, id). Rows changed in the last
+    SYNC_SETTLE_SECONDS are left for the next poll so that a transaction
+    committing with a slightly older timestamp is not skipped.
+    """
+    positions = decode_cursor(cursor) if cursor else {}
+    horizon = timezone.now() - timedelta(seconds=settings.SYNC_SETTLE_SECONDS)
+    page_size = settings.SYNC_PAGE_SIZE
+    is_manager = user.role in ['MANAGER', 'ADMIN']
+
+    changes = {}
+    has_more = False
+    for name, feed in SYNC_FEEDS.items():
+        field = feed.timestamp_field
+        queryset = feed.queryset().filter(**{f'{field}__lte': horizon})
+        if not is_manager:
+            queryset = queryset.filter(feed.scope(user))
+        elif feed.manager_scope is not None:
+            queryset = queryset.filter(feed.manager_scope)
+        if name in positions:
+            timestamp, pk = positions[name]
+            queryset = queryset.filter(
+                Q(**{f'{field}__gt': timestamp}) | Q(**{field: timestamp, 'id__gt': pk})
+            )
+
+        items = list(queryset.order_by(field, 'id')[:page_size + 1])
+        if len(items) > page_size:
+            has_more = True
+            items = items[:page_size]
+        if items:
+            positions[name] = (getattr(items[-1], field), items[-1].pk)
+        changes[name] = feed.serialize(items)
+
+    changes['cursor'] = encode_cursor(positions)
+    changes['has_more'] = has_more
+    return changes
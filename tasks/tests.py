@@ -1,3 +1,798 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import smtplib
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import caches
+from django.core.mail.backends import locmem
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from analytics.models import ProjectAnalytics
+from employee_task_system.celery import (
+    app, relay_notification_outbox, send_notification_batch
+)
+from utils.testing import CacheIsolatedTestCase
+
+from .exports import TASK_EXPORT_FIELDS, TIME_LOG_EXPORT_FIELDS
+from .models import (
+    NotificationOutbox, Project, Task, TaskComment, TaskHistory, TimeLog, Tombstone
+)
+from .views import ProjectDetailView
+
+User = get_user_model()
+
+
+class TaskListQueryCountTests(CacheIsolatedTestCase):
+    """
+    The task list must cost a constant number of queries per page.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(
+            username='manager', password='pass', role='MANAGER'
+        )
+        cls.employee = User.objects.create_user(
+            username='employee', password='pass', role='EMPLOYEE'
+        )
+        cls.project = Project.objects.create(
+            name='Project', start_date=date.today(), end_date=date.today()
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.manager)
+
+    def create_tasks(self, count):
+        # bulk_create keeps the signal handlers (and the broker) out of the fixture
+        tasks = Task.objects.bulk_create([
+            Task(
+                title=f'Task {i}',
+                description='Description',
+                project=self.project,
+                assigned_to=self.employee,
+                created_by=self.manager,
+            )
+            for i in range(count)
+        ])
+        TaskComment.objects.bulk_create([
+            TaskComment(task=task, author=self.employee, content='Comment')
+            for task in tasks
+        ])
+        TimeLog.objects.bulk_create([
+            TimeLog(task=task, user=self.employee, hours=2, date=date.today())
+            for task in tasks
+        ])
+
+    def count_list_queries(self):
+        # Measure the database path, not the task list cache
+        caches['default'].clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/api/tasks/')
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries), response
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        self.create_tasks(2)
+        small_page_queries, _ = self.count_list_queries()
+
+        self.create_tasks(15)
+        large_page_queries, response = self.count_list_queries()
+
+        self.assertEqual(len(response.data['results']), 17)
+        self.assertEqual(small_page_queries, large_page_queries)
+
+    def test_annotated_fields_are_serialized(self):
+        self.create_tasks(1)
+        _, response = self.count_list_queries()
+
+        task = response.data['results'][0]
+        self.assertEqual(task['comments_count'], 1)
+        self.assertEqual(task['attachments_count'], 0)
+        self.assertEqual(float(task['time_logs_total']), 2.0)
+        self.assertEqual(task['project_name'], 'Project')
+
+
+class TaskAPITestCase(CacheIsolatedTestCase):
+    """A manager, an employee and a project, with fresh caches per test"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(
+            username='manager', password='pass', role='MANAGER'
+        )
+        cls.employee = User.objects.create_user(
+            username='employee', password='pass', role='EMPLOYEE'
+        )
+        cls.project = Project.objects.create(
+            name='Project', start_date=date.today(), end_date=date.today()
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.manager)
+
+    def create_task(self, **kwargs):
+        fields = {
+            'title': 'Task',
+            'description': 'Description',
+            'project': self.project,
+            'assigned_to': self.employee,
+            'created_by': self.manager,
+        }
+        fields.update(kwargs)
+        return Task.objects.create(**fields)
+
+
+class TaskChangeTrackingTests(TaskAPITestCase):
+
+    def task_selects(self, task):
+        with CaptureQueriesContext(connection) as queries:
+            task.save()
+        return [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('SELECT') and 'FROM "tasks_task"' in query['sql']
+        ]
+
+    def test_saving_a_fetched_task_does_not_reread_it(self):
+        task = Task.objects.get(pk=self.create_task().pk)
+
+        task.status = 'IN_PROGRESS'
+        self.assertEqual(self.task_selects(task), [])
+        self.assertTrue(
+            TaskHistory.objects.filter(task=task, action='STATUS_CHANGED', old_value='TODO').exists()
+        )
+
+    def test_saving_an_unloaded_task_fetches_its_previous_values(self):
+        # Built from field values, not loaded from a row
+        created = self.create_task()
+        task = Task(**{
+            field.attname: getattr(created, field.attname)
+            for field in Task._meta.concrete_fields
+        })
+
+        task.status = 'IN_PROGRESS'
+        self.assertEqual(len(self.task_selects(task)), 1)
+        self.assertTrue(
+            TaskHistory.objects.filter(task=task, action='STATUS_CHANGED', old_value='TODO').exists()
+        )
+
+
+class CursorPaginationTests(TaskAPITestCase):
+
+    def walk(self, url):
+        """Follow `next` links from url; returns the ids seen, page by page"""
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([row['id'] for row in response.data['results']])
+            url = response.data['next']
+        return pages
+
+    def test_task_list_pages_newest_first(self):
+        tasks = [self.create_task(title=f'Task {i}') for i in range(5)]
+        base = timezone.now()
+        for i, task in enumerate(tasks):
+            Task.objects.filter(pk=task.pk).update(created_at=base + timedelta(minutes=i))
+
+        response = self.client.get('/api/tasks/?pagination=cursor&page_size=2')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('count', response.data)
+        self.assertEqual(
+            [row['id'] for row in response.data['results']],
+            [tasks[4].id, tasks[3].id]
+        )
+
+        pages = self.walk('/api/tasks/?pagination=cursor&page_size=2')
+        self.assertEqual(
+            pages,
+            [[tasks[4].id, tasks[3].id], [tasks[2].id, tasks[1].id], [tasks[0].id]]
+        )
+
+    def test_ties_on_created_at_are_neither_skipped_nor_repeated(self):
+        tasks = [self.create_task(title=f'Task {i}') for i in range(5)]
+        Task.objects.update(created_at=timezone.now())
+
+        pages = self.walk('/api/tasks/?pagination=cursor&page_size=2')
+        ids = [task_id for page in pages for task_id in page]
+        self.assertEqual(ids, sorted((task.id for task in tasks), reverse=True))
+
+    def test_ordering_parameter_is_ignored(self):
+        low = self.create_task(priority='LOW')
+        high = self.create_task(priority='HIGH')
+
+        response = self.client.get('/api/tasks/?pagination=cursor&ordering=-priority')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [row['id'] for row in response.data['results']], [high.id, low.id]
+        )
+
+    def test_history_and_time_log_lists(self):
+        task = self.create_task()
+        TimeLog.objects.bulk_create([
+            TimeLog(task=task, user=self.employee, hours=1, date=date.today())
+            for _ in range(3)
+        ])
+
+        history_pages = self.walk(f'/api/tasks/{task.id}/history/?pagination=cursor&page_size=1')
+        self.assertEqual(len(history_pages), TaskHistory.objects.filter(task=task).count())
+
+        log_pages = self.walk(f'/api/tasks/{task.id}/time-logs/?pagination=cursor&page_size=2')
+        self.assertEqual(
+            sorted(task_id for page in log_pages for task_id in page),
+            sorted(TimeLog.objects.filter(task=task).values_list('id', flat=True))
+        )
+
+
+class RejectingEmailBackend(locmem.EmailBackend):
+    """Locmem backend whose server refuses anything addressed to rejected.example"""
+
+    def send_messages(self, messages):
+        for message in messages:
+            if any(address.endswith('@rejected.example') for address in message.to):
+                raise smtplib.SMTPRecipientsRefused({message.to[0]: (550, b'No such user')})
+        return super().send_messages(messages)
+
+
+class NotificationOutboxTests(TaskAPITestCase):
+
+    def outbox_rows(self, recipient):
+        return NotificationOutbox.objects.filter(recipient=recipient)
+
+    def test_task_changes_write_outbox_rows_not_emails(self):
+        task = self.create_task(assigned_to=None)
+        task.assigned_to = self.employee
+        task.save()
+        task.status = 'IN_PROGRESS'
+        task.save()
+
+        self.assertEqual(self.outbox_rows(self.employee).count(), 2)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_rolled_back_change_leaves_no_notification(self):
+        task = self.create_task(assigned_to=None)
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            task.assigned_to = self.employee
+            task.save()
+            raise RuntimeError
+
+        self.assertFalse(self.outbox_rows(self.employee).exists())
+
+    def test_relay_claims_a_recipients_rows_together(self):
+        other = User.objects.create_user(
+            username='other', password='pass', email='other@example.com'
+        )
+        for recipient in (self.employee, other, self.employee, other, self.employee):
+            NotificationOutbox.enqueue(recipient.id, 'Task', 'Message')
+
+        with override_settings(NOTIFICATION_OUTBOX_BATCH_SIZE=2), \
+                mock.patch.object(app, 'producer_or_acquire'), \
+                mock.patch.object(send_notification_batch, 'apply_async') as apply_async:
+            relay_notification_outbox.apply()
+
+        batches = [call.kwargs['args'][0] for call in apply_async.call_args_list]
+        self.assertEqual(
+            sorted(outbox_id for batch in batches for outbox_id in batch),
+            sorted(NotificationOutbox.objects.values_list('id', flat=True))
+        )
+        # The first claim of two rows pulls in both recipients' later rows
+        self.assertEqual(len(batches), 1)
+        self.assertFalse(NotificationOutbox.objects.filter(dispatched_at__isnull=True).exists())
+
+    def test_batch_sends_one_digest_per_recipient(self):
+        self.employee.email = 'employee@example.com'
+        self.employee.save()
+        for title in ('First', 'Second'):
+            NotificationOutbox.enqueue(self.employee.id, title, f'{title} message')
+        ids = list(self.outbox_rows(self.employee).values_list('id', flat=True))
+
+        send_notification_batch.apply(args=[ids])
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, '2 task updates')
+        self.assertIn('Second message', mail.outbox[0].body)
+        self.assertFalse(self.outbox_rows(self.employee).filter(delivered_at__isnull=True).exists())
+
+    @override_settings(EMAIL_BACKEND='tasks.tests.RejectingEmailBackend')
+    def test_rejected_recipient_does_not_block_the_batch(self):
+        self.employee.email = 'employee@example.com'
+        self.employee.save()
+        rejected = User.objects.create_user(
+            username='rejected', password='pass', email='gone@rejected.example'
+        )
+        NotificationOutbox.enqueue(rejected.id, 'Task', 'Message')
+        NotificationOutbox.enqueue(self.employee.id, 'Task', 'Message')
+        NotificationOutbox.objects.update(dispatched_at=timezone.now())
+        ids = list(NotificationOutbox.objects.values_list('id', flat=True))
+
+        # Eager retries run inline until max_retries is reached
+        send_notification_batch.apply(args=[ids])
+
+        self.assertEqual([message.to for message in mail.outbox], [['employee@example.com']])
+        delivered = self.outbox_rows(self.employee).get()
+        self.assertIsNotNone(delivered.delivered_at)
+        released = self.outbox_rows(rejected).get()
+        self.assertIsNone(released.delivered_at)
+        self.assertIsNone(released.dispatched_at)
+        self.assertEqual(released.attempts, 1)
+        self.assertIn('No such user', released.last_error)
+
+    @override_settings(
+        EMAIL_BACKEND='tasks.tests.RejectingEmailBackend', NOTIFICATION_MAX_ATTEMPTS=2
+    )
+    def test_repeatedly_rejected_rows_are_marked_failed(self):
+        rejected = User.objects.create_user(
+            username='rejected', password='pass', email='gone@rejected.example'
+        )
+        NotificationOutbox.enqueue(rejected.id, 'Task', 'Message')
+
+        for _ in range(3):
+            NotificationOutbox.objects.filter(dispatched_at__isnull=True).update(
+                dispatched_at=timezone.now()
+            )
+            send_notification_batch.apply(args=[[self.outbox_rows(rejected).get().id]])
+
+        failed = self.outbox_rows(rejected).get()
+        self.assertEqual(failed.attempts, 2)
+        self.assertIsNotNone(failed.failed_at)
+        # Still dispatched, so the relay never claims it again
+        self.assertIsNotNone(failed.dispatched_at)
+        self.assertEqual(mail.outbox, [])
+
+    def test_rows_for_recipients_without_email_are_marked_failed(self):
+        NotificationOutbox.enqueue(self.employee.id, 'Task', 'Message')
+        NotificationOutbox.objects.update(dispatched_at=timezone.now())
+
+        send_notification_batch.apply(args=[[self.outbox_rows(self.employee).get().id]])
+
+        row = self.outbox_rows(self.employee).get()
+        self.assertIsNone(row.delivered_at)
+        self.assertIsNotNone(row.failed_at)
+        self.assertEqual(row.last_error, 'Recipient has no email address')
+        self.assertEqual(mail.outbox, [])
+
+
+class TaskCacheTests(TaskAPITestCase):
+
+    def get_tasks(self, user, query=''):
+        self.client.force_authenticate(user)
+        response = self.client.get(f'/api/tasks/{query}')
+        self.assertEqual(response.status_code, 200)
+        return response.data['results']
+
+    def write(self, function, *args, **kwargs):
+        # Invalidation runs on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            return function(*args, **kwargs)
+
+    def test_repeated_list_is_served_from_cache(self):
+        self.create_task()
+        self.get_tasks(self.employee)
+
+        with self.assertNumQueries(0):
+            self.get_tasks(self.employee)
+
+    def test_task_write_invalidates_the_lists_showing_it(self):
+        self.get_tasks(self.employee)
+        self.get_tasks(self.manager)
+
+        task = self.write(self.create_task)
+
+        self.assertEqual([row['id'] for row in self.get_tasks(self.employee)], [task.id])
+        self.assertEqual([row['id'] for row in self.get_tasks(self.manager)], [task.id])
+
+    def test_task_write_leaves_unrelated_lists_cached(self):
+        other = User.objects.create_user(username='other', password='pass', role='EMPLOYEE')
+        other_project = Project.objects.create(
+            name='Other', start_date=date.today(), end_date=date.today()
+        )
+        self.get_tasks(other)
+        self.get_tasks(self.manager, f'?project={other_project.id}')
+
+        self.write(self.create_task)
+
+        with self.assertNumQueries(0):
+            self.get_tasks(other)
+            self.get_tasks(self.manager, f'?project={other_project.id}')
+
+    def test_reassignment_drops_the_task_from_the_previous_assignee(self):
+        task = self.write(self.create_task)
+        self.assertEqual(len(self.get_tasks(self.employee)), 1)
+
+        task.assigned_to = self.manager
+        self.write(task.save)
+
+        self.assertEqual(self.get_tasks(self.employee), [])
+
+    def test_comment_refreshes_the_task_counters(self):
+        task = self.write(self.create_task)
+        self.assertEqual(self.get_tasks(self.employee)[0]['comments_count'], 0)
+
+        self.write(TaskComment.objects.create, task=task, author=self.employee, content='Comment')
+
+        self.assertEqual(self.get_tasks(self.employee)[0]['comments_count'], 1)
+
+
+class ProjectCacheTests(TaskAPITestCase):
+
+    def get_project(self):
+        response = self.client.get(f'/api/tasks/projects/{self.project.id}/')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_cache_hit_still_checks_object_permissions(self):
+        self.get_project()
+
+        with mock.patch.object(
+            ProjectDetailView, 'check_object_permissions'
+        ) as check_object_permissions:
+            # Only the object lookup; the task counting is cached
+            with self.assertNumQueries(1):
+                self.get_project()
+        check_object_permissions.assert_called_once()
+
+    def test_task_write_invalidates_project_counts(self):
+        self.assertEqual(self.get_project()['task_count'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_task()
+
+        self.assertEqual(self.get_project()['task_count'], 1)
+
+    def test_deleted_project_is_not_served(self):
+        self.get_project()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.delete()
+
+        response = self.client.get(f'/api/tasks/projects/{self.project.id}/')
+        self.assertEqual(response.status_code, 404)
+
+
+class AssignTaskTests(TaskAPITestCase):
+
+    def assign(self, task, assigned_to):
+        return self.client.post(
+            f'/api/tasks/{task.id}/assign/', {'assigned_to': assigned_to}, format='multipart'
+        )
+
+    def test_reassigning_the_same_user_from_a_form_is_not_a_change(self):
+        task = self.create_task(assigned_to=None)
+
+        for _ in range(2):
+            response = self.assign(task, str(self.employee.id))
+            self.assertEqual(response.status_code, 200)
+
+        task.refresh_from_db()
+        self.assertEqual(task.assigned_to_id, self.employee.id)
+        self.assertEqual(NotificationOutbox.objects.filter(recipient=self.employee).count(), 1)
+        self.assertFalse(
+            TaskHistory.objects.filter(task=task, description__startswith='Task reassigned')
+            .exclude(description__contains='from Unassigned').exists()
+        )
+
+    def test_invalid_user_ids_are_rejected(self):
+        task = self.create_task(assigned_to=None)
+
+        response = self.assign(task, 'abc')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'error': 'Invalid user ID'})
+
+        response = self.assign(task, '999999')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'error': 'User not found'})
+
+
+@override_settings(EXPORT_CHUNK_SIZE=2)
+class ExportTests(TaskAPITestCase):
+
+    def export(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_tasks_stream_as_ndjson_in_id_order(self):
+        tasks = [self.create_task(title=f'Task {number}') for number in range(5)]
+
+        lines = self.export('/api/tasks/export/tasks/').splitlines()
+
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual([row['id'] for row in rows], [task.id for task in tasks])
+        self.assertEqual(list(rows[0]), TASK_EXPORT_FIELDS)
+        self.assertEqual(rows[0]['title'], 'Task 0')
+        self.assertEqual(rows[0]['assigned_to_id'], self.employee.id)
+
+    def test_csv_export_applies_the_filters(self):
+        self.create_task(title='Open')
+        done = self.create_task(title='Done', status='COMPLETED')
+
+        response = self.client.get(
+            '/api/tasks/export/tasks/', {'export_format': 'csv', 'status': 'COMPLETED'}
+        )
+
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('filename="tasks.csv"', response['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual([(row['id'], row['title']) for row in rows], [(str(done.id), 'Done')])
+
+    def test_unknown_format_is_rejected(self):
+        response = self.client.get('/api/tasks/export/tasks/', {'export_format': 'xml'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_employees_export_only_their_tasks_and_time_logs(self):
+        other = User.objects.create_user(username='other', password='pass', role='EMPLOYEE')
+        own = self.create_task()
+        foreign = self.create_task(assigned_to=other)
+        TimeLog.objects.create(task=own, user=self.employee, hours=1, date=date(2024, 1, 1))
+        own_log = TimeLog.objects.create(task=own, user=self.employee, hours=2, date=date(2024, 2, 1))
+        TimeLog.objects.create(task=foreign, user=other, hours=3, date=date(2024, 2, 1))
+        self.client.force_authenticate(self.employee)
+
+        tasks = self.export('/api/tasks/export/tasks/').splitlines()
+        self.assertEqual([json.loads(line)['id'] for line in tasks], [own.id])
+
+        logs = self.export('/api/tasks/export/time-logs/', date__gte='2024-01-15').splitlines()
+        rows = [json.loads(line) for line in logs]
+        self.assertEqual([row['id'] for row in rows], [own_log.id])
+        self.assertEqual(list(rows[0]), TIME_LOG_EXPORT_FIELDS)
+        self.assertEqual(rows[0]['hours'], '2.00')
+
+
+@override_settings(SYNC_SETTLE_SECONDS=0, SYNC_PAGE_SIZE=2)
+class TaskChangesTests(TaskAPITestCase):
+
+    def poll(self, cursor=None):
+        response = self.client.get('/api/tasks/changes/', {'cursor': cursor} if cursor else {})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def drain(self, cursor=None):
+        """Poll until has_more is false; returns the ids seen per feed and the last cursor"""
+        seen = {}
+        while True:
+            changes = self.poll(cursor)
+            cursor = changes['cursor']
+            for name in ('tasks', 'comments', 'time_logs', 'history', 'deleted'):
+                seen.setdefault(name, []).extend(item['id'] for item in changes[name])
+            if not changes['has_more']:
+                return seen, cursor
+
+    def test_pages_through_everything_then_only_new_changes(self):
+        tasks = [self.create_task(title=f'Task {number}') for number in range(3)]
+        comment = TaskComment.objects.create(task=tasks[0], author=self.manager, content='Hi')
+
+        first = self.poll()
+        self.assertTrue(first['has_more'])
+        self.assertEqual([task['id'] for task in first['tasks']], [tasks[0].id, tasks[1].id])
+
+        seen, cursor = self.drain(first['cursor'])
+        self.assertEqual(seen['tasks'], [tasks[2].id])
+        self.assertEqual(seen['comments'], [])
+        self.assertEqual(first['comments'][0]['id'], comment.id)
+
+        changes = self.poll(cursor)
+        self.assertEqual(changes['tasks'], [])
+        self.assertFalse(changes['has_more'])
+
+        tasks[1].title = 'Renamed'
+        tasks[1].save()
+        deleted_id = tasks[2].id
+        tasks[2].delete()
+        seen, _ = self.drain(cursor)
+        self.assertEqual(seen['tasks'], [tasks[1].id])
+        self.assertEqual(seen['deleted'], [deleted_id])
+
+    def test_employees_only_see_their_own_changes(self):
+        other = User.objects.create_user(username='other', password='pass', role='EMPLOYEE')
+        own = self.create_task()
+        foreign = self.create_task(assigned_to=other)
+        TimeLog.objects.create(task=foreign, user=other, hours=1, date=date.today())
+        foreign.delete()
+        self.client.force_authenticate(self.employee)
+
+        seen, _ = self.drain()
+
+        self.assertEqual(seen['tasks'], [own.id])
+        self.assertEqual(seen['time_logs'], [])
+        self.assertEqual(seen['deleted'], [])
+
+    def test_reassignment_revokes_the_task_from_the_old_assignee(self):
+        other = User.objects.create_user(username='other', password='pass', role='EMPLOYEE')
+        task = self.create_task()
+        moved_in_bulk = self.create_task()
+        _, manager_cursor = self.drain()
+        self.client.force_authenticate(self.employee)
+        _, cursor = self.drain()
+
+        task.assigned_to = other
+        task.save()
+        response = self.client.post('/api/tasks/bulk/update/', [
+            {'id': moved_in_bulk.id, 'title': 'Still mine'},
+        ], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.client.force_authenticate(self.manager)
+        response = self.client.post('/api/tasks/bulk/update/', [
+            {'id': moved_in_bulk.id, 'assigned_to': other.id},
+        ], format='json')
+        self.assertEqual(response.status_code, 200)
+
+        self.client.force_authenticate(self.employee)
+        changes = self.poll(cursor)
+        self.assertEqual(changes['tasks'], [])
+        revoked = [(row['id'], row['access_revoked']) for row in changes['deleted']]
+        self.assertEqual(revoked, [(task.id, True), (moved_in_bulk.id, True)])
+
+        self.client.force_authenticate(self.manager)
+        seen, _ = self.drain(manager_cursor)
+        self.assertEqual(seen['deleted'], [])
+
+    def test_cascaded_tombstones_are_written_in_one_batch(self):
+        task = self.create_task()
+        for _ in range(3):
+            TaskComment.objects.create(task=task, author=self.employee, content='Comment')
+            TimeLog.objects.create(task=task, user=self.employee, hours=1, date=date.today())
+        task_id = task.id
+
+        with CaptureQueriesContext(connection) as queries:
+            task.delete()
+
+        statements = [query['sql'] for query in queries.captured_queries]
+        self.assertEqual(
+            len([sql for sql in statements if sql.startswith('INSERT INTO "tasks_tombstone"')]), 1
+        )
+        self.assertFalse([
+            sql for sql in statements if sql.startswith('SELECT') and 'FROM "tasks_task"' in sql
+        ])
+        tombstones = Tombstone.objects.filter(task_id=task_id)
+        self.assertEqual(
+            sorted(tombstones.values_list('object_type', flat=True)),
+            ['comment'] * 3 + ['task'] + ['time_log'] * 3
+        )
+        self.assertEqual(
+            set(tombstones.values_list('task_assigned_to_id', 'task_created_by_id')),
+            {(self.employee.id, self.manager.id)}
+        )
+
+    def test_tampered_cursor_is_rejected(self):
+        cursor = self.poll()['cursor']
+        response = self.client.get('/api/tasks/changes/', {'cursor': cursor[:-2] + 'xx'})
+        self.assertEqual(response.status_code, 400)
+
+
+class BulkTaskTests(TaskAPITestCase):
+
+    def post(self, url, data):
+        return self.client.post(url, data, format='json')
+
+    def test_bulk_create_records_what_single_creates_do(self):
+        response = self.post('/api/tasks/bulk/create/', [
+            {'title': 'First', 'description': 'Description', 'project': self.project.id,
+             'assigned_to': self.employee.id, 'estimated_hours': '3'},
+            {'title': 'Second', 'description': 'Description', 'project': self.project.id},
+        ])
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 2)
+        tasks = Task.objects.filter(id__in=response.data['ids']).order_by('id')
+        self.assertEqual([task.title for task in tasks], ['First', 'Second'])
+        self.assertTrue(all(task.created_by_id == self.manager.id for task in tasks))
+        self.assertEqual(
+            TaskHistory.objects.filter(task__in=tasks, action='CREATED').count(), 2
+        )
+        self.assertEqual(
+            list(NotificationOutbox.objects.values_list('recipient_id', flat=True)),
+            [self.employee.id]
+        )
+        analytics = ProjectAnalytics.objects.get(project=self.project)
+        self.assertEqual(analytics.total_tasks, 2)
+        self.assertEqual(analytics.total_hours_estimated, Decimal('3.00'))
+
+    def test_one_invalid_item_rejects_the_batch(self):
+        response = self.post('/api/tasks/bulk/create/', [
+            {'title': 'Valid', 'description': 'Description'},
+            {'title': 'Invalid', 'description': 'Description', 'project': 999999},
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('project', response.data[1])
+        self.assertFalse(Task.objects.exists())
+
+    @override_settings(BULK_TASK_LIMIT=2)
+    def test_batches_over_the_limit_are_rejected(self):
+        item = {'title': 'Task', 'description': 'Description'}
+        response = self.post('/api/tasks/bulk/create/', [item] * 3)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Task.objects.exists())
+
+    def test_bulk_update_writes_only_the_given_fields(self):
+        first = self.create_task(priority='LOW')
+        second = self.create_task(title='Second')
+        before = second.updated_at
+
+        response = self.post('/api/tasks/bulk/update/', [
+            {'id': first.id, 'priority': 'HIGH', 'assigned_to': self.manager.id},
+            {'id': second.id, 'title': 'Renamed'},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(
+            (first.priority, first.assigned_to_id, first.title),
+            ('HIGH', self.manager.id, 'Task')
+        )
+        self.assertEqual((second.title, second.priority), ('Renamed', 'MEDIUM'))
+        self.assertGreater(second.updated_at, before)
+        self.assertTrue(TaskHistory.objects.filter(task=first, action='ASSIGNED').exists())
+
+    def test_duplicate_ids_are_rejected(self):
+        task = self.create_task()
+        response = self.post('/api/tasks/bulk/update/', [
+            {'id': task.id, 'title': 'One'}, {'id': task.id, 'title': 'Two'},
+        ])
+        self.assertEqual(response.status_code, 400)
+
+    def test_employees_cannot_update_other_tasks(self):
+        own = self.create_task(created_by=self.employee)
+        foreign = self.create_task(assigned_to=self.manager)
+        self.client.force_authenticate(self.employee)
+
+        response = self.post('/api/tasks/bulk/status/', [
+            {'id': own.id, 'status': 'COMPLETED'},
+            {'id': foreign.id, 'status': 'COMPLETED'},
+        ])
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('id', response.data[1])
+        own.refresh_from_db()
+        self.assertEqual(own.status, 'TODO')
+
+    def test_unknown_tasks_are_invalid_data(self):
+        response = self.post('/api/tasks/bulk/status/', [{'id': 999999, 'status': 'COMPLETED'}])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('id', response.data[0])
+
+    def test_employees_cannot_reassign_tasks_they_did_not_create(self):
+        task = self.create_task()
+        self.client.force_authenticate(self.employee)
+
+        response = self.post('/api/tasks/bulk/update/', [
+            {'id': task.id, 'assigned_to': self.manager.id},
+        ])
+
+        self.assertEqual(response.status_code, 403)
+        self.assertIn('assigned_to', response.data[0])
+
+    def test_bulk_status_completes_tasks(self):
+        tasks = [self.create_task() for _ in range(2)]
+
+        response = self.post('/api/tasks/bulk/status/', [
+            {'id': task.id, 'status': 'COMPLETED'} for task in tasks
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], 2)
+        for task in tasks:
+            task.refresh_from_db()
+            self.assertEqual(task.status, 'COMPLETED')
+            self.assertIsNotNone(task.completed_at)
+            self.assertTrue(TaskHistory.objects.filter(task=task, action='STATUS_CHANGED').exists())
+        analytics = ProjectAnalytics.objects.get(project=self.project)
+        self.assertEqual(analytics.completed_tasks, 2)
+        self.assertEqual(analytics.completion_percentage, Decimal('100.00'))
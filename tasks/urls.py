@@ -26,4 +26,16 @@ urlpatterns = [
     # Time Log URLs
     path('<int:task_id>/time-logs/', views.TimeLogListCreateView.as_view(), name='timelog-list-create'),
     path('time-logs/<int:pk>/', views.TimeLogDetailView.as_view(), name='timelog-detail'),
+    
+    # Sync change feed
+    path('changes/', views.task_changes, name='task-changes'),
+    
+    # Bulk write URLs
+    path('bulk/create/', views.bulk_create_tasks, name='task-bulk-create'),
+    path('bulk/update/', views.bulk_update_tasks, name='task-bulk-update'),
+    path('bulk/status/', views.bulk_update_task_status, name='task-bulk-status'),
+    
+    # Bulk export URLs
+    path('export/tasks/', views.TaskExportView.as_view(), name='task-export'),
+    path('export/time-logs/', views.TimeLogExportView.as_view(), name='timelog-export'),
 ]
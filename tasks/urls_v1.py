@@ -5,7 +5,9 @@ from .views import (
     TaskListCreateView, TaskDetailView, assign_task, update_task_status,
     TaskCommentListCreateView, TaskCommentDetailView,
     TaskAttachmentListCreateView, TaskAttachmentDetailView,
-    TaskHistoryListView, TimeLogListCreateView, TimeLogDetailView
+    TaskHistoryListView, TimeLogListCreateView, TimeLogDetailView,
+    TaskExportView, TimeLogExportView, task_changes,
+    bulk_create_tasks, bulk_update_tasks, bulk_update_task_status
 )
 
 router = routers.DefaultRouter()
@@ -38,4 +40,16 @@ urlpatterns = [
     # Time Log URLs
     path('<int:task_id>/time-logs/', TimeLogListCreateView.as_view(), name='timelog-list-create'),
     path('time-logs/<int:pk>/', TimeLogDetailView.as_view(), name='timelog-detail'),
+    
+    # Sync change feed
+    path('changes/', task_changes, name='task-changes'),
+    
+    # Bulk write URLs
+    path('bulk/create/', bulk_create_tasks, name='task-bulk-create'),
+    path('bulk/update/', bulk_update_tasks, name='task-bulk-update'),
+    path('bulk/status/', bulk_update_task_status, name='task-bulk-status'),
+    
+    # Bulk export URLs
+    path('export/tasks/', TaskExportView.as_view(), name='task-export'),
+    path('export/time-logs/', TimeLogExportView.as_view(), name='timelog-export'),
 ]
@@ -12,6 +12,15 @@ from .serializers import (
     TaskAttachmentSerializer, TaskHistorySerializer, TimeLogSerializer
 )
 from .throttles import UploadRateThrottle
+from .pagination import OptInCursorPaginationMixin, TimestampCursorPagination
+from .exports import StreamingExportMixin, TASK_EXPORT_FIELDS, TIME_LOG_EXPORT_FIELDS
+from .sync import collect_changes, InvalidCursor
+from .bulk import create_tasks, update_tasks, BulkTaskUpdateSerializer, BulkTaskStatusSerializer
+from utils.cache_utils import (
+    get_cached_task_list, set_cached_task_list,
+    get_cached_project_data, set_cached_project_data
+)
+from utils.two_tier_cache import cached_user_attributes
 from users.permissions import (
     IsEmployeeOrHigher, IsManagerOrAdmin, CanAssignTasks,
     IsTaskAssigneeOrCreator, IsOwnerOrManagerOrAdmin
@@ -36,8 +45,18 @@ class ProjectDetailView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = ProjectSerializer
     permission_classes = [IsManagerOrAdmin]
 
+    def retrieve(self, request, *args, **kwargs):
+        # get_object() runs the object-level permission checks on hits too;
+        # the cache saves the task counting in the serializer
+        project = self.get_object()
+        data = get_cached_project_data(project.pk)
+        if data is None:
+            data = self.get_serializer(project).data
+            set_cached_project_data(project.pk, data)
+        return Response(data)
+
 
-class TaskListCreateView(generics.ListCreateAPIView):
+class TaskListCreateView(OptInCursorPaginationMixin, generics.ListCreateAPIView):
     queryset = Task.objects.all()
     permission_classes = [IsEmployeeOrHigher]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -53,14 +72,48 @@ class TaskListCreateView(generics.ListCreateAPIView):
     def get_queryset(self):
         user = self.request.user
         if user.role in ['MANAGER', 'ADMIN']:
-            return Task.objects.all()
+            queryset = Task.objects.all()
         else:
-            return Task.objects.filter(
+            queryset = Task.objects.filter(
                 Q(assigned_to=user) | Q(created_by=user)
             ).distinct()
 
+        if self.request.method == 'GET':
+            queryset = TaskSerializer.setup_eager_loading(queryset)
+        return queryset
+
+    def get_cache_scope(self):
+        """
+        The narrowest set of tasks this list draws from, so task writes
+        elsewhere leave the cached list alone
+        """
+        user = self.request.user
+        if user.role not in ['MANAGER', 'ADMIN']:
+            return ('user', user.id)
+        project_ids = self.request.query_params.getlist('project')
+        if len(project_ids) == 1 and project_ids[0].isdigit():
+            return ('project', int(project_ids[0]))
+        return None
+
+    def list(self, request, *args, **kwargs):
+        # Keyed on every query parameter, including the page or cursor
+        scope = self.get_cache_scope()
+        data = get_cached_task_list(request.user.id, request.query_params, scope)
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            set_cached_task_list(request.user.id, request.query_params, data, scope)
+        return Response(data)
 
-class TaskDetailView(generics.RetrieveUpdateDestroyAPIView):
+
+class DeletedByMixin:
+    """Tell the delete signals who deleted the object, for its tombstone"""
+
+    def perform_destroy(self, instance):
+        instance._deleted_by = self.request.user
+        instance.delete()
+
+
+class TaskDetailView(DeletedByMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Task.objects.all()
     permission_classes = [IsEmployeeOrHigher, IsTaskAssigneeOrCreator]
 
@@ -79,7 +132,7 @@ class TaskCommentListCreateView(generics.ListCreateAPIView):
         return TaskComment.objects.filter(task_id=task_id)
 
 
-class TaskCommentDetailView(generics.RetrieveUpdateDestroyAPIView):
+class TaskCommentDetailView(DeletedByMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = TaskComment.objects.all()
     serializer_class = TaskCommentSerializer
     permission_classes = [IsOwnerOrManagerOrAdmin]
@@ -101,16 +154,17 @@ class TaskAttachmentDetailView(generics.RetrieveDestroyAPIView):
     permission_classes = [IsOwnerOrManagerOrAdmin]
 
 
-class TaskHistoryListView(generics.ListAPIView):
+class TaskHistoryListView(OptInCursorPaginationMixin, generics.ListAPIView):
     serializer_class = TaskHistorySerializer
     permission_classes = [IsEmployeeOrHigher]
+    cursor_pagination_class = TimestampCursorPagination
 
     def get_queryset(self):
         task_id = self.kwargs['task_id']
         return TaskHistory.objects.filter(task_id=task_id).order_by('-timestamp')
 
 
-class TimeLogListCreateView(generics.ListCreateAPIView):
+class TimeLogListCreateView(OptInCursorPaginationMixin, generics.ListCreateAPIView):
     serializer_class = TimeLogSerializer
     permission_classes = [IsEmployeeOrHigher]
 
@@ -119,12 +173,62 @@ class TimeLogListCreateView(generics.ListCreateAPIView):
         return TimeLog.objects.filter(task_id=task_id).order_by('-date')
 
 
-class TimeLogDetailView(generics.RetrieveUpdateDestroyAPIView):
+class TimeLogDetailView(DeletedByMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = TimeLog.objects.all()
     serializer_class = TimeLogSerializer
     permission_classes = [IsOwnerOrManagerOrAdmin]
 
 
+class TaskExportView(StreamingExportMixin, generics.GenericAPIView):
+    """
+    Stream every visible task matching the filters; ?updated_at__gte= allows
+    incremental pulls
+    """
+    permission_classes = [IsEmployeeOrHigher]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filterset_fields = {
+        'status': ['exact'],
+        'priority': ['exact'],
+        'assigned_to': ['exact'],
+        'project': ['exact'],
+        'created_at': ['gte', 'lt'],
+        'updated_at': ['gte', 'lt'],
+    }
+    search_fields = ['title', 'description']
+    export_fields = TASK_EXPORT_FIELDS
+    export_filename = 'tasks'
+
+    def get_queryset(self):
+        user = self.request.user
+        if user.role in ['MANAGER', 'ADMIN']:
+            return Task.objects.all()
+        return Task.objects.filter(Q(assigned_to=user) | Q(created_by=user))
+
+
+class TimeLogExportView(StreamingExportMixin, generics.GenericAPIView):
+    """
+    Stream every visible time log matching the filters
+    """
+    permission_classes = [IsEmployeeOrHigher]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = {
+        'task': ['exact'],
+        'user': ['exact'],
+        'date': ['gte', 'lte'],
+        'created_at': ['gte', 'lt'],
+    }
+    export_fields = TIME_LOG_EXPORT_FIELDS
+    export_filename = 'time_logs'
+
+    def get_queryset(self):
+        user = self.request.user
+        if user.role in ['MANAGER', 'ADMIN']:
+            return TimeLog.objects.all()
+        return TimeLog.objects.filter(
+            Q(user=user) | Q(task__assigned_to=user) | Q(task__created_by=user)
+        )
+
+
 @api_view(['POST'])
 @permission_classes([IsEmployeeOrHigher])
 def assign_task(request, task_id):
@@ -139,18 +243,23 @@ def assign_task(request, task_id):
         
         user_id = request.data.get('assigned_to')
         if user_id:
-            from django.contrib.auth import get_user_model
-            User = get_user_model()
-            assigned_user = User.objects.get(id=user_id)
-            task.assigned_to = assigned_user
+            # Form clients send IDs as strings; compare and store them as ints
+            try:
+                user_id = int(user_id)
+            except (TypeError, ValueError):
+                return Response({"error": "Invalid user ID"}, status=status.HTTP_400_BAD_REQUEST)
+            assignee = cached_user_attributes(user_id)
+            if assignee is None:
+                return Response({"error": "User not found"}, status=status.HTTP_400_BAD_REQUEST)
+            task.assigned_to_id = user_id
             
             # Create history record
             TaskHistory.objects.create(
                 task=task,
                 user=request.user,
                 action='ASSIGNED',
-                new_value=f"Assigned to {assigned_user.full_name}",
-                description=f"Task assigned to {assigned_user.full_name}"
+                new_value=f"Assigned to {assignee['full_name']}",
+                description=f"Task assigned to {assignee['full_name']}"
             )
             
             task.save()
@@ -179,7 +288,7 @@ def update_task_status(request, task_id):
             )
         
         new_status = request.data.get('status')
-        if new_status not in dict(Task.STATUS_CHOICES):
+        if new_status not in Task.STATUSES:
             return Response({"error": "Invalid status"}, status=status.HTTP_400_BAD_REQUEST)
         
         old_status = task.status
@@ -202,3 +311,50 @@ def update_task_status(request, task_id):
         return Response({"error": "Task not found"}, status=status.HTTP_404_NOT_FOUND)
     except Exception as e:
         return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['POST'])
+@permission_classes([IsEmployeeOrHigher])
+def bulk_create_tasks(request):
+    """
+    Create a list of tasks in one transaction. The whole batch is validated
+    first; any invalid item rejects the request with per-item errors.
+    """
+    tasks = create_tasks(request.user, request.data)
+    return Response(
+        {"created": len(tasks), "ids": [task.id for task in tasks]},
+        status=status.HTTP_201_CREATED
+    )
+
+
+@api_view(['POST'])
+@permission_classes([IsEmployeeOrHigher])
+def bulk_update_tasks(request):
+    """Apply a list of partial task updates ({"id": ..., <fields>}) in one transaction"""
+    tasks = update_tasks(request.user, request.data, BulkTaskUpdateSerializer)
+    return Response({"updated": len(tasks), "ids": [task.id for task in tasks]})
+
+
+@api_view(['POST'])
+@permission_classes([IsEmployeeOrHigher])
+def bulk_update_task_status(request):
+    """Apply a list of status changes ({"id": ..., "status": ...}) in one transaction"""
+    tasks = update_tasks(request.user, request.data, BulkTaskStatusSerializer)
+    return Response({"updated": len(tasks), "ids": [task.id for task in tasks]})
+
+
+@api_view(['GET'])
+@permission_classes([IsEmployeeOrHigher])
+def task_changes(request):
+    """
+    Change feed for sync clients: the visible tasks, comments, time logs,
+    history entries and deletions changed since ?cursor= (everything when
+    omitted). Store the returned cursor and poll again with it; keep
+    polling immediately while has_more is true. Changes are full objects,
+    so applying them is idempotent.
+    """
+    try:
+        changes = collect_changes(request.user, request.query_params.get('cursor'))
+    except InvalidCursor as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(changes)
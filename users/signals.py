@@ -0,0 +1,45 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+from analytics.rollups import move_user_department
+from .models import User
+from utils.cache_utils import invalidate_user_cache, invalidate_task_lists
+from utils.two_tier_cache import invalidate_user_attributes
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_cache_invalidation(sender, instance, **kwargs):
+    """Profiles are cached per user; task lists embed user names"""
+    update_fields = kwargs.get('update_fields')
+    if update_fields and set(update_fields) <= {'last_login'}:
+        # Logins touch nothing that is cached
+        return
+    
+    def invalidate():
+        invalidate_user_cache(instance.pk)
+        invalidate_task_lists()
+        invalidate_user_attributes()
+    
+    transaction.on_commit(invalidate)
+
+
+@receiver(pre_save, sender=User)
+def user_pre_save(sender, instance, **kwargs):
+    """Remember the previous department of an existing user"""
+    update_fields = kwargs.get('update_fields')
+    if instance.pk and (update_fields is None or 'department' in update_fields):
+        instance._old_department = User.objects.filter(pk=instance.pk).values_list(
+            'department', flat=True
+        ).first()
+
+
+@receiver(post_save, sender=User)
+def user_department_change(sender, instance, created, **kwargs):
+    """Daily department rollups follow the user's facts to their new department"""
+    if created or not hasattr(instance, '_old_department'):
+        return
+    old_department = instance._old_department
+    del instance._old_department
+    if old_department != instance.department:
+        move_user_department(instance.pk, old_department, instance.department)
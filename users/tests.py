@@ -1,3 +1,47 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from utils.testing import CacheIsolatedTestCase
+
+User = get_user_model()
+
+
+class UserProfileCacheTests(CacheIsolatedTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = User.objects.create_user(
+            username='employee', password='pass', role='EMPLOYEE', department='Sales'
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.employee)
+
+    def get_profile(self):
+        response = self.client.get('/api/auth/profile/')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_repeated_profile_is_served_from_cache(self):
+        self.get_profile()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_profile()['department'], 'Sales')
+
+    def test_profile_update_invalidates_the_cache(self):
+        self.get_profile()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch('/api/auth/profile/', {'department': 'Support'})
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.get_profile()['department'], 'Support')
+
+    def test_profiles_are_cached_per_user(self):
+        self.get_profile()
+        other = User.objects.create_user(username='other', password='pass', role='EMPLOYEE')
+
+        self.client.force_authenticate(other)
+        self.assertEqual(self.get_profile()['username'], 'other')
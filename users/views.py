@@ -8,6 +8,7 @@ from .serializers import (
     UserProfileSerializer, UserListSerializer,
     UserCreateSerializer, UserUpdateSerializer
 )
+from utils.cache_utils import get_cached_user_profile, set_cached_user_profile
 from .permissions import (
     IsAdminOrReadOnly, IsManagerOrAdmin, IsEmployeeOrHigher
 )
@@ -59,6 +60,13 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
     def get_object(self):
         return self.request.user
 
+    def retrieve(self, request, *args, **kwargs):
+        data = get_cached_user_profile(request.user.id)
+        if data is None:
+            data = self.get_serializer(self.get_object()).data
+            set_cached_user_profile(request.user.id, data)
+        return Response(data)
+
 
 class UserListView(generics.ListCreateAPIView):
     queryset = User.objects.all()
@@ -1,76 +1,298 @@
-from django.core.cache import cache
+import hashlib
+import json
+import math
+import random
+import time
+from django.core.cache import cache, caches
 from django.conf import settings
 
+# Bump when the key layout changes so old entries are simply ignored
+CACHE_KEY_VERSION = 1
+
+CACHED_RESOURCES = ('user_profile', 'task_list', 'project_data', 'analytics')
+
+
+def _normalize_filters(filters):
+    """Order-independent, JSON-serialisable form of a filter mapping"""
+    if not filters:
+        return {}
+    if hasattr(filters, 'lists'):
+        # QueryDict: keep every value of repeated parameters
+        items = ((key, sorted(values)) for key, values in filters.lists())
+    else:
+        items = filters.items()
+    return {
+        str(key): value for key, value in sorted(items)
+        if value not in (None, '', [])
+    }
+
+
+def filters_digest(filters):
+    """Stable digest of a filter mapping, identical across processes"""
+    payload = json.dumps(_normalize_filters(filters), sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def _generation_key(scope, scope_id):
+    return f'cache_gen:{scope}:{scope_id}'
+
+
+def _get_generations(scopes, backend):
+    """Current generation counters for several namespaces in one round trip"""
+    keys = [_generation_key(scope, scope_id) for scope, scope_id in scopes]
+    generations = backend.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            backend.add(key, 1, None)
+            generations[key] = backend.get(key, 1)
+    return [generations[key] for key in keys]
+
+
+def get_generation(scope, scope_id='all', backend=None):
+    """Current generation counter for a cache namespace"""
+    return _get_generations([(scope, scope_id)], backend or cache)[0]
+
+
+def bump_generation(scope, scope_id='all', backend=None):
+    """
+    Invalidate every entry in a namespace with a single INCR; entries
+    under the previous generation are never read again and expire
+    """
+    backend = backend or cache
+    key = _generation_key(scope, scope_id)
+    try:
+        return backend.incr(key)
+    except ValueError:
+        # Counter missing (evicted or never read): start a fresh generation
+        backend.add(key, 2, None)
+        return backend.get(key, 2)
+
+
+def _versioned_key(prefix, scopes, suffix='', backend=None):
+    generations = _get_generations(scopes, backend or cache)
+    namespace = ':'.join(
+        f'{scope}{scope_id}.{generation}'
+        for (scope, scope_id), generation in zip(scopes, generations)
+    )
+    key = f'v{CACHE_KEY_VERSION}:{prefix}:{namespace}'
+    return f'{key}:{suffix}' if suffix else key
+
+
+def _record_access(name, value):
+    """Count a hit or miss for `name`; returns value unchanged"""
+    key = f'cache_stats:{name}:{"misses" if value is None else "hits"}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+    return value
+
+
+def get_cache_stats():
+    """Hit/miss counters per cached resource"""
+    keys = [
+        f'cache_stats:{name}:{outcome}'
+        for name in CACHED_RESOURCES
+        for outcome in ('hits', 'misses')
+    ]
+    counters = cache.get_many(keys)
+    return {
+        name: {
+            outcome: counters.get(f'cache_stats:{name}:{outcome}', 0)
+            for outcome in ('hits', 'misses')
+        }
+        for name in CACHED_RESOURCES
+    }
+
+
+def _user_profile_key(user_id):
+    return _versioned_key('user_profile', [('user', user_id)])
+
+
+def _task_list_key(user_id, filters, scope=None):
+    # Every list sits under the global task_list generation (bumped when
+    # user or project names change) and under the generation of its scope:
+    # ('user', id) for a list of one user's tasks, ('project', id) for a
+    # list filtered to one project, None for a list over every task. Task
+    # writes only bump the scopes of the tasks they touch.
+    scope_name, scope_id = scope or ('unscoped', 'all')
+    return _versioned_key(
+        'task_list',
+        [('user', user_id), ('task_list', 'all'), (f'task_list_{scope_name}', scope_id)],
+        filters_digest(filters)
+    )
+
+
+def _project_data_key(project_id):
+    return _versioned_key('project_data', [('project', project_id)])
+
+
+def _analytics_key(key):
+    # Analytics entries stay readable after invalidation so they can be
+    # served stale; the generation is stored in the entry and compared
+    return f'v{CACHE_KEY_VERSION}:analytics:{key}'
+
+
+def _analytics_entry_is_fresh(entry, generation, early_refresh=False):
+    """
+    Whether a cached analytics entry may be served as-is. With
+    early_refresh, an entry close to expiry is reported stale with a
+    probability that grows as expiry nears and with how long it took to
+    compute (XFetch), so one request refreshes it before the herd arrives.
+    """
+    if entry is None or entry['generation'] != generation:
+        return False
+    expires_at = entry['expires_at']
+    if early_refresh:
+        beta = getattr(settings, 'ANALYTICS_CACHE_EARLY_REFRESH_BETA', 1.0)
+        expires_at += entry['compute_time'] * beta * math.log(1 - random.random())
+    return time.time() < expires_at
+
+
+def _store_analytics(backend, key, generation, data, compute_time):
+    timeout = settings.CACHE_TIMEOUTS['analytics']
+    stale_timeout = getattr(settings, 'ANALYTICS_CACHE_STALE_SECONDS', 600)
+    backend.set(_analytics_key(key), {
+        'data': data,
+        'generation': generation,
+        'expires_at': time.time() + timeout,
+        'compute_time': compute_time,
+    }, timeout + stale_timeout)
+
+
+def _compute_analytics(backend, key, generation, compute):
+    started = time.monotonic()
+    data = compute()
+    if data is not None:
+        _store_analytics(backend, key, generation, data, time.monotonic() - started)
+    return data
+
+
+def get_or_compute_analytics(key, compute):
+    """
+    Return cached analytics for `key`, recomputing with `compute()` when
+    needed with stampede protection:
+
+    - single flight: only the request holding the cache lock recomputes
+    - stale-while-revalidate: everyone else is served the previous value
+    - probabilistic early refresh ahead of expiry
+
+    A compute() result of None is returned as-is and not cached.
+    """
+    backend = caches['analytics']
+    generation = get_generation('analytics', 'all', backend=backend)
+    entry = backend.get(_analytics_key(key))
+    if _analytics_entry_is_fresh(entry, generation, early_refresh=True):
+        return _record_access('analytics', entry['data'])
+    _record_access('analytics', None)
+    
+    lock_key = f'{_analytics_key(key)}:lock'
+    lock_timeout = getattr(settings, 'ANALYTICS_CACHE_LOCK_SECONDS', 30)
+    if backend.add(lock_key, True, lock_timeout):
+        try:
+            return _compute_analytics(backend, key, generation, compute)
+        finally:
+            backend.delete(lock_key)
+    
+    if entry is not None:
+        # Another request is recomputing; serve the previous value meanwhile
+        return entry['data']
+    
+    # Nothing to fall back on yet: wait for the lock holder's result
+    deadline = time.monotonic() + lock_timeout
+    while time.monotonic() < deadline and backend.get(lock_key):
+        time.sleep(0.05)
+        entry = backend.get(_analytics_key(key))
+        if _analytics_entry_is_fresh(entry, generation):
+            return entry['data']
+    return _compute_analytics(backend, key, generation, compute)
+
 
 def get_cached_user_profile(user_id):
     """Get user profile from cache"""
-    cache_key = f'user_profile_{user_id}'
-    return cache.get(cache_key)
+    return _record_access('user_profile', cache.get(_user_profile_key(user_id)))
 
 
 def set_cached_user_profile(user_id, profile_data):
     """Set user profile in cache"""
-    cache_key = f'user_profile_{user_id}'
-    cache.set(cache_key, profile_data, settings.CACHE_TIMEOUTS['user_profile'])
+    cache.set(_user_profile_key(user_id), profile_data, settings.CACHE_TIMEOUTS['user_profile'])
 
 
-def get_cached_task_list(user_id, filters=None):
+def get_cached_task_list(user_id, filters=None, scope=None):
     """Get cached task list for user"""
-    cache_key = f'task_list_{user_id}_{hash(str(filters))}'
-    return cache.get(cache_key)
+    return _record_access('task_list', cache.get(_task_list_key(user_id, filters, scope)))
 
 
-def set_cached_task_list(user_id, filters, task_data):
+def set_cached_task_list(user_id, filters, task_data, scope=None):
     """Set task list in cache"""
-    cache_key = f'task_list_{user_id}_{hash(str(filters))}'
-    cache.set(cache_key, task_data, settings.CACHE_TIMEOUTS['task_list'])
+    cache.set(
+        _task_list_key(user_id, filters, scope), task_data,
+        settings.CACHE_TIMEOUTS['task_list']
+    )
 
 
 def get_cached_analytics(key):
     """Get analytics data from cache"""
-    cache_key = f'analytics_{key}'
-    return cache.get(cache_key)
+    backend = caches['analytics']
+    entry = backend.get(_analytics_key(key))
+    generation = get_generation('analytics', 'all', backend=backend)
+    if not _analytics_entry_is_fresh(entry, generation):
+        return _record_access('analytics', None)
+    return _record_access('analytics', entry['data'])
 
 
 def set_cached_analytics(key, data):
     """Set analytics data in cache"""
-    cache_key = f'analytics_{key}'
-    cache.set(cache_key, data, settings.CACHE_TIMEOUTS['analytics'], using='analytics')
+    backend = caches['analytics']
+    generation = get_generation('analytics', 'all', backend=backend)
+    _store_analytics(backend, key, generation, data, 0)
 
 
 def get_cached_project_data(project_id):
     """Get project data from cache"""
-    cache_key = f'project_data_{project_id}'
-    return cache.get(cache_key)
+    return _record_access('project_data', cache.get(_project_data_key(project_id)))
 
 
 def set_cached_project_data(project_id, data):
     """Set project data in cache"""
-    cache_key = f'project_data_{project_id}'
-    cache.set(cache_key, data, settings.CACHE_TIMEOUTS['project_data'])
+    cache.set(_project_data_key(project_id), data, settings.CACHE_TIMEOUTS['project_data'])
 
 
 def invalidate_user_cache(user_id):
     """Invalidate all cache entries for a user"""
-    patterns = [
-        f'user_profile_{user_id}',
-        f'task_list_{user_id}_*',
-    ]
-    for pattern in patterns:
-        cache.delete_many(cache.keys(pattern))
+    bump_generation('user', user_id)
+
+
+def invalidate_task_lists():
+    """Invalidate every cached task list"""
+    bump_generation('task_list', 'all')
+
+
+def invalidate_task_lists_for(user_ids=(), project_ids=()):
+    """
+    Invalidate the cached task lists that can show tasks of these users or
+    projects: the users' own lists, lists filtered to the projects and
+    lists over every task
+    """
+    for user_id in user_ids:
+        bump_generation('task_list_user', user_id)
+    for project_id in project_ids:
+        bump_generation('task_list_project', project_id)
+    bump_generation('task_list_unscoped', 'all')
 
 
 def invalidate_project_cache(project_id):
     """Invalidate project cache"""
-    cache_key = f'project_data_{project_id}'
-    cache.delete(cache_key)
+    bump_generation('project', project_id)
 
 
 def invalidate_analytics_cache(key=None):
     """Invalidate analytics cache"""
+    backend = caches['analytics']
     if key:
-        cache_key = f'analytics_{key}'
-        cache.delete(cache_key, using='analytics')
+        backend.delete(_analytics_key(key))
     else:
-        # Clear all analytics cache
-        cache.clear(using='analytics')
+        # Mark all analytics entries stale without clearing the backend;
+        # they can still be served while being recomputed
+        bump_generation('analytics', 'all', backend=backend)
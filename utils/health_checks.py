@@ -7,6 +7,7 @@ from django.db import connection
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from tasks.models import Task
+from utils.cache_utils import get_cache_stats
 import redis
 
 User = get_user_model()
@@ -123,6 +124,7 @@ class DetailedHealthView(View):
                 'cache': {
                     'backend': settings.CACHES['default']['BACKEND'],
                     'location': settings.CACHES['default']['LOCATION'],
+                    'stats': get_cache_stats(),
                 },
                 'celery': {
                     'broker_url': settings.CELERY_BROKER_URL,
@@ -0,0 +1,30 @@
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from .two_tier_cache import invalidate_project_names, invalidate_user_attributes
+
+# Tests must not depend on a running Redis
+LOCMEM_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'analytics': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'analytics',
+    },
+}
+
+
+def reset_caches():
+    """Empty both cache aliases and drop every process-local two-tier entry"""
+    for alias in LOCMEM_CACHES:
+        caches[alias].clear()
+    invalidate_project_names()
+    invalidate_user_attributes()
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CacheIsolatedTestCase(TestCase):
+    """Fresh caches per test, so no cached lookup outlives its rolled-back rows"""
+
+    def setUp(self):
+        super().setUp()
+        reset_caches()
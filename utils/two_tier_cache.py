@@ -0,0 +1,145 @@
+import threading
+import time
+from collections import OrderedDict
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+from .cache_utils import get_generation, bump_generation
+
+_MISSING = object()
+
+
+class LocalLRUCache:
+    """
+    Thread-safe per-process LRU mapping bounded to `max_entries`, whose
+    entries expire `timeout` seconds after being set
+    """
+
+    def __init__(self, max_entries, timeout):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.timeout, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class TwoTierCache:
+    """
+    Small, hot, rarely changing lookups: a per-process LRU in front of the
+    shared Django cache, in front of a loader.
+
+    Both tiers are namespaced by a generation counter in the shared cache.
+    invalidate() bumps it; other processes notice within
+    LOCAL_CACHE_VERSION_CHECK_SECONDS and drop their local tier, so a
+    local hit costs no network round trip.
+    """
+
+    def __init__(self, namespace, timeout, local_timeout=60, max_entries=1024):
+        self.namespace = namespace
+        self.timeout = timeout
+        self._local = LocalLRUCache(max_entries, local_timeout)
+        self._version = None
+        self._version_checked_at = 0
+
+    def _current_version(self):
+        now = time.monotonic()
+        interval = getattr(settings, 'LOCAL_CACHE_VERSION_CHECK_SECONDS', 5)
+        if self._version is None or now - self._version_checked_at >= interval:
+            version = get_generation('two_tier', self.namespace)
+            if version != self._version:
+                self._local.clear()
+                self._version = version
+            self._version_checked_at = now
+        return self._version
+
+    def get(self, key, loader):
+        """Return the value for `key`, calling loader(key) on a miss in both tiers"""
+        version = self._current_version()
+        value = self._local.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        shared_key = f'two_tier:{self.namespace}.{version}:{key}'
+        value = cache.get(shared_key, _MISSING)
+        if value is _MISSING:
+            value = loader(key)
+            cache.set(shared_key, value, self.timeout)
+        self._local.set(key, value)
+        return value
+
+    def invalidate(self):
+        """Drop every entry in this namespace, in all processes"""
+        self._version = bump_generation('two_tier', self.namespace)
+        self._version_checked_at = time.monotonic()
+        self._local.clear()
+
+
+project_names = TwoTierCache('project_name', timeout=60 * 60)
+user_attributes = TwoTierCache('user_attributes', timeout=60 * 15)
+
+
+def _load_project_name(project_id):
+    Project = apps.get_model('tasks', 'Project')
+    return Project.objects.filter(pk=project_id).values_list('name', flat=True).first()
+
+
+def _load_user_attributes(user_id):
+    row = get_user_model().objects.filter(pk=user_id).values(
+        'role', 'department', 'first_name', 'last_name'
+    ).first()
+    if row is None:
+        return None
+    return {
+        'role': row['role'],
+        'department': row['department'],
+        'full_name': f"{row['first_name']} {row['last_name']}".strip(),
+    }
+
+
+def cached_project_name(project_id):
+    """Name of a project, or None if it does not exist"""
+    if project_id is None:
+        return None
+    return project_names.get(project_id, _load_project_name)
+
+
+def cached_user_attributes(user_id):
+    """role, department and full_name of a user, or None if it does not exist"""
+    if user_id is None:
+        return None
+    return user_attributes.get(user_id, _load_user_attributes)
+
+
+def invalidate_project_names():
+    project_names.invalidate()
+
+
+def invalidate_user_attributes():
+    user_attributes.invalidate()